@@ -1,19 +1,319 @@
+import functools
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Dict, Optional, Set, Union
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Union,
+)
 
 import numpy
-from pydantic import BaseModel, BaseSettings
+from pydantic import BaseModel, BaseSettings, PrivateAttr
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+from pydantic.typing import is_namedtuple
 
 from ..testing import compare_recursive
-from ..util import deserialize, serialize, yaml_import
+from ..util import bundle, compression, deserialize, records, serialize, yaml_import
+from ..util.serialization import (
+    get_deserializer,
+    get_serializer,
+    json_loads,
+    json_primitives,
+    jsonl_loads,
+    msgpackext_iterload,
+)
 from ..util.autodocs import AutoPydanticDocGenerator
+from ..util.hashing import hash_object
 from ..util.decorators import classproperty
 
 cmsschema_draft = "http://json-schema.org/draft-07/schema#"
 
 __all__ = ["ProtoModel", "AutodocBaseSettings"]
 
+# Encodings that write_file and parse_file can compress
+_compressible_encodings = (
+    "json",
+    "js",
+    "json-ext",
+    "yaml",
+    "yml",
+    "jsonl",
+    "ndjson",
+    "msgpack",
+    "msgpack-ext",
+)
+
+_suffix_encodings = {
+    ".json": "json",
+    ".js": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".msgpack": "msgpack-ext",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".pickle": "pickle",
+    ".hdf5": "hdf5",
+    ".h5": "hdf5",
+    ".bundle": "bundle",
+}
+
+
+@contextmanager
+def _open_stream(
+    path_or_fp: Union[str, Path, IO],
+    mode: str,
+    codec: Optional[str] = None,
+    level: Optional[int] = None,
+) -> Iterator[IO]:
+    """Opens a path, compressed with ``codec`` if not None, or passes through an already open file object
+    without closing it."""
+    if hasattr(path_or_fp, "read") or hasattr(path_or_fp, "write"):
+        yield path_or_fp
+    elif codec is not None:
+        with compression.open_file(path_or_fp, mode, codec, level) as fp:
+            yield fp
+    else:
+        with open(path_or_fp, mode) as fp:
+            yield fp
+
+
+def _parse_jsonl_chunk(
+    cls: type, path: Union[str, Path], start: int, stop: int, trusted: bool = False
+) -> List["ProtoModel"]:
+    """Parses the JSON-lines records between byte offsets ``start`` and ``stop``, used by parse_jsonl workers."""
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        return [
+            cls.parse_obj(obj, trusted=trusted)
+            for obj in jsonl_loads(fp.read(stop - start))
+        ]
+
+
+def _dict_kwargs(**kwargs: Any) -> Dict[str, Any]:
+    """Returns the keyword arguments of ProtoModel.dict that are set."""
+    return {key: val for key, val in kwargs.items() if val}
+
+
+def _chunked(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _parse_many_chunk(
+    cls: type,
+    blobs: List[Union[bytes, str]],
+    encoding: str,
+    trusted: bool,
+    kwargs: Dict[str, Any],
+) -> List["ProtoModel"]:
+    """Parses a chunk of blobs, used by parse_many workers."""
+    return cls.parse_many(
+        blobs, encoding=encoding, max_workers=1, trusted=trusted, **kwargs
+    )
+
+
+def _serialize_many_chunk(
+    models: List["ProtoModel"],
+    encoding: str,
+    fdargs: Dict[str, Any],
+    kwargs: Dict[str, Any],
+) -> List[Union[bytes, str]]:
+    """Serializes a chunk of models, used by serialize_many workers."""
+    return ProtoModel.serialize_many(
+        models, encoding, max_workers=1, **fdargs, **kwargs
+    )
+
+
+def _jsonl_iterload(fp: BinaryIO, **kwargs: Dict[str, Any]) -> Iterator[Any]:
+    """Lazily deserializes a JSON-lines file object, one line at a time."""
+    for line in fp:
+        if line.strip():
+            yield json_loads(line, **kwargs)
+
+
+def _infer_encoding(path: Path) -> str:
+    """Infers the encoding of a file from its extension, e.g. 'msgpack-ext+zstd' for '.msgpack.zst'."""
+    try:
+        if path.suffix in compression.suffix_codecs:
+            encoding = _suffix_encodings[Path(path.stem).suffix]
+            return f"{encoding}+{compression.suffix_codecs[path.suffix]}"
+        return _suffix_encodings[path.suffix]
+    except KeyError:
+        raise TypeError(
+            "Could not infer `encoding`, please provide a `encoding` for this file."
+        )
+
+
+_dict_keywords = {
+    "include",
+    "exclude",
+    "by_alias",
+    "exclude_unset",
+    "exclude_defaults",
+    "exclude_none",
+}
+_atomic_types = (str, int, float, bool, type(None))
+
+
+class _SerializationPlan(NamedTuple):
+    """The precomputed steps of ProtoModel.dict and trusted parsing for a model class."""
+
+    fast: bool  # False if the class configuration requires the generic pydantic path
+    excludes: FrozenSet[str]
+    converters: Dict[str, Callable[[Any], Any]]
+    constructors: Dict[str, Callable[[Any], Any]]  # by alias, for nested models only
+    aliases: Dict[str, str]  # field names by alias, for aliased fields only
+
+
+def _plain_value(value: Any) -> Any:
+    """Converts a field value as BaseModel.dict does with default options."""
+    if value.__class__ in _atomic_types or isinstance(value, numpy.ndarray):
+        return value
+    elif isinstance(value, BaseModel):
+        return _model_value(value)
+    elif isinstance(value, dict):
+        return {key: _plain_value(val) for key, val in value.items()}
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        items = (_plain_value(val) for val in value)
+        if is_namedtuple(value.__class__):
+            return value.__class__(*items)
+        return value.__class__(items)
+    return value
+
+
+def _model_value(value: Any) -> Any:
+    """Converts a nested model as BaseModel.dict does with default options."""
+    if isinstance(value, ProtoModel) and value._serialization_plan.fast:
+        data = value._plain_dict()
+    elif isinstance(value, BaseModel):
+        data = value.dict(
+            by_alias=False,
+            exclude_unset=False,
+            exclude_defaults=False,
+            include=None,
+            exclude=None,
+            exclude_none=False,
+        )
+    else:
+        return _plain_value(value)
+    return data["__root__"] if "__root__" in data else data
+
+
+def _array_value(value: Any) -> Any:
+    return value if isinstance(value, numpy.ndarray) else _plain_value(value)
+
+
+def _field_converter(field: ModelField) -> Callable[[Any], Any]:
+    """Picks the conversion of a field in ProtoModel.dict from its declared type."""
+    if field.shape == SHAPE_SINGLETON and not field.sub_fields:
+        type_ = field.type_
+        if isinstance(type_, type):
+            if issubclass(type_, BaseModel):
+                return _model_value
+            elif issubclass(type_, numpy.ndarray):
+                return _array_value
+    return _plain_value
+
+
+def _construct(cls: type, obj: Any) -> BaseModel:
+    """Builds a model from trusted data with BaseModel.construct, i.e. without validation,
+    constructing nested models recursively."""
+    if not isinstance(obj, dict):
+        return cls.parse_obj(obj)
+
+    plan = getattr(cls, "_serialization_plan", None)
+    if plan is None:
+        plan = _build_serialization_plan(cls)
+    constructors = plan.constructors
+    # Keyed by field name, construct would otherwise keep aliased values under both keys
+    aliases = plan.aliases
+    values = {
+        aliases.get(key, key): constructors[key](val) if key in constructors else val
+        for key, val in obj.items()
+    }
+    return cls.construct(**values)
+
+
+def _field_constructor(field: ModelField) -> Optional[Callable[[Any], Any]]:
+    """Returns the constructor of a field holding a model or a list of models, None for other fields."""
+    type_ = field.type_
+    if not (isinstance(type_, type) and issubclass(type_, BaseModel)):
+        return None
+
+    def construct(value: Any) -> Any:
+        if isinstance(value, dict):
+            return _construct(type_, value)
+        return value
+
+    if field.shape == SHAPE_SINGLETON and not field.sub_fields:
+        return construct
+    elif field.shape == SHAPE_LIST:
+        return lambda value: (
+            [construct(val) for val in value] if isinstance(value, list) else value
+        )
+    return None
+
+
+def _unvalidated_value(value: Any) -> Any:
+    """Converts a (possibly constructed) model back to the data it was built from, for revalidation."""
+    if isinstance(value, BaseModel):
+        # Keyed by alias, as parse_obj expects
+        fields = value.__fields__
+        return {
+            (fields[key].alias if key in fields else key): _unvalidated_value(
+                value.__dict__[key]
+            )
+            for key in value.__fields_set__
+        }
+    elif isinstance(value, dict):
+        return {key: _unvalidated_value(val) for key, val in value.items()}
+    elif isinstance(value, list):
+        return [_unvalidated_value(val) for val in value]
+    return value
+
+
+def _build_serialization_plan(cls: type) -> _SerializationPlan:
+    """Builds the serialization plan of a ProtoModel class."""
+    config = cls.__config__
+    fast = not (
+        config.force_skip_defaults
+        or getattr(config, "use_enum_values", False)
+        or cls.__include_fields__
+        or cls.__exclude_fields__
+    )
+    return _SerializationPlan(
+        fast=fast,
+        excludes=frozenset(config.serialize_default_excludes),
+        converters={
+            name: _field_converter(field) for name, field in cls.__fields__.items()
+        },
+        constructors={
+            alias: constructor
+            for alias, constructor in (
+                (field.alias, _field_constructor(field))
+                for field in cls.__fields__.values()
+            )
+            if constructor is not None
+        },
+        aliases={
+            field.alias: name
+            for name, field in cls.__fields__.items()
+            if field.alias != name
+        },
+    )
+
 
 class ProtoModel(BaseModel):
     class Config:
@@ -23,14 +323,28 @@ class ProtoModel(BaseModel):
         serialize_default_excludes: Set = set()
         serialize_skip_defaults: bool = False
         force_skip_defaults: bool = False
+        # Text encoding of array data with the 'json-ext' encoding: 'hex' or 'base64'
+        array_encoding: str = "hex"
+        # Fields left out of get_hash, and the rounding of floats it applies
+        hash_excludes: Set = set()
+        hash_float_decimals: Optional[int] = None
 
         def schema_extra(schema, model):
             # below addresses the draft issue until https://github.com/samuelcolvin/pydantic/issues/1478 .
             schema["$schema"] = cmsschema_draft
 
+    # The open file of models loaded with parse_file(..., lazy=True)
+    _file_handle: Any = PrivateAttr(None)
+
     def __init_subclass__(cls, **kwargs) -> None:
         super().__init_subclass__(**kwargs)
         cls.__doc__ = AutoPydanticDocGenerator(cls, always_apply=True)
+        cls._serialization_plan = _build_serialization_plan(cls)
+
+    @classmethod
+    def update_forward_refs(cls, **localns: Any) -> None:
+        super().update_forward_refs(**localns)
+        cls._serialization_plan = _build_serialization_plan(cls)
 
     def __repr__(self):
         return f'{self.__repr_name__()}({self.__repr_str__(", ")})'
@@ -47,7 +361,42 @@ class ProtoModel(BaseModel):
             return None
 
     @classmethod
-    def parse_raw(cls, data: Union[bytes, str], *, encoding: str = None) -> "ProtoModel":  # type: ignore
+    def parse_obj(cls, obj: Any, *, trusted: bool = False) -> "ProtoModel":  # type: ignore
+        """
+        Parses a Python object (usually a dictionary) into a Model object.
+        Parameters
+        ----------
+        obj : Any
+            The data of the model.
+        trusted : bool, optional
+            If True, ``obj`` is assumed to be valid, e.g. produced by serializing a Model of the same class, and
+            the Model and its nested models are built without validation, see pydantic's BaseModel.construct.
+            Values are not coerced either, so arrays are only ndarrays with the 'msgpack-ext' and 'json-ext'
+            encodings. Use revalidate to validate such a Model later.
+        Returns
+        -------
+        Model
+            The requested model.
+        """
+        if trusted:
+            return _construct(cls, obj)
+        return super().parse_obj(obj)
+
+    def revalidate(self) -> "ProtoModel":
+        """Validates a Model built with ``trusted=True``.
+        Returns
+        -------
+        Model
+            A validated copy of the Model.
+        Raises
+        ------
+        pydantic.ValidationError
+            If the Model or its nested models are invalid.
+        """
+        return self.__class__.parse_obj(_unvalidated_value(self))
+
+    @classmethod
+    def parse_raw(cls, data: Union[bytes, str], *, encoding: str = None, trusted: bool = False, **kwargs: Dict[str, Any]) -> "ProtoModel":  # type: ignore
         """
         Parses raw string or bytes into a Model object.
         Parameters
@@ -55,7 +404,13 @@ class ProtoModel(BaseModel):
         data : Union[bytes, str]
             A serialized data blob to be deserialized into a Model.
         encoding : str, optional
-            The type of the serialized array, available types are: {'json', 'json-ext', 'msgpack-ext', 'pickle'}
+            The type of the serialized array, available types are: {'json', 'json-ext', 'msgpack-ext', 'pickle'}.
+            A compression suffix, e.g. 'msgpack-ext+zstd', decompresses the data first.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to deserialize for 'json-ext' and 'msgpack-ext', e.g.
+            ``writable=True``.
         Returns
         -------
         Model
@@ -72,56 +427,180 @@ class ProtoModel(BaseModel):
                     "Input is neither str nor bytes, please specify an encoding."
                 )
 
-        if encoding.endswith(("json", "javascript", "pickle")):
+        encoding, codec = compression.split_encoding(encoding)
+        if codec is not None:
+            data = compression.decompress(data, codec)
+            if encoding not in ["msgpack-ext", "pickle"]:
+                data = data.decode()
+
+        if encoding.endswith(("json", "javascript")) and trusted:
+            obj = json_loads(data)
+        elif encoding.endswith(("json", "javascript", "pickle")):
             return super().parse_raw(data, content_type=encoding)
         elif encoding in ["msgpack-ext", "json-ext", "yaml"]:
-            obj = deserialize(data, encoding)
+            obj = deserialize(data, encoding, **kwargs)
         else:
             raise TypeError(f"Content type '{encoding}' not understood.")
 
-        return cls.parse_obj(obj)
+        return cls.parse_obj(obj, trusted=trusted)
 
     @classmethod
-    def parse_file(cls, path: Union[str, Path], *, encoding: str = None) -> "ProtoModel":  # type: ignore
-        """Parses a file into a Model object.
+    def parse_many(
+        cls,
+        blobs: Iterable[Union[bytes, str]],
+        *,
+        encoding: str = None,
+        max_workers: Optional[int] = 1,
+        chunk_size: int = 1000,
+        trusted: bool = False,
+        **kwargs: Dict[str, Any],
+    ) -> List["ProtoModel"]:
+        """
+        Parses many raw strings or bytes into Model objects.
+        Equivalent to ``[cls.parse_raw(blob, encoding=encoding) for blob in blobs]``, but a single
+        decoder is set up for the whole batch.
         Parameters
         ----------
-        path : Union[str, Path]
-            The path to the file.
+        blobs : Iterable[Union[bytes, str]]
+            Serialized data blobs, each to be deserialized into a Model.
         encoding : str, optional
-            The type of the files, available types are: {'json', 'msgpack', 'pickle', 'hdf5'}. Attempts to
-            automatically infer the file type from the file extension if None.
+            The type of the serialized blobs, available types are: {'json', 'json-ext', 'msgpack-ext', 'yaml'}.
+            Inferred from the type of the first blob if None, see parse_raw.
+        max_workers : int, optional
+            If not 1, parse chunks of ``chunk_size`` blobs in a concurrent.futures.ProcessPoolExecutor
+            with ``max_workers`` processes (``None`` for one per CPU).
+        chunk_size : int, optional
+            The number of blobs handed to a worker process at a time.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to the decoder, e.g. ``writable=True``.
         Returns
         -------
-        Model
-            The requested model from a file format.
+        List[Model]
+            The requested models, in order.
         """
-        path = Path(path)
+        blobs = list(blobs)
+        if not blobs:
+            return []
 
         if encoding is None:
-            if path.suffix in [".json", ".js"]:
+            if isinstance(blobs[0], str):
                 encoding = "json"
-            elif path.suffix in [".yaml", ".yml"]:
-                encoding = "yaml"
-            elif path.suffix in [".msgpack"]:
+            elif isinstance(blobs[0], bytes):
                 encoding = "msgpack-ext"
-            elif path.suffix in [".pickle"]:
-                encoding = "pickle"
-            elif path.suffix in [".yaml", ".yml"]:
-                encoding = "yaml"
-            elif path.suffix in [".hdf5", ".h5"]:
-                encoding = "hdf5"
             else:
                 raise TypeError(
-                    "Could not infer `encoding`, please provide a `encoding` for this file."
+                    "Input is neither str nor bytes, please specify an encoding."
                 )
-        if encoding == "yaml":
-            return cls.parse_raw(path.read_text(), encoding=encoding)
+
+        if compression.split_encoding(encoding)[0] not in [
+            "json",
+            "json-ext",
+            "msgpack",
+            "msgpack-ext",
+            "yaml",
+        ]:
+            raise TypeError(f"Content type '{encoding}' not understood.")
+
+        if max_workers != 1:
+            chunks = _chunked(blobs, chunk_size)
+            nchunks = len(chunks)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(
+                    _parse_many_chunk,
+                    [cls] * nchunks,
+                    chunks,
+                    [encoding] * nchunks,
+                    [trusted] * nchunks,
+                    [kwargs] * nchunks,
+                )
+                return [model for chunk in results for model in chunk]
+
+        loads = get_deserializer(encoding, **kwargs)
+        return [cls.parse_obj(loads(blob), trusted=trusted) for blob in blobs]
+
+    @classmethod
+    def parse_file(cls, path: Union[str, Path], *, encoding: str = None, trusted: bool = False, lazy: bool = False, key: str = None, **kwargs: Dict[str, Any]) -> "ProtoModel":  # type: ignore
+        """Parses a file into a Model object, or into a list of Model objects for JSON-lines ('jsonl' or
+        'ndjson') files, which hold one model per line.
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The path to the file.
+        encoding : str, optional
+            The type of the files, available types are: {'json', 'msgpack', 'pickle', 'hdf5', 'jsonl', 'bundle'}.
+            Attempts to automatically infer the file type from the file extension if None. Files of the text
+            and msgpack encodings may be compressed, e.g. 'msgpack-ext+zstd' (inferred from '.msgpack.zst'),
+            and are decompressed as they are read.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj. Arrays of 'bundle' files are numpy.memmap views of the
+            file either way, but validation may copy them to cast their dtype.
+        lazy : bool, optional
+            For 'hdf5' files, keep the file open and return a Model whose array fields are
+            util.hdf.LazyDataset proxies that read data on demand. Implies ``trusted=True``. The Model
+            should be closed after use, or used as a context manager.
+        key : str, optional
+            For 'hdf5' files written by write_stream, the key (``id`` or ``hash_index``) of the record to read.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to parse_raw, or to parse_jsonl for 'jsonl' files.
+        Returns
+        -------
+        Model
+            The requested model from a file format. A list of models for 'jsonl' (or 'ndjson') files.
+        """
+        path = Path(path)
+        encoding = encoding or _infer_encoding(path)
+
+        if lazy and encoding not in ("hdf5", "h5"):
+            raise ValueError(
+                f"Lazy loading is only supported for 'hdf5' files, not '{encoding}'."
+            )
+        if key is not None and encoding not in ("hdf5", "h5"):
+            raise ValueError(
+                f"Reading records by key is only supported for 'hdf5' files, not '{encoding}'."
+            )
+
+        base, codec = compression.split_encoding(encoding)
+        if codec is not None:
+            if base in ("jsonl", "ndjson"):
+                # Compressed files cannot be split at byte offsets, so they are read as a record stream
+                return list(cls.iter_file(path, encoding=encoding, trusted=trusted))
+            elif base not in _compressible_encodings:
+                raise ValueError(f"Compression is not supported for '{base}' files.")
+            with compression.open_file(path, "rb", codec) as fp:
+                data = fp.read()
+            if base not in ("msgpack", "msgpack-ext"):
+                data = data.decode()
+            return cls.parse_raw(data, encoding=base, trusted=trusted, **kwargs)
+
+        if encoding in ("jsonl", "ndjson"):
+            kwargs.setdefault("max_workers", 1)
+            return cls.parse_jsonl(path, trusted=trusted, **kwargs)
+        elif encoding == "yaml":
+            return cls.parse_raw(path.read_text(), encoding=encoding, trusted=trusted)
+        elif encoding == "bundle":
+            return cls.parse_obj(bundle.read_file(path), trusted=trusted)
         elif encoding in ("hdf5", "h5"):
             from ..util import hdf
 
-            return cls.parse_obj(hdf.read_file(path))
-        return cls.parse_raw(path.read_bytes(), encoding=encoding)
+            if key is not None:
+                return cls.parse_obj(hdf.read_record(path, key), trusted=trusted)
+            elif lazy:
+                hdfobj = hdf.h5py.File(path, "r")
+                try:
+                    model = cls.parse_obj(
+                        hdf.read_dict(hdfobj, lazy=True), trusted=True
+                    )
+                except Exception:
+                    hdfobj.close()
+                    raise
+                model._file_handle = hdfobj
+                return model
+            return cls.parse_obj(hdf.read_file(path), trusted=trusted)
+        return cls.parse_raw(
+            path.read_bytes(), encoding=encoding, trusted=trusted, **kwargs
+        )
 
     def write_file(
         self,
@@ -129,6 +608,7 @@ class ProtoModel(BaseModel):
         *,
         encoding: str = None,
         mode: str = "w",
+        storage: Optional[Dict[str, Any]] = None,
         **kwargs: Optional[Dict[str, Any]],
     ):
         """Write a Model to an output file.
@@ -137,24 +617,268 @@ class ProtoModel(BaseModel):
         path : Union[str, Path]
             The path to the file.
         encoding : str, optional
-            The type of the files, available types are: {'json', 'msgpack', 'pickle', 'hdf5'}. Attempts to
-            automatically infer the file type from the file extension if None.
+            The type of the files, available types are: {'json', 'msgpack', 'pickle', 'hdf5', 'jsonl', 'bundle'}.
+            Attempts to automatically infer the file type from the file extension if None. Files of the text
+            and msgpack encodings may be compressed, e.g. 'msgpack-ext+zstd' (inferred from '.msgpack.zst'),
+            and are compressed as they are written. Unknown encodings and extensions raise a TypeError.
         mode : str, optional
             An optional string that specifies the mode in which the file is written. Overwrites existing
-            file by default (mode='w'). For appending to existing file, set mode='a'.
+            file by default (mode='w'). For appending to existing file, set mode='a', e.g. to add a record
+            to a 'jsonl' file. 'bundle' files cannot be appended to.
+        storage : Dict[str, Any], optional
+            The storage policy of 'hdf5' datasets (chunking, compression, etc.), passed to util.hdf.write_dict,
+            e.g. ``{"compression": "gzip", "shuffle": True}``.
         **kwargs: Dict[str, Any], optional
-            Additional keyword arguments passed to self.dict(), allows which fields to include, exclude, etc.
+            Additional keyword arguments passed to self.dict(), allows which fields to include, exclude, etc.,
+            and ``compression_level`` for compressed files.
         """
-        encoding = encoding or Path(path).suffix[1:]
+        encoding = encoding or _infer_encoding(Path(path))
+        encoding, codec = compression.split_encoding(encoding)
+        level = kwargs.pop("compression_level", None)
+
+        if codec is not None and encoding not in _compressible_encodings:
+            raise ValueError(f"Compression is not supported for '{encoding}' files.")
 
-        if encoding in ["json", "js", "yaml", "yml"]:
-            stringified = self.serialize(encoding=encoding, **kwargs)
-            with open(path, mode) as fp:
-                fp.write(stringified)
+        if encoding in _compressible_encodings:
+            if encoding == "msgpack":
+                encoding = "msgpack-ext"
+            blob = self.serialize(encoding=encoding, **kwargs)
+            if isinstance(blob, str):
+                blob = blob.encode()
+            with _open_stream(path, mode + "b", codec, level) as fp:
+                fp.write(blob)
         elif encoding in ["hdf5", "h5"]:
             from ..util import hdf
 
-            hdf.write_file(path, data=self.dict(**kwargs), mode=mode)
+            hdf.write_file(path, data=self.dict(**kwargs), mode=mode, **(storage or {}))
+        elif encoding == "bundle":
+            bundle.write_file(path, self.dict(**kwargs), mode=mode)
+        else:
+            raise TypeError(f"Encoding '{encoding}' not understood.")
+
+    @classmethod
+    def write_stream(
+        cls,
+        path_or_fp: Union[str, Path, BinaryIO],
+        models: Iterable["ProtoModel"],
+        *,
+        encoding: str = None,
+        mode: str = "a",
+        index: bool = False,
+        **kwargs: Optional[Dict[str, Any]],
+    ) -> int:
+        """Incrementally writes Model objects to a record stream, one record after another.
+        Parameters
+        ----------
+        path_or_fp : Union[str, Path, BinaryIO]
+            The path to the file, or a binary file object open for writing.
+        models : Iterable[ProtoModel]
+            The models to write. Consumed lazily, so generators need not fit in memory ('hdf5' records are
+            held in chunks of ``chunk_size`` records, see util.hdf.append_records).
+        encoding : str, optional
+            The type of the records, available types are: {'msgpack-ext', 'jsonl', 'hdf5'}. Attempts to
+            automatically infer the file type from the file extension if None. 'hdf5' records are stored
+            under their ``id`` or ``hash_index`` in a collection, see util.hdf.append_records. 'msgpack-ext'
+            and 'jsonl' files at a path may be compressed, e.g. 'jsonl+gzip' (inferred from '.jsonl.gz').
+        mode : str, optional
+            Appends to an existing file by default (mode='a'). To overwrite the file, set mode='w'.
+        index : bool, optional
+            Also record the offset, length, ``id``, ``hash_index`` and ``schema_name`` of each record in the
+            sidecar index ``util.records.index_path(path)``, used by open_records for random access. Requires
+            a path rather than a file object. Not needed for 'hdf5', whose records are keyed.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to self.serialize(), allows which fields to include, exclude, etc.
+            For 'hdf5', passed to self.dict(), except ``chunk_size`` passed to util.hdf.append_records and the
+            ``storage`` policy passed to util.hdf.write_dict.
+            ``compression_level`` sets the level of compressed streams.
+        Returns
+        -------
+        int
+            The number of records written.
+        """
+        if hasattr(path_or_fp, "write"):
+            encoding = encoding or "msgpack-ext"
+        else:
+            encoding = encoding or _infer_encoding(Path(path_or_fp))
+
+        if encoding in ("hdf5", "h5"):
+            from ..util import hdf
+
+            if hasattr(path_or_fp, "write"):
+                raise ValueError("HDF5 record collections require a path.")
+            storage = kwargs.pop("storage", None) or {}
+            chunk_size = kwargs.pop("chunk_size", 1000)
+            keys = hdf.append_records(
+                path_or_fp,
+                (model.dict(**kwargs) for model in models),
+                mode=mode,
+                chunk_size=chunk_size,
+                **storage,
+            )
+            return len(keys)
+
+        encoding, codec = compression.split_encoding(encoding)
+        level = kwargs.pop("compression_level", None)
+        if encoding not in ("msgpack", "msgpack-ext", "jsonl", "ndjson"):
+            raise TypeError(f"Record streams do not support encoding '{encoding}'.")
+        if encoding == "msgpack":
+            encoding = "msgpack-ext"
+
+        if index and hasattr(path_or_fp, "write"):
+            raise ValueError("A sidecar index can only be written alongside a path.")
+        if codec is not None and (index or hasattr(path_or_fp, "write")):
+            raise ValueError(
+                "Compressed record streams require a path and cannot be indexed."
+            )
+
+        # msgpack objects and JSON lines are self-delimiting, so records are simply written back to back
+        with _open_stream(path_or_fp, mode + "b", codec, level) as fp, (
+            open(records.index_path(path_or_fp), mode) if index else nullcontext()
+        ) as index_fp:
+            offset = fp.tell() if index else 0
+            nrecords = 0
+            for model in models:
+                blob = model.serialize(encoding, **kwargs)
+                if isinstance(blob, str):
+                    blob = blob.encode()
+                fp.write(blob)
+                if index:
+                    index_fp.write(records.index_entry(offset, len(blob), model))
+                    offset += len(blob)
+                nrecords += 1
+
+        return nrecords
+
+    @classmethod
+    def iter_file(
+        cls,
+        path_or_fp: Union[str, Path, BinaryIO],
+        *,
+        encoding: str = None,
+        trusted: bool = False,
+        **kwargs: Dict[str, Any],
+    ) -> Iterator["ProtoModel"]:
+        """Lazily parses a record stream written by write_stream into Model objects, one at a time.
+        Parameters
+        ----------
+        path_or_fp : Union[str, Path, BinaryIO]
+            The path to the file, or a binary file object open for reading.
+        encoding : str, optional
+            The type of the records, available types are: {'msgpack-ext', 'jsonl', 'hdf5'}. Attempts to
+            automatically infer the file type from the file extension if None. Compressed streams, e.g.
+            'msgpack-ext+zstd', are decompressed as they are read.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to the stream reader, e.g. ``writable=True``.
+        Returns
+        -------
+        Iterator[Model]
+            The requested models, read in constant memory.
+        """
+        if hasattr(path_or_fp, "read"):
+            encoding = encoding or "msgpack-ext"
+        else:
+            encoding = encoding or _infer_encoding(Path(path_or_fp))
+
+        encoding, codec = compression.split_encoding(encoding)
+        if codec is not None and hasattr(path_or_fp, "read"):
+            raise ValueError("Compressed record streams require a path.")
+
+        if encoding in ("msgpack", "msgpack-ext"):
+            loader = msgpackext_iterload
+        elif encoding in ("jsonl", "ndjson"):
+            loader = _jsonl_iterload
+        elif encoding in ("hdf5", "h5"):
+            from ..util import hdf
+
+            for obj in hdf.iter_records(path_or_fp, **kwargs):
+                yield cls.parse_obj(obj, trusted=trusted)
+            return
+        else:
+            raise TypeError(f"Record streams do not support encoding '{encoding}'.")
+
+        with _open_stream(path_or_fp, "rb", codec) as fp:
+            for obj in loader(fp, **kwargs):
+                yield cls.parse_obj(obj, trusted=trusted)
+
+    @classmethod
+    def parse_jsonl(
+        cls,
+        path: Union[str, Path],
+        *,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 2**24,
+        trusted: bool = False,
+    ) -> List["ProtoModel"]:
+        """Parses a JSON-lines file into Model objects, in parallel.
+        The file is split into line-aligned chunks of about ``chunk_size`` bytes that are parsed and
+        validated in a process pool.
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The path to the file.
+        max_workers : int, optional
+            The number of worker processes, see concurrent.futures.ProcessPoolExecutor. If 1, the file is
+            parsed in the current process.
+        chunk_size : int, optional
+            The approximate number of bytes handed to a worker at a time.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj.
+        Returns
+        -------
+        List[Model]
+            The requested models, in file order.
+        """
+        chunks = records.line_chunks(path, chunk_size)
+        if max_workers == 1 or len(chunks) < 2:
+            return [
+                model
+                for start, stop in chunks
+                for model in _parse_jsonl_chunk(cls, path, start, stop, trusted)
+            ]
+
+        nchunks = len(chunks)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _parse_jsonl_chunk,
+                [cls] * nchunks,
+                [path] * nchunks,
+                *zip(*chunks),
+                [trusted] * nchunks,
+            )
+            return [model for chunk in results for model in chunk]
+
+    @classmethod
+    def open_records(
+        cls,
+        path: Union[str, Path],
+        *,
+        encoding: str = None,
+        trusted: bool = False,
+        **kwargs: Dict[str, Any],
+    ) -> records.RecordFile:
+        """Opens a record stream written by write_stream(..., index=True) for random access.
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The path to the file.
+        encoding : str, optional
+            The type of the records, available types are: {'msgpack-ext', 'jsonl'}. Attempts to automatically
+            infer the file type from the file extension if None.
+        trusted : bool, optional
+            If True, skips validation, see parse_obj.
+        **kwargs: Dict[str, Any], optional
+            Additional keyword arguments passed to deserialize.
+        Returns
+        -------
+        RecordFile
+            Indexable by position and searchable with ``get(id=...)`` or ``get(hash_index=...)``, returning
+            Model objects. Should be closed after use, or used as a context manager.
+        """
+        encoding = encoding or _infer_encoding(Path(path))
+        parser = functools.partial(cls.parse_obj, trusted=trusted)
+        return records.RecordFile(path, encoding, parser=parser, **kwargs)
 
     def dict(
         self, *, ser_kwargs: Dict[str, Any] = {}, **kwargs: Dict[str, Any]
@@ -163,9 +887,11 @@ class ProtoModel(BaseModel):
         Parameters
         ----------
         ser_kwargs: Optional[Dict[str, Any]]
-            Additional keyword arguments to pass to serialize.
+            Additional keyword arguments to pass to serialize. Only used with ``encoding``, in which case the
+            dictionary is serialized and parsed back rather than converted directly with json_primitives.
         **kwargs: Optional[Dict[str, Any]]
-            Additional keyword arguments, allow which fields to include, exclude, etc.
+            Additional keyword arguments, allow which fields to include, exclude, etc. Pass ``encoding='json'``
+            or ``encoding='yaml'`` to get a dictionary of JSON (YAML) compatible primitives.
         Returns
         -------
         Dict[str, Any]
@@ -173,6 +899,12 @@ class ProtoModel(BaseModel):
         """
         encoding = kwargs.pop("encoding", None)
 
+        if self._is_plain_dict(kwargs):
+            data = self._plain_dict()
+            if encoding is None:
+                return data
+            return self._encode_dict(data, encoding, ser_kwargs)
+
         kwargs["exclude"] = (
             kwargs.get("exclude", None) or set()
         ) | self.__config__.serialize_default_excludes  # type: ignore
@@ -184,9 +916,48 @@ class ProtoModel(BaseModel):
 
         if encoding is None:
             return data
-        elif encoding == "json":
+        return self._encode_dict(data, encoding, ser_kwargs)
+
+    def _is_plain_dict(self, kwargs: Dict[str, Any]) -> bool:
+        """Whether dict can use the serialization plan, i.e. the keyword arguments select all fields
+        but the default excludes."""
+        if not self._serialization_plan.fast or not kwargs.keys() <= _dict_keywords:
+            return False
+        exclude_unset = kwargs.get(
+            "exclude_unset", self.__config__.serialize_skip_defaults  # type: ignore
+        )
+        return not (
+            kwargs.get("include") is not None
+            or kwargs.get("exclude")
+            or kwargs.get("by_alias")
+            or exclude_unset
+            or kwargs.get("exclude_defaults")
+            or kwargs.get("exclude_none")
+        )
+
+    def _plain_dict(self) -> Dict[str, Any]:
+        """Returns the fields as a dictionary with the precomputed serialization plan of the class."""
+        plan = self._serialization_plan
+        excludes = plan.excludes
+        converters = plan.converters
+        return {
+            name: converters.get(name, _plain_value)(value)
+            for name, value in self.__dict__.items()
+            if name not in excludes
+        }
+
+    @staticmethod
+    def _encode_dict(
+        data: Dict[str, Any], encoding: str, ser_kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Converts the output of dict to JSON or YAML primitives."""
+        if encoding == "json":
+            if not ser_kwargs:
+                return json_primitives(data)
             return json.loads(serialize(data, encoding=encoding, **ser_kwargs))
         elif encoding == "yaml":
+            if not ser_kwargs:
+                return json_primitives(data, str_keys=False)
             yaml = yaml_import(raise_error=True)
             return yaml.safe_load(serialize(data, encoding=encoding, **ser_kwargs))
         else:
@@ -221,24 +992,21 @@ class ProtoModel(BaseModel):
         exclude_none: Optional[bool], optional
             If True, skips fields that have value ``None``.
          **kwargs: Optional[Dict[str, Any]]
-            Additional keyword arguments to pass to serialize.
+            Additional keyword arguments to pass to serialize, e.g. ``array_encoding='base64'`` for 'json-ext'
+            (defaults to ``Config.array_encoding``).
         Returns
         -------
         Union[bytes, str]
             The serialized model.
         """
 
-        fdargs = {}
-        if include:
-            fdargs["include"] = include
-        if exclude:
-            fdargs["exclude"] = exclude
-        if exclude_unset:
-            fdargs["exclude_unset"] = exclude_unset
-        if exclude_defaults:
-            fdargs["exclude_defaults"] = exclude_defaults
-        if exclude_none:
-            fdargs["exclude_none"] = exclude_none
+        fdargs = _dict_kwargs(
+            include=include,
+            exclude=exclude,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
 
         data = self.dict(**fdargs)
 
@@ -246,9 +1014,93 @@ class ProtoModel(BaseModel):
             encoding = "json"
         elif encoding == "yml":
             encoding = "yaml"
+        if compression.split_encoding(encoding)[0] == "json-ext":
+            kwargs.setdefault("array_encoding", self.__config__.array_encoding)
 
         return serialize(data, encoding=encoding, **kwargs)
 
+    @classmethod
+    def serialize_many(
+        cls,
+        models: Iterable["ProtoModel"],
+        encoding: str,
+        *,
+        max_workers: Optional[int] = 1,
+        chunk_size: int = 1000,
+        include: Optional[Set[str]] = None,
+        exclude: Optional[Set[str]] = None,
+        exclude_unset: Optional[bool] = None,
+        exclude_defaults: Optional[bool] = None,
+        exclude_none: Optional[bool] = None,
+        **kwargs: Optional[Dict[str, Any]],
+    ) -> List[Union[bytes, str]]:
+        """Generates serialized representations of many models.
+        Equivalent to ``[model.serialize(encoding, ...) for model in models]``, but a single encoder
+        is set up for the whole batch.
+        Parameters
+        ----------
+        models : Iterable[ProtoModel]
+            The models to serialize.
+        encoding : str
+            The serialization type, available types are: {'json', 'json-ext', 'msgpack-ext', 'jsonl'}
+        max_workers : int, optional
+            If not 1, serialize chunks of ``chunk_size`` models in a concurrent.futures.ProcessPoolExecutor
+            with ``max_workers`` processes (``None`` for one per CPU).
+        chunk_size : int, optional
+            The number of models handed to a worker process at a time.
+        include, exclude, exclude_unset, exclude_defaults, exclude_none : optional
+            See serialize.
+         **kwargs: Optional[Dict[str, Any]]
+            Additional keyword arguments to pass to serialize.
+        Returns
+        -------
+        List[Union[bytes, str]]
+            The serialized models, in order.
+        """
+        fdargs = _dict_kwargs(
+            include=include,
+            exclude=exclude,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+
+        if compression.split_encoding(encoding)[0] == "json-ext":
+            kwargs.setdefault("array_encoding", cls.__config__.array_encoding)
+
+        if max_workers != 1:
+            chunks = _chunked(list(models), chunk_size)
+            nchunks = len(chunks)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(
+                    _serialize_many_chunk,
+                    chunks,
+                    [encoding] * nchunks,
+                    [fdargs] * nchunks,
+                    [kwargs] * nchunks,
+                )
+                return [blob for chunk in results for blob in chunk]
+
+        if encoding == "js":
+            encoding = "json"
+        elif encoding == "yml":
+            encoding = "yaml"
+
+        dumps = get_serializer(encoding, **kwargs)
+        return [dumps(model.dict(**fdargs)) for model in models]
+
+    def close(self) -> None:
+        """Closes the file of a Model loaded with parse_file(..., lazy=True). No-op for other Models."""
+        if self._file_handle is not None:
+            self._file_handle.close()
+            self._file_handle = None
+
+    def __enter__(self) -> "ProtoModel":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
     def json(self, **kwargs):
         # Alias JSON here from BaseModel to reflect dict changes
         return self.serialize("json", **kwargs)
@@ -256,6 +1108,26 @@ class ProtoModel(BaseModel):
     def yaml(self, **kwargs):
         return self.serialize("yaml", **kwargs)
 
+    def get_hash(self, *, algorithm: str = "blake2b") -> str:
+        """Computes a canonical hash of the fields of the Model, except ``Config.hash_excludes``.
+        Models with equal fields have equal hashes, whatever the order in which they were set or how they
+        were serialized in between. Floats are rounded to ``Config.hash_float_decimals`` decimals if not None.
+        Parameters
+        ----------
+        algorithm : str, optional
+            The hash algorithm, see util.hashing.get_hasher.
+        Returns
+        -------
+        str
+            The hex digest.
+        """
+        return hash_object(
+            self,
+            exclude=self.__config__.hash_excludes,
+            float_decimals=self.__config__.hash_float_decimals,
+            algorithm=algorithm,
+        )
+
     def compare(self, other: Union["ProtoModel", BaseModel], **kwargs) -> bool:
         """Compares the current object to the provided object recursively.
         Parameters
@@ -272,6 +1144,9 @@ class ProtoModel(BaseModel):
         return compare_recursive(self, other, **kwargs)
 
 
+ProtoModel._serialization_plan = _build_serialization_plan(ProtoModel)
+
+
 class AutodocBaseSettings(BaseSettings):
     def __init_subclass__(cls) -> None:
         cls.__doc__ = AutoPydanticDocGenerator(cls, always_apply=True)
@@ -1,7 +1,8 @@
 from typing import Any, Dict, Optional
-from pydantic import Field
+from pydantic import Field, root_validator
 
 from ..extras import provenance_stamp
+from ..util.hashing import hash_object
 from .base import ProtoModel
 from .common import (
     ComputeError,
@@ -39,6 +40,27 @@ class InputProc(ProtoModel):
         {}, description="Extra fields that are not part of the schema."
     )
 
+    class Config(ProtoModel.Config):
+        hash_excludes = {"id", "hash_index", "provenance"}
+
+    @root_validator(skip_on_failure=True)
+    def _fill_hash_index(cls, values):
+        # Content-addressed key of the procedure, identical for inputs that only differ in id or provenance.
+        # Always derived from the other fields, so that a stale value (given, copied or parsed) is replaced.
+        values["hash_index"] = hash_object(
+            values,
+            exclude=cls.__config__.hash_excludes,
+            float_decimals=cls.__config__.hash_float_decimals,
+        )
+        return values
+
+    def copy(self, **kwargs: Any) -> "InputProc":
+        # copy(update=...) skips validation, so the hash of the updated fields is computed here
+        new = super().copy(**kwargs)
+        if kwargs.get("update"):
+            new.__dict__["hash_index"] = new.get_hash()
+        return new
+
 
 class OutputProc(ProtoModel):
     proc_input: Optional[InputProc] = None
@@ -2,7 +2,18 @@ import copy
 import logging
 import pprint
 import sys
-from typing import Callable, Dict, List, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy
 from pydantic import BaseModel
@@ -34,6 +45,47 @@ def tnm() -> str:
     return sys._getframe().f_back.f_code.co_name
 
 
+# Arrays with more elements are described by summary statistics in failure messages, instead of in full
+summary_size = 100
+
+
+def _message_needed(
+    passfail: bool, return_message: bool, quiet: bool, return_handler: Callable
+) -> bool:
+    """Whether a comparison message will be used: returned, passed to a custom handler, or logged."""
+    if return_message or return_handler is not _handle_return:
+        return True
+    if quiet:
+        return False
+    return logging.getLogger().isEnabledFor(logging.INFO if passfail else logging.ERROR)
+
+
+def _format_array(arr: numpy.ndarray, suppress_small: bool = True) -> str:
+    arr_str = numpy.array_str(
+        arr, max_line_width=120, precision=12, suppress_small=suppress_small
+    )
+    return "\n".join("    " + ln for ln in arr_str.splitlines())
+
+
+def _mismatch_summary(
+    xptd: numpy.ndarray, cptd: numpy.ndarray, isclose: numpy.ndarray, diff=None
+) -> str:
+    """Describes the elements of large arrays that differ: how many, and the worst (or first) one."""
+    failed = ~isclose
+    nfailed = int(numpy.count_nonzero(failed))
+    if diff is not None and nfailed:
+        absdiff = numpy.where(failed, numpy.abs(diff), -1.0)
+        worst = numpy.unravel_index(int(numpy.argmax(absdiff)), xptd.shape)
+        what = f"Largest difference {abs(diff[worst])} at index {worst}"
+    else:
+        worst = numpy.unravel_index(int(numpy.argmax(failed)), xptd.shape)
+        what = f"First difference at index {worst}"
+    return (
+        f"  {nfailed} of {xptd.size} elements differ (shape {xptd.shape}).\n"
+        f"  {what}: computed {cptd[worst]}, expected {xptd[worst]}.\n"
+    )
+
+
 def compare_values(
     expected,
     computed,
@@ -92,13 +144,14 @@ def compare_values(
         absolute(computed - expected) <= (atol + rtol * absolute(expected))
     """
     label = label or sys._getframe().f_back.f_code.co_name
-    pass_message = f"\t{label:.<66}PASSED"
     if return_handler is None:
         return_handler = _handle_return
 
     if passnone:
         if expected is None and computed is None:
-            return return_handler(True, label, pass_message, return_message, quiet)
+            return return_handler(
+                True, label, f"\t{label:.<66}PASSED", return_message, quiet
+            )
 
     if numpy.iscomplexobj(expected):
         dtype = numpy.complex
@@ -127,11 +180,6 @@ def compare_values(
             quiet,
         )  # lgtm: [py/syntax-error]
 
-    digits1 = abs(int(numpy.log10(atol))) + 2
-    digits_str = f"to atol={atol}"
-    if rtol > 1.0e-12:
-        digits_str += f", rtol={rtol}"
-
     isclose = numpy.isclose(cptd, xptd, rtol=rtol, atol=atol, equal_nan=equal_nan)
     allclose = bool(numpy.all(isclose))
 
@@ -141,40 +189,39 @@ def compare_values(
         )
         allclose = bool(numpy.all(n_isclose))
 
-    if allclose:
-        message = pass_message
+    if not _message_needed(allclose, return_message, quiet, return_handler):
+        # Formatting large arrays is costly, so it is skipped when nobody reads the message
+        message = ""
 
-    else:
-        if xptd.shape == ():
-            xptd_str = f"{float(xptd):.{digits1}f}"
-        else:
-            xptd_str = numpy.array_str(
-                xptd, max_line_width=120, precision=12, suppress_small=True
-            )
-            xptd_str = "\n".join("    " + ln for ln in xptd_str.splitlines())
+    elif allclose:
+        message = f"\t{label:.<66}PASSED"
 
-        if cptd.shape == ():
-            cptd_str = f"{float(cptd):.{digits1}f}"
-        else:
-            cptd_str = numpy.array_str(
-                cptd, max_line_width=120, precision=12, suppress_small=True
-            )
-            cptd_str = "\n".join("    " + ln for ln in cptd_str.splitlines())
+    else:
+        digits1 = abs(int(numpy.log10(atol))) + 2
+        digits_str = f"to atol={atol}"
+        if rtol > 1.0e-12:
+            digits_str += f", rtol={rtol}"
 
         diff = cptd - xptd
         if xptd.shape == ():
+            xptd_str = f"{float(xptd):.{digits1}f}"
+            cptd_str = f"{float(cptd):.{digits1}f}"
             diff_str = f"{float(diff):.{digits1}f}"
             message = """\t{}: computed value ({}) does not match ({}) {} by difference ({}).""".format(
                 label, cptd_str, xptd_str, digits_str, diff_str
             )
+        elif xptd.size > summary_size:
+            message = """\t{}: computed value does not match {}.\n{}""".format(
+                label, digits_str, _mismatch_summary(xptd, cptd, isclose, diff)
+            )
         else:
             diff[isclose] = 0.0
-            diff_str = numpy.array_str(
-                diff, max_line_width=120, precision=12, suppress_small=False
-            )
-            diff_str = "\n".join("    " + ln for ln in diff_str.splitlines())
             message = """\t{}: computed value does not match {}.\n  Expected:\n{}\n  Observed:\n{}\n  Difference (passed elements are zeroed):\n{}\n""".format(
-                label, digits_str, xptd_str, cptd_str, diff_str
+                label,
+                digits_str,
+                _format_array(xptd),
+                _format_array(cptd),
+                _format_array(diff, suppress_small=False),
             )
 
     return return_handler(allclose, label, message, return_message, quiet)
@@ -219,7 +266,6 @@ def compare(
       exactly-comparable types. For mixed types, use :py:func:`compare_recursive`.
     """
     label = label or sys._getframe().f_back.f_code.co_name
-    pass_message = f"\t{label:.<66}PASSED"
     if return_handler is None:
         return_handler = _handle_return
 
@@ -254,59 +300,158 @@ def compare(
         else:
             allclose = bool(n_isclose.all())
 
-    if allclose:
-        message = pass_message
-
-    else:
-        if xptd.shape == ():
-            xptd_str = f"{xptd}"
-        else:
-            xptd_str = numpy.array_str(
-                xptd, max_line_width=120, precision=12, suppress_small=True
-            )
-            xptd_str = "\n".join("    " + ln for ln in xptd_str.splitlines())
+    if not _message_needed(allclose, return_message, quiet, return_handler):
+        message = ""
 
-        if cptd.shape == ():
-            cptd_str = f"{cptd}"
-        else:
-            cptd_str = numpy.array_str(
-                cptd, max_line_width=120, precision=12, suppress_small=True
-            )
-            cptd_str = "\n".join("    " + ln for ln in cptd_str.splitlines())
+    elif allclose:
+        message = f"\t{label:.<66}PASSED"
 
+    else:
         try:
             diff = cptd - xptd
         except TypeError:
-            diff_str = "(n/a)"
-        else:
-            if xptd.shape == ():
-                diff_str = f"{diff}"
-            else:
-                diff_str = numpy.array_str(
-                    diff, max_line_width=120, precision=12, suppress_small=False
-                )
-                diff_str = "\n".join("    " + ln for ln in diff_str.splitlines())
+            diff = None
 
         if xptd.shape == ():
+            diff_str = "(n/a)" if diff is None else f"{diff}"
             message = """\t{}: computed value ({}) does not match ({}) by difference ({}).""".format(
-                label, cptd_str, xptd_str, diff_str
+                label, cptd, xptd, diff_str
+            )
+        elif xptd.size > summary_size:
+            message = """\t{}: computed value does not match.\n{}""".format(
+                label, _mismatch_summary(xptd, cptd, numpy.asarray(xptd == cptd), diff)
             )
         else:
+            diff_str = (
+                "(n/a)" if diff is None else _format_array(diff, suppress_small=False)
+            )
             message = """\t{}: computed value does not match.\n  Expected:\n{}\n  Observed:\n{}\n  Difference:\n{}\n""".format(
-                label, xptd_str, cptd_str, diff_str
+                label, _format_array(xptd), _format_array(cptd), diff_str
             )
 
     return return_handler(allclose, label, message, return_message, quiet)
 
 
+# Element types of sequences compared in a single operation, see _sequence_mismatches
+_exact_types = frozenset([str, int, bool, complex])
+_float_types = frozenset([float, numpy.float64, numpy.float32])
+
+
+def _sequence_mismatches(
+    expected, computed, atol, rtol, equal_phase=False
+) -> Optional[List[int]]:
+    """Compares flat sequences of floats (vectorized, within tolerance) or of strings, ints, booleans and
+    complex numbers (exactly) in one operation.
+    Returns the positions of the items that differ, or None if the sequences hold other types and must be
+    compared item by item.
+    """
+    types = set(map(type, expected))
+    if types <= _exact_types:
+        try:
+            if list(expected) == list(computed):
+                return []
+        except (TypeError, ValueError):  # e.g. computed holds arrays
+            return None
+        return [i for i, (x, c) in enumerate(zip(expected, computed)) if x != c]
+    elif types <= _float_types:
+        try:
+            cptd = numpy.asarray(computed, dtype=float)
+        except (TypeError, ValueError):
+            return None
+        if cptd.shape != (len(expected),):
+            return None
+        xptd = numpy.asarray(expected, dtype=float)
+        isclose = numpy.isclose(cptd, xptd, rtol=rtol, atol=atol)
+        if equal_phase:
+            isclose |= numpy.isclose(-cptd, xptd, rtol=rtol, atol=atol)
+        return numpy.flatnonzero(~isclose).tolist()
+    return None
+
+
+def _floats_close(expected, computed, atol, rtol) -> bool:
+    """Cheap check that float scalars or float arrays of the same shape are equal within tolerance.
+    A False result is not conclusive: compare_values makes the full comparison (phase, inf, messages).
+    """
+    if isinstance(expected, numpy.ndarray):
+        if not (
+            isinstance(computed, numpy.ndarray)
+            and expected.shape == computed.shape
+            and computed.dtype.kind == "f"
+        ):
+            return False
+        xptd = expected.astype(float, copy=False)
+        diff = numpy.abs(computed.astype(float, copy=False) - xptd)
+        return bool((diff <= atol + rtol * numpy.abs(xptd)).all())
+    elif type(computed) in _float_types or type(computed) is int:
+        return abs(computed - expected) <= atol + rtol * abs(expected)
+    return False
+
+
+def _root_paths(paths: Optional[List[str]]) -> List[str]:
+    """Prefixes the paths given to ``forgive`` or ``equal_phase`` with 'root.'."""
+    return [(p if p.startswith("root.") else "root." + p) for p in paths or []]
+
+
+def _remove_phased(
+    errors: List[Tuple[str, str]],
+    expected,
+    computed,
+    atol: float,
+    rtol: float,
+    equal_phase: Union[bool, List],
+) -> List[Tuple[str, str]]:
+    """Removes the errors of the paths in ``equal_phase`` (all if True) that match with opposite phase."""
+    n_errors = _compare_recursive(
+        expected, computed, atol=atol, rtol=rtol, equal_phase=True
+    )
+    n_errors = dict(n_errors)
+
+    if equal_phase is True:
+        equal_phase = list(dict(errors).keys())
+    else:
+        equal_phase = _root_paths(equal_phase)
+
+    errors = list(errors)
+    for nomatch in sorted(errors):
+        for ep in equal_phase:
+            if nomatch[0].startswith(ep):
+                if nomatch[0] not in n_errors:
+                    errors.remove(nomatch)
+    return errors
+
+
+def _record_deviation(deviations: Dict[str, float], name: str, expected, computed):
+    """Records the largest absolute difference of numbers or arrays of the same shape, if any."""
+    try:
+        xptd = numpy.asarray(expected, dtype=float)
+        cptd = numpy.asarray(computed, dtype=float)
+    except (TypeError, ValueError):
+        return
+    if xptd.shape == cptd.shape and xptd.size:
+        with numpy.errstate(invalid="ignore"):
+            deviations[name] = float(numpy.max(numpy.abs(cptd - xptd)))
+
+
 def _compare_recursive(
-    expected, computed, atol, rtol, _prefix=False, equal_phase=False
+    expected,
+    computed,
+    atol,
+    rtol,
+    _prefix=False,
+    equal_phase=False,
+    fail_fast=False,
+    _forgive=(),
+    _deviations=None,
 ):
 
     errors = []
     name = _prefix or "root"
     prefix = name + "."
 
+    # Forgiven paths would be discarded anyway
+    if _forgive and name.startswith(_forgive):
+        return errors
+
     # Initial conversions if required
     if isinstance(expected, BaseModel):
         expected = expected.dict()
@@ -325,7 +470,16 @@ def _compare_recursive(
             if len(expected) != len(computed):
                 errors.append((name, "Iterable lengths did not match"))
             else:
-                for i, item1, item2 in zip(range(len(expected)), expected, computed):
+                # Only the items that differ are compared again, for their diagnostics
+                mismatches = _sequence_mismatches(
+                    expected, computed, atol, rtol, equal_phase
+                )
+                if mismatches is None:
+                    items = zip(range(len(expected)), expected, computed)
+                else:
+                    computed = list(computed)
+                    items = ((i, expected[i], computed[i]) for i in mismatches)
+                for i, item1, item2 in items:
                     errors.extend(
                         _compare_recursive(
                             item1,
@@ -334,8 +488,13 @@ def _compare_recursive(
                             atol=atol,
                             rtol=rtol,
                             equal_phase=equal_phase,
+                            fail_fast=fail_fast,
+                            _forgive=_forgive,
+                            _deviations=_deviations,
                         )
                     )
+                    if fail_fast and errors:
+                        break
         except TypeError:
             errors.append((name, "Expected computed to have a __len__()"))
 
@@ -348,6 +507,8 @@ def _compare_recursive(
             errors.append((name, "Missing keys {}".format(computed_extra)))
 
         for k in expected.keys() & computed.keys():
+            if fail_fast and errors:
+                break
             name = prefix + str(k)
             errors.extend(
                 _compare_recursive(
@@ -357,13 +518,19 @@ def _compare_recursive(
                     atol=atol,
                     rtol=rtol,
                     equal_phase=equal_phase,
+                    fail_fast=fail_fast,
+                    _forgive=_forgive,
+                    _deviations=_deviations,
                 )
             )
 
     elif isinstance(expected, (float, numpy.number)):
+        if _floats_close(expected, computed, atol, rtol):
+            return errors
         passfail, msg = compare_values(
             expected,
             computed,
+            name,
             atol=atol,
             rtol=rtol,
             equal_phase=equal_phase,
@@ -372,12 +539,17 @@ def _compare_recursive(
         )
         if not passfail:
             errors.append((name, "Arrays differ." + msg))
+            if _deviations is not None:
+                _record_deviation(_deviations, name, expected, computed)
 
     elif isinstance(expected, numpy.ndarray):
         if numpy.issubdtype(expected.dtype, numpy.floating):
+            if _floats_close(expected, computed, atol, rtol):
+                return errors
             passfail, msg = compare_values(
                 expected,
                 computed,
+                name,
                 atol=atol,
                 rtol=rtol,
                 equal_phase=equal_phase,
@@ -388,12 +560,15 @@ def _compare_recursive(
             passfail, msg = compare(
                 expected,
                 computed,
+                name,
                 equal_phase=equal_phase,
                 return_message=True,
                 quiet=True,
             )
         if not passfail:
             errors.append((name, "Arrays differ." + msg))
+            if _deviations is not None:
+                _record_deviation(_deviations, name, expected, computed)
 
     elif isinstance(expected, type(None)):
         if expected is not computed:
@@ -465,32 +640,9 @@ def compare_recursive(
     errors = _compare_recursive(expected, computed, atol=atol, rtol=rtol)
 
     if errors and equal_phase:
-        n_errors = _compare_recursive(
-            expected, computed, atol=atol, rtol=rtol, equal_phase=True
-        )
-        n_errors = dict(n_errors)
-
-        if equal_phase is False:
-            equal_phase = []
-        elif equal_phase is True:
-            equal_phase = list(dict(errors).keys())
-        else:
-            equal_phase = [
-                (ep if ep.startswith("root.") else "root." + ep) for ep in equal_phase
-            ]
-        phased = []
+        errors = _remove_phased(errors, expected, computed, atol, rtol, equal_phase)
 
-        for nomatch in sorted(errors):
-            for ep in equal_phase or []:
-                if nomatch[0].startswith(ep):
-                    if nomatch[0] not in n_errors:
-                        phased.append(nomatch)
-                        errors.remove(nomatch)
-
-    if forgive is None:
-        forgive = []
-    else:
-        forgive = [(fg if fg.startswith("root.") else "root." + fg) for fg in forgive]
+    forgive = _root_paths(forgive)
     forgiven = []
 
     for nomatch in sorted(errors):
@@ -518,6 +670,181 @@ def compare_recursive(
     )
 
 
+class PairReport(NamedTuple):
+    """
+    The comparison of one (expected, computed) pair by compare_many.
+
+    ``errors`` lists the failing paths (e.g. 'root.properties.return_energy') and their messages, and
+    ``deviations`` the largest absolute difference of the failing numbers and arrays, by path.
+    """
+
+    index: int
+    passed: bool
+    errors: List[Tuple[str, str]]
+    deviations: Dict[str, float]
+
+    @property
+    def paths(self) -> List[str]:
+        """The failing paths."""
+        return [path for path, _ in self.errors]
+
+    @property
+    def worst(self) -> Optional[Tuple[str, float]]:
+        """The path with the largest deviation and the deviation, None if no number or array failed."""
+        if not self.deviations:
+            return None
+        return max(self.deviations.items(), key=lambda item: item[1])
+
+    @property
+    def message(self) -> str:
+        """The failure message, as compare_recursive would return it."""
+        return "\n".join(f"{path}\n    {msg}" for path, msg in self.errors)
+
+
+class CompareReport(NamedTuple):
+    """The comparisons of compare_many, one PairReport per pair in order."""
+
+    pairs: List[PairReport]
+
+    @property
+    def passed(self) -> bool:
+        """Whether all the pairs passed."""
+        return all(pair.passed for pair in self.pairs)
+
+    @property
+    def failed(self) -> List[PairReport]:
+        """The pairs that failed."""
+        return [pair for pair in self.pairs if not pair.passed]
+
+    def worst(self, n: int = 10) -> List[Tuple[int, str, float]]:
+        """Returns the ``n`` largest deviations of all the pairs, as (pair index, path, deviation)."""
+        deviations = [
+            (pair.index, path, dev)
+            for pair in self.pairs
+            for path, dev in pair.deviations.items()
+        ]
+        deviations.sort(key=lambda item: item[2], reverse=True)
+        return deviations[:n]
+
+    def summary(self, n: int = 10) -> str:
+        """Returns the number of failed pairs and the ``n`` largest deviations."""
+        lines = [f"{len(self.failed)} of {len(self.pairs)} pairs failed"]
+        for index, path, dev in self.worst(n):
+            lines.append(f"    pair {index}: {path} differs by {dev:.3e}")
+        return "\n".join(lines)
+
+
+def _compare_pair(
+    index: int, expected, computed, options: Dict[str, Any]
+) -> PairReport:
+    """Compares one pair of compare_many, errors raised by the comparison are reported as failures."""
+    equal_phase = options["equal_phase"]
+    deviations = {}
+    try:
+        errors = _compare_recursive(
+            expected,
+            computed,
+            atol=options["atol"],
+            rtol=options["rtol"],
+            # The first mismatch may be forgiven by equal_phase, which needs them all
+            fail_fast=options["fail_fast"] and not equal_phase,
+            _forgive=options["forgive"],
+            _deviations=deviations,
+        )
+        if errors and equal_phase:
+            errors = _remove_phased(
+                errors,
+                expected,
+                computed,
+                options["atol"],
+                options["rtol"],
+                equal_phase,
+            )
+    except Exception as exc:
+        errors = [("root", f"Comparison raised {exc.__class__.__name__}: {exc}")]
+
+    errors.sort()
+    failed = {path for path, _ in errors}
+    deviations = {path: dev for path, dev in deviations.items() if path in failed}
+    return PairReport(index, not errors, errors, deviations)
+
+
+def _compare_chunk(
+    start: int, pairs: List[Tuple[Any, Any]], options: Dict[str, Any]
+) -> List[PairReport]:
+    """Compares a chunk of pairs, used by compare_many workers."""
+    return [
+        _compare_pair(start + i, expected, computed, options)
+        for i, (expected, computed) in enumerate(pairs)
+    ]
+
+
+def compare_many(
+    pairs: Iterable[Tuple[Any, Any]],
+    *,
+    atol: float = 1.0e-6,
+    rtol: float = 1.0e-16,
+    forgive: List[str] = None,
+    equal_phase: Union[bool, List] = False,
+    fail_fast: bool = False,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 100,
+) -> CompareReport:
+    """
+    Compares many (expected, computed) pairs of ProtoModels or nested structures, as compare_recursive
+    does, and returns a report instead of logging the results.
+    Parameters
+    ----------
+    pairs : Iterable[Tuple[Any, Any]]
+        The (expected, computed) pairs.
+    atol : float, optional
+        Absolute tolerance, see compare_recursive.
+    rtol : float, optional
+        Relative tolerance, see compare_recursive.
+    forgive : list, optional
+        Paths which may change between `expected` and `computed` without triggering failure. They are not
+        compared.
+    equal_phase : bool or list, optional
+        Compare computed *or its opposite* as equal, for all paths if True.
+    fail_fast : bool, optional
+        Stop comparing a pair at its first failing path, so that a single error is reported per failing
+        pair. Ignored when ``equal_phase`` is set.
+    max_workers : int, optional
+        If not 1, compare chunks of ``chunk_size`` pairs in a concurrent.futures.ProcessPoolExecutor
+        with ``max_workers`` processes (``None`` for one per CPU). The pairs must be picklable.
+    chunk_size : int, optional
+        The number of pairs handed to a worker process at a time.
+    Returns
+    -------
+    CompareReport
+        The report of each pair, in order: whether it passed, its failing paths and messages and the
+        largest deviations of its failing numbers and arrays.
+    """
+    if atol >= 1:
+        raise ValueError("Please express your atol literally, it must be less than 1.")
+    pairs = list(pairs)
+    options = {
+        "atol": atol,
+        "rtol": rtol,
+        "forgive": tuple(_root_paths(forgive)),
+        "equal_phase": equal_phase,
+        "fail_fast": fail_fast,
+    }
+
+    if max_workers == 1 or len(pairs) <= chunk_size:
+        return CompareReport(_compare_chunk(0, pairs, options))
+
+    starts = range(0, len(pairs), chunk_size)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            _compare_chunk,
+            starts,
+            [pairs[start : start + chunk_size] for start in starts],
+            [options] * len(starts),
+        )
+        return CompareReport([report for chunk in results for report in chunk])
+
+
 def compare_molrecs(
     expected,
     computed,
@@ -34,3 +34,233 @@ def test_write(obj):
     write_file(path_to_file.name, data=obj)
     assert path_to_file.is_file()
     path_to_file.unlink()
+
+
+@using_h5py
+def test_write_storage(tmp_path):
+    import h5py
+
+    from cmselemental.util.hdf import chunk_shape, read_file, write_file
+
+    assert chunk_shape((10**6, 3), 8) == (43690, 3)
+    assert chunk_shape((10, 10**6), 8) == (1, 131072)
+    assert chunk_shape((5,), 8) == (5,)
+
+    obj = {
+        "big": numpy.random.rand(20000, 3),
+        "small": numpy.random.rand(10),
+        "group": {"big": numpy.arange(20000), "raw": numpy.arange(20000)},
+    }
+    path = tmp_path / "storage.h5"
+    write_file(
+        path,
+        data=obj,
+        compression="gzip",
+        compression_opts=4,
+        shuffle=True,
+        overrides={"group/raw": {"compression": None, "shuffle": False}},
+    )
+
+    with h5py.File(path, "r") as hdfobj:
+        assert hdfobj["big"].compression == "gzip"
+        assert hdfobj["big"].shuffle
+        assert hdfobj["big"].chunks == (20000, 3)
+        assert hdfobj["small"].chunks is None
+        assert hdfobj["group/big"].compression == "gzip"
+        assert hdfobj["group/raw"].chunks is None
+
+    data = read_file(path)
+    numpy.testing.assert_array_equal(data["big"], obj["big"])
+    numpy.testing.assert_array_equal(data["group"]["raw"], obj["group"]["raw"])
+
+
+@using_h5py
+def test_parse_file_lazy(tmp_path):
+    from cmselemental.models import ProtoModel
+    from cmselemental.types import Array
+    from cmselemental.util.hdf import LazyDataset
+
+    class Trajectory(ProtoModel):
+        name: str
+        frames: Array[float]
+        extras: dict = {}
+
+    traj = Trajectory(
+        name="traj",
+        frames=numpy.random.rand(100, 10, 3),
+        extras={"labels": numpy.array(["a", "b"])},
+    )
+    path = tmp_path / "traj.h5"
+    traj.write_file(path)
+
+    with Trajectory.parse_file(path, lazy=True) as lazy:
+        assert lazy.name == "traj"
+        assert isinstance(lazy.frames, LazyDataset)
+        assert lazy.frames.shape == (100, 10, 3)
+        numpy.testing.assert_array_equal(lazy.frames[5], traj.frames[5])
+        numpy.testing.assert_array_equal(numpy.asarray(lazy.frames), traj.frames)
+        assert list(lazy.extras["labels"][:]) == ["a", "b"]
+    assert lazy._file_handle is None
+
+    eager = Trajectory.parse_file(path)
+    numpy.testing.assert_array_equal(eager.frames, traj.frames)
+
+    with pytest.raises(ValueError):
+        Trajectory.parse_file(tmp_path / "traj.json", lazy=True)
+
+
+@using_h5py
+def test_record_collection(tmp_path):
+    from cmselemental.models import InputProc
+    from cmselemental.util import hdf
+
+    def record(i, **kwargs):
+        return InputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            keywords={"step": i},
+            extras={"coordinates": numpy.random.rand(4, 3)},
+            **kwargs,
+        )
+
+    path = tmp_path / "campaign.h5"
+    first = [record(i, id=f"id{i}") for i in range(3)]
+    assert InputProc.write_stream(path, first) == 3
+    second = [record(3), record(4, id="abc")]
+    assert InputProc.write_stream(path, second, storage={"threshold": 0}) == 2
+    keys = ["id0", "id1", "id2", second[0].hash_index, "abc"]
+    assert hdf.record_keys(path) == keys
+
+    with pytest.raises(ValueError):
+        InputProc.write_stream(path, first[:1])
+    # Invalid batches are rejected before any record is written
+    with pytest.raises(ValueError, match="Duplicate"):
+        hdf.append_records(path, [{"id": "new"}, {"id": "x"}, {"id": "x"}])
+    with pytest.raises(ValueError, match="'/'"):
+        hdf.append_records(path, [{"id": "new"}, {"id": "a/b"}])
+    with pytest.raises(ValueError, match="already exists"):
+        hdf.append_records(path, [{"id": "new"}, {"id": "id0"}])
+    assert hdf.record_keys(path) == keys
+
+    # Batches are consumed in chunks, each checked before it is written
+    chunked = tmp_path / "chunked.h5"
+    batch = ({"id": f"new{i % 3}"} for i in range(4))
+    with pytest.raises(ValueError, match="Duplicate"):
+        hdf.append_records(chunked, batch, chunk_size=2)
+    assert hdf.record_keys(chunked) == ["new0", "new1"]
+    batch = iter([{}, {"id": "x"}, {}])
+    assert hdf.append_records(chunked, batch, chunk_size=1) == ["2", "x", "4"]
+
+    models = list(InputProc.iter_file(path))
+    for model, ref in zip(models, first + second):
+        assert model.keywords == ref.keywords
+        numpy.testing.assert_array_equal(
+            model.extras["coordinates"], ref.extras["coordinates"]
+        )
+
+    assert InputProc.parse_file(path, key="id1").keywords == {"step": 1}
+    assert InputProc.parse_file(path, key="abc").id == "abc"
+    key = second[0].hash_index
+    assert InputProc.parse_file(path, key=key).hash_index == key
+    with pytest.raises(KeyError):
+        hdf.read_record(path, "missing")
+
+
+@using_h5py
+def test_write_lists(tmp_path):
+    from cmselemental.util.hdf import read_file, write_file
+
+    obj = {
+        "ints": [1, 2, 3],
+        "floats": [1.0, 2, 3.5],
+        "bools": [True, False],
+        "strings": ["a", "bcd"],
+        "nested": [[1.0, 2.0], [3.0, 4.0]],
+        "ragged": [[1, 2, 3], [4], []],
+        "empty": [],
+    }
+    path = tmp_path / "lists.h5"
+    write_file(path, data=obj)
+
+    data = read_file(path)
+    assert data["ints"].dtype == numpy.int64
+    assert data["bools"].dtype == bool
+    assert data["strings"].tolist() == obj["strings"]
+    assert data["ragged"] == obj["ragged"]
+    for key in ("ints", "floats", "bools", "nested", "empty"):
+        numpy.testing.assert_array_equal(data[key], obj[key])
+
+    for bad in ([1, "a"], [[1, 2], ["a"]], [None, 1.0]):
+        with pytest.raises(NotImplementedError):
+            write_file(tmp_path / "bad.h5", data={"bad": bad})
+
+
+@using_h5py
+def test_read_nested_units(tmp_path):
+    from cmselemental.util.hdf import read_file, write_file
+
+    obj = {
+        "a": numpy.random.rand(3),
+        "a_units": "angstrom",
+        "group": {"b": numpy.arange(4), "b_units": "nm", "deeper": {"c": "text"}},
+    }
+    path = tmp_path / "units.h5"
+    write_file(path, data=obj)
+
+    data = read_file(path)
+    assert data["a_units"] == "angstrom"
+    assert data["group"]["b_units"] == "nm"
+    assert data["group"]["deeper"] == {"c": "text"}
+    numpy.testing.assert_array_equal(data["group"]["b"], obj["group"]["b"])
+
+
+@using_h5py
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "msgpack-ext"])
+def test_h5toserial(tmp_path, encoding):
+    if encoding == "msgpack-ext":
+        pytest.importorskip("msgpack")
+    from cmselemental.util.hdf import h5toserial, read_file, serialtoh5, write_file
+
+    obj = {
+        "coordinates": numpy.random.rand(4, 3),
+        "coordinates_units": "angstrom",
+        "energy": 1.5,
+        "name": "water",
+        "group": {"steps": numpy.arange(5), "labels": ["a", "b"]},
+    }
+    write_file(tmp_path / "in.h5", data=obj)
+    h5toserial(tmp_path / "in.h5", tmp_path / "out", encoding=encoding)
+    serialtoh5(tmp_path / "out", tmp_path / "out.h5", encoding=encoding)
+
+    data = read_file(tmp_path / "out.h5")
+    assert data["coordinates_units"] == "angstrom"
+    assert data["name"] == "water"
+    assert data["energy"] == 1.5
+    assert data["group"]["labels"].tolist() == ["a", "b"]
+    numpy.testing.assert_array_equal(data["coordinates"], obj["coordinates"])
+    numpy.testing.assert_array_equal(data["group"]["steps"], obj["group"]["steps"])
+
+
+@using_h5py
+def test_read_dict_order(tmp_path):
+    import h5py
+
+    from cmselemental.util.hdf import read_dict
+
+    path = tmp_path / "order.h5"
+    with h5py.File(path, "w", track_order=True) as hdfobj:
+        hdfobj["zeta"] = 1
+        group = hdfobj.create_group("tracked", track_order=True)
+        group["y"] = 2
+        group["x"] = numpy.arange(2)
+        group["x"].attrs["x_units"] = "bohr"
+        hdfobj["alpha"] = 3
+        group = hdfobj.create_group("untracked")
+        group["z"] = 1
+        group["a"] = 2
+
+    with h5py.File(path, "r") as hdfobj:
+        data = read_dict(hdfobj)
+    assert list(data) == ["zeta", "tracked", "alpha", "untracked"]
+    assert list(data["tracked"]) == ["y", "x", "x_units"]
+    assert list(data["untracked"]) == ["a", "z"]
@@ -1,4 +1,8 @@
+import json
+from typing import Optional
+
 import pytest
+from pydantic import Field
 
 from cmselemental.models import (
     ComputeError,
@@ -91,3 +95,459 @@ def test_model_custom_repr():
     m = Model2(a=5)
     assert "Model2(" in repr(m)
     assert str(m) == "Hello world!"
+
+
+def test_model_out_of_band_roundtrip():
+    numpy = pytest.importorskip("numpy")
+    pytest.importorskip("msgpack")
+
+    opt = OutputProc(
+        schema_name="my_schema",
+        schema_version=1,
+        success=True,
+        extras={"trajectory": numpy.random.rand(10, 4, 3)},
+    )
+    buffers = []
+    header = opt.serialize("msgpack-ext", buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    assert numpy.shares_memory(numpy.asarray(buffers[0]), opt.extras["trajectory"])
+
+    new_opt = OutputProc.parse_raw(header, encoding="msgpack-ext", buffers=buffers)
+    assert opt.compare(new_opt)
+
+
+def test_model_stream_roundtrip(tmp_path):
+    pytest.importorskip("msgpack")
+
+    outputs = [
+        OutputProc(
+            schema_name="my_schema", schema_version=1, success=True, stdout=str(i)
+        )
+        for i in range(5)
+    ]
+    path = tmp_path / "records.msgpack"
+    assert OutputProc.write_stream(path, outputs[:3]) == 3
+    assert OutputProc.write_stream(path, iter(outputs[3:])) == 2
+
+    stream = OutputProc.iter_file(path)
+    assert next(stream).compare(outputs[0])
+    assert [out.stdout for out in stream] == ["1", "2", "3", "4"]
+
+    with open(path, "rb") as fp:
+        assert len(list(OutputProc.iter_file(fp))) == 5
+
+    other = tmp_path / "records.bin"
+    assert OutputProc.write_stream(other, outputs, encoding="msgpack") == 5
+    assert other.read_bytes() == path.read_bytes()
+    assert len(list(OutputProc.iter_file(other, encoding="msgpack"))) == 5
+
+
+def test_model_stream_index(tmp_path):
+    pytest.importorskip("msgpack")
+
+    inputs = [
+        InputProc(
+            schema_name="my_schema", schema_version=1, id=f"id{i}", keywords={"i": i}
+        )
+        for i in range(6)
+    ]
+    path = tmp_path / "records.msgpack"
+    InputProc.write_stream(path, inputs[:2], index=True, mode="w")
+    InputProc.write_stream(path, inputs[2:], index=True)
+
+    with InputProc.open_records(path) as records:
+        assert len(records) == 6
+        assert records[3].compare(inputs[3])
+        assert records[-1].id == "id5"
+        assert records.get(id="id4").hash_index == inputs[4].hash_index
+        assert records.get(hash_index=inputs[1].hash_index).id == "id1"
+        assert records.index[2]["schema_name"] == "my_schema"
+        with pytest.raises(KeyError):
+            records.get(id="missing")
+
+
+def test_model_jsonl(tmp_path):
+    outputs = [
+        OutputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            success=True,
+            stdout=f"line {i}\nnext",
+        )
+        for i in range(20)
+    ]
+    path = tmp_path / "records.jsonl"
+    outputs[0].write_file(path)
+    OutputProc.write_stream(path, outputs[1:], index=True)
+
+    assert len(path.read_text().splitlines()) == 20
+    assert [out.stdout for out in OutputProc.iter_file(path)][-1] == "line 19\nnext"
+
+    parsed = OutputProc.parse_file(path)
+    assert len(parsed) == 20
+    assert all(out.compare(ref) for out, ref in zip(parsed, outputs))
+
+    parsed = OutputProc.parse_jsonl(path, max_workers=2, chunk_size=100)
+    assert [out.stdout for out in parsed] == [out.stdout for out in outputs]
+
+    with OutputProc.open_records(path) as records:
+        assert len(records) == 19
+        assert records[0].compare(outputs[1])
+
+
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "msgpack-ext"])
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_model_many_roundtrip(encoding, max_workers):
+    if encoding == "msgpack-ext":
+        pytest.importorskip("msgpack")
+
+    outputs = [
+        OutputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            success=False,
+            error=ComputeError(error_type="random_error", error_message=str(i)),
+        )
+        for i in range(25)
+    ]
+    blobs = OutputProc.serialize_many(
+        outputs, encoding, max_workers=max_workers, chunk_size=10
+    )
+    assert blobs == [out.serialize(encoding) for out in outputs]
+
+    parsed = OutputProc.parse_many(
+        blobs, encoding=encoding, max_workers=max_workers, chunk_size=10
+    )
+    assert len(parsed) == 25
+    assert all(out.compare(ref) for out, ref in zip(parsed, outputs))
+
+
+@pytest.mark.parametrize("encoding", ["json", "yaml"])
+def test_model_dict_encoding(encoding):
+    numpy = pytest.importorskip("numpy")
+    yaml = pytest.importorskip("yaml")
+
+    opt = OutputProc(
+        schema_name="my_schema",
+        schema_version=1,
+        success=False,
+        error=ComputeError(error_type="random_error", error_message="this is bad"),
+        extras={"geometry": numpy.random.rand(3, 3), "ids": (1, 2)},
+    )
+    reference = (
+        json.loads(opt.serialize("json"))
+        if encoding == "json"
+        else yaml.safe_load(opt.serialize("yaml"))
+    )
+    assert opt.dict(encoding=encoding) == reference
+
+
+def test_model_serialization_plan():
+    from collections import namedtuple
+    from typing import Any, Dict, List, Optional, Tuple
+
+    from pydantic import BaseModel
+
+    numpy = pytest.importorskip("numpy")
+    Point = namedtuple("Point", ["x", "y"])
+
+    class Inner(ProtoModel):
+        a: int = 1
+        hidden: str = "secret"
+
+        class Config(ProtoModel.Config):
+            serialize_default_excludes = {"hidden"}
+            serialize_skip_defaults = True
+
+    class Plain(BaseModel):
+        b: float = 2.0
+
+    class Outer(ProtoModel):
+        inner: Inner = Inner()
+        inners: List[Inner] = []
+        plain: Optional[Plain] = None
+        point: Any = None
+        pairs: Tuple[int, ...] = ()
+        extras: Dict[str, Any] = {}
+
+    outer = Outer(
+        inners=[Inner(a=2), Inner(hidden="x")],
+        plain=Plain(),
+        point=Point(1, 2),
+        pairs=(1, 2),
+        extras={"array": numpy.arange(3), "nested": {"model": Inner(), "list": [1]}},
+    )
+    assert Outer._serialization_plan.fast
+
+    data = outer.dict()
+    reference = BaseModel.dict(outer)  # the generic pydantic path
+    assert data["inners"] == [{"a": 2}, {"a": 1}]
+    assert data["extras"]["nested"]["model"] == {"a": 1}
+    assert data.pop("extras")["array"] is reference.pop("extras")["array"]
+    assert data == reference
+    assert isinstance(data["point"], Point)
+
+    # Options other than the defaults go through pydantic
+    assert outer.dict(exclude={"plain"}).keys() == data.keys() - {"plain"} | {"extras"}
+    assert Inner(a=3).dict() == {"a": 3}
+    assert Inner(a=3).dict(exclude_unset=False) == {"a": 3}
+
+
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "msgpack-ext"])
+def test_model_trusted(encoding):
+    if encoding == "msgpack-ext":
+        pytest.importorskip("msgpack")
+    from pydantic import ValidationError
+
+    opt = OutputProc(
+        schema_name="my_schema",
+        schema_version=1,
+        success=False,
+        proc_input=InputProc(schema_name="my_schema", schema_version=1),
+        error=ComputeError(error_type="random_error", error_message="this is bad"),
+    )
+    blob = opt.serialize(encoding)
+
+    trusted = OutputProc.parse_raw(blob, encoding=encoding, trusted=True)
+    validated = OutputProc.parse_raw(blob, encoding=encoding)
+    assert trusted == validated
+    assert isinstance(trusted.error, ComputeError)
+    assert isinstance(trusted.proc_input.provenance, Provenance)
+    assert trusted.__fields_set__ == validated.__fields_set__
+    assert trusted.revalidate() == validated
+
+    # No validation until revalidate is called
+    bad = OutputProc.parse_obj(
+        {"schema_name": "my_schema", "schema_version": "one", "success": False},
+        trusted=True,
+    )
+    assert bad.schema_version == "one"
+    with pytest.raises(ValidationError):
+        bad.revalidate()
+
+    class Aliased(ProtoModel):
+        al: int = Field(1, alias="AL")
+        nested: Optional[ComputeError] = None
+
+    data = {"AL": 2, "nested": {"error_type": "a", "error_message": "b"}}
+    aliased = Aliased.parse_obj(data, trusted=True)
+    assert aliased.dict() == Aliased.parse_obj(data).dict()
+    assert aliased.__fields_set__ == {"al", "nested"}
+    assert aliased.revalidate() == Aliased.parse_obj(data)
+    assert Aliased.parse_obj(data).revalidate() == Aliased.parse_obj(data)
+
+
+def test_model_bundle(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    from cmselemental.types import Array
+
+    class Trajectory(ProtoModel):
+        name: str
+        frames: Array[float]
+        forces: Array[float] = None
+        extras: dict = {}
+
+    traj = Trajectory(
+        name="traj",
+        frames=numpy.random.rand(100, 10, 3),
+        extras={"steps": numpy.arange(100), "labels": ["a", "b"], "nested": (1, 2)},
+    )
+    path = tmp_path / "traj.bundle"
+    traj.write_file(path)
+
+    loaded = Trajectory.parse_file(path)
+    assert isinstance(loaded.frames.base, numpy.memmap)
+    numpy.testing.assert_array_equal(loaded.frames, traj.frames)
+    numpy.testing.assert_array_equal(loaded.extras["steps"], traj.extras["steps"])
+    assert loaded.forces is None
+    assert loaded.extras["labels"] == ["a", "b"]
+    assert loaded.extras["nested"] == [1, 2]
+
+    # Array data is aligned and stored as .npy regions
+    assert loaded.frames.ctypes.data % 64 == 0
+    with open(path, "rb") as fp:
+        fp.seek(64)
+        frames = numpy.lib.format.read_array(fp)
+    numpy.testing.assert_array_equal(frames, traj.frames)
+
+    with pytest.raises(ValueError):
+        traj.write_file(path, mode="a")
+    with pytest.raises(FileExistsError):
+        traj.write_file(path, mode="x")
+
+
+def test_bundle_dtypes_and_keys(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    from cmselemental.util import bundle
+
+    point = numpy.dtype([("xyz", "<f8", (3,)), ("label", "S2"), ("mass", ">f4")])
+    data = {
+        "points": numpy.array([([1, 2, 3], b"H", 1.0), ([4, 5, 6], b"O", 16.0)], point),
+        "padded": numpy.zeros(
+            3,
+            numpy.dtype(
+                {"names": ["a", "b"], "formats": ["u1", "<i8"], "offsets": [0, 8]}
+            ),
+        ),
+        "_bundle_": {"_bundle_x": 1, "y": numpy.arange(3)},
+    }
+    path = tmp_path / "data.bundle"
+    bundle.write_file(path, data)
+
+    loaded = bundle.read_file(path)
+    for key in ("points", "padded"):
+        assert loaded[key].dtype == data[key].dtype
+        numpy.testing.assert_array_equal(loaded[key], data[key])
+    assert loaded["_bundle_"]["_bundle_x"] == 1
+    numpy.testing.assert_array_equal(loaded["_bundle_"]["y"], numpy.arange(3))
+
+
+def test_typed_array():
+    numpy = pytest.importorskip("numpy")
+    from pydantic import ValidationError
+
+    from cmselemental.types import Array
+
+    assert Array[float] is Array[float]
+    assert Array[float, (-1, 3)] is Array[float, (None, 3)]
+    assert Array[float] is not Array[float, (-1, 3)]
+
+    class Model(ProtoModel):
+        values: Array[float]
+        vectors: Array[float, (-1, 3)] = None
+        matrix: Array[int, 2] = None
+        labels: Array[str] = None
+
+    values = numpy.random.rand(5)
+    model = Model(values=values, labels=[1, 2])
+    assert model.values is values  # no copy
+    assert model.labels.tolist() == ["1", "2"]
+    assert Model(values=[1, 2]).values.dtype == float
+    assert Model(values=values.astype(numpy.float32)).values.dtype == float
+
+    assert Model(values=values, vectors=numpy.zeros((4, 3))).vectors.shape == (4, 3)
+    assert Model(values=values, matrix=[[1, 2]]).matrix.shape == (1, 2)
+    for kwargs in ({"vectors": numpy.zeros((4, 2))}, {"matrix": [1, 2]}):
+        with pytest.raises(ValidationError):
+            Model(values=values, **kwargs)
+
+
+def test_model_array_encoding():
+    numpy = pytest.importorskip("numpy")
+    from cmselemental.types import Array
+
+    class Hex(ProtoModel):
+        geometry: Array[float]
+
+    class Base64(Hex):
+        class Config:
+            array_encoding = "base64"
+
+    geometry = numpy.random.rand(10, 3)
+    blob = Base64(geometry=geometry).serialize("json-ext")
+    assert '"base64"' in blob
+    assert Base64.serialize_many([Base64(geometry=geometry)], "json-ext") == [blob]
+    assert '"base64"' in Hex(geometry=geometry).serialize(
+        "json-ext", array_encoding="base64"
+    )
+    assert '"base64"' not in Hex(geometry=geometry).serialize("json-ext")
+
+    loaded = Hex.parse_raw(blob, encoding="json-ext")
+    numpy.testing.assert_array_equal(loaded.geometry, geometry)
+
+
+@pytest.mark.parametrize(
+    "suffix", [".json.gz", ".yaml.bz2", ".msgpack.zst", ".msgpack.lz4", ".json.xz"]
+)
+def test_model_compressed_file(tmp_path, suffix):
+    from cmselemental.util import compression
+
+    codec = compression.codecs[compression.suffix_codecs[suffix[suffix.rindex(".") :]]]
+    if codec.module is not None:
+        pytest.importorskip(codec.module)
+    if ".msgpack" in suffix:
+        pytest.importorskip("msgpack")
+
+    opt = OutputProc(
+        schema_name="my_schema", schema_version=1, success=True, stdout="x" * 1000
+    )
+    path = tmp_path / f"output{suffix}"
+    opt.write_file(path, compression_level=1)
+    assert path.stat().st_size < 1000
+    assert OutputProc.parse_file(path).compare(opt)
+
+    encoding = f"{suffix.split('.')[1]}+{codec.name}".replace(
+        "msgpack+", "msgpack-ext+"
+    )
+    blob = opt.serialize(encoding)
+    assert OutputProc.parse_raw(blob, encoding=encoding).compare(opt)
+
+
+def test_model_write_file_unknown(tmp_path):
+    opt = OutputProc(schema_name="my_schema", schema_version=1, success=True)
+    with pytest.raises(TypeError):
+        opt.write_file(tmp_path / "output.txt")
+    with pytest.raises(TypeError):
+        opt.write_file(tmp_path / "output.json", encoding="csv")
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("suffix", [".jsonl.gz", ".msgpack.xz"])
+def test_model_compressed_stream(tmp_path, suffix):
+    if ".msgpack" in suffix:
+        pytest.importorskip("msgpack")
+
+    outputs = [
+        OutputProc(
+            schema_name="my_schema", schema_version=1, success=True, stdout=str(i)
+        )
+        for i in range(5)
+    ]
+    path = tmp_path / f"records{suffix}"
+    assert OutputProc.write_stream(path, outputs[:3]) == 3
+    assert OutputProc.write_stream(path, outputs[3:], compression_level=9) == 2
+    assert [out.stdout for out in OutputProc.iter_file(path)] == list("01234")
+    if ".jsonl" in suffix:
+        assert len(OutputProc.parse_file(path)) == 5
+
+    with pytest.raises(ValueError):
+        OutputProc.write_stream(path, outputs, index=True)
+
+
+def test_input_hash_index():
+    numpy = pytest.importorskip("numpy")
+
+    def make(**kwargs):
+        return InputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            keywords={"method": "b3lyp", "basis": "6-31g"},
+            extras={"coordinates": numpy.arange(6.0)},
+            **kwargs,
+        )
+
+    inp = make()
+    assert inp.hash_index == inp.get_hash()
+    assert make(id="other", provenance=Provenance(creator="me")).hash_index == (
+        inp.hash_index
+    )
+    assert make(engine="openmm").hash_index != inp.hash_index
+    # Derived from the other fields, never stale
+    assert make(hash_index="given").hash_index == inp.hash_index
+    keywords = {"method": "hf"}
+    for new in [
+        inp.copy(update={"keywords": keywords}),
+        InputProc(**{**inp.dict(), "keywords": keywords}),
+        InputProc.parse_raw(
+            inp.copy(update={"keywords": keywords}).serialize("json"), encoding="json"
+        ),
+    ]:
+        assert new.hash_index == new.get_hash() != inp.hash_index
+    assert inp.copy().hash_index == inp.hash_index
+
+    # Stable across serialization
+    for encoding in ["json", "json-ext"]:
+        blob = inp.serialize(encoding, exclude={"hash_index"})
+        assert InputProc.parse_raw(blob, encoding=encoding).hash_index == (
+            inp.hash_index
+        )
@@ -0,0 +1,121 @@
+import numpy
+import pytest
+
+from cmselemental import testing
+from cmselemental.testing import (
+    compare,
+    compare_many,
+    compare_recursive,
+    compare_values,
+)
+
+
+@pytest.mark.parametrize(
+    "expected, computed, passes",
+    [
+        ([1.0, 2.0, 3.0], [1.0, 2.0 + 1e-8, 3.0], True),
+        ((1.0, 2.0, 3.0), numpy.array([1.0, 2.0, 3.0]), True),
+        ([1.0, 2.0, 3.0], [1.0, 2.1, 3.0], False),
+        ([1.0, 2.0, 3.0], [1.0, None, 3.0], False),
+        ([1.0, -2.0], [-1.0, 2.0], False),
+        ([1, 2, 3], [1, 2, 3], True),
+        ([1, 2, 3], [1, 2, 4], False),
+        ([1, 2, 3], [1, 2.0000001, 3], False),
+        (["a", "b", True], ["a", "b", True], True),
+        ([1, 2.5, "x"], [1, 2.5, "x"], True),
+        ([[1.0, 2.0], [3.0, 4.0]], [[1.0, 2.0], [3.0, 4.5]], False),
+        ({"a": numpy.ones(3), "b": 1.0}, {"a": numpy.ones(3) + 1e-8, "b": 1.0}, True),
+        ({"a": numpy.ones(3), "b": 1.0}, {"a": numpy.ones(3), "b": 1.1}, False),
+        ({"a": numpy.ones(3)}, {"a": numpy.ones(4)}, False),
+        ({"a": float("inf")}, {"a": float("inf")}, True),
+    ],
+)
+def test_compare_recursive(expected, computed, passes):
+    assert compare_recursive(expected, computed, quiet=True) is passes
+
+
+def test_compare_recursive_messages():
+    expected = numpy.linspace(0, 1, 10000).tolist()
+    computed = list(expected)
+    computed[1234] += 1.0
+    computed[5678] = "x"
+    passes, message = compare_recursive(
+        expected, computed, quiet=True, return_message=True
+    )
+    assert not passes
+    lines = [line for line in message.splitlines() if line.startswith("root.")]
+    assert lines == ["root.1234", "root.5678"]
+
+    # Sign flips pass item by item with equal_phase
+    assert compare_recursive([1.0, -2.0], [-1.0, -2.0], quiet=True, equal_phase=True)
+
+
+def test_compare_messages_summary():
+    expected = numpy.zeros((50, 20))
+    computed = expected.copy()
+    computed[3, 4] = 0.5
+    computed[10, 1] = -2.0
+    computed[40, 19] = 1e-3
+    passes, message = compare_values(expected, computed, "big", return_message=True)
+    assert not passes
+    assert "3 of 1000 elements differ (shape (50, 20))" in message
+    assert "Largest difference 2.0 at index (10, 1)" in message
+    assert "Expected:" not in message
+
+    passes, message = compare(
+        numpy.array(["a"] * 200), numpy.array(["a"] * 199 + ["b"]), return_message=True
+    )
+    assert "1 of 200 elements differ" in message
+    assert "First difference at index (199,)" in message
+
+    passes, message = compare_values(
+        numpy.zeros(3), numpy.array([0.0, 1.0, 0.0]), return_message=True
+    )
+    assert "Expected:" in message and "Difference" in message
+
+
+def test_compare_messages_lazy(monkeypatch, caplog):
+    def fail(*args, **kwargs):
+        raise AssertionError("message should not be formatted")
+
+    monkeypatch.setattr(testing, "_format_array", fail)
+    monkeypatch.setattr(testing, "_mismatch_summary", fail)
+    assert compare_values(numpy.zeros(3), numpy.ones(3), quiet=True) is False
+    assert compare_values(numpy.zeros(300), numpy.ones(300), quiet=True) is False
+    assert compare([1, 2], [1, 3], quiet=True) is False
+
+    with caplog.at_level("CRITICAL"):
+        assert compare_values(numpy.zeros(3), numpy.ones(3)) is False
+
+    monkeypatch.undo()
+    with caplog.at_level("ERROR"):
+        assert compare_values(numpy.zeros(300), numpy.ones(300), "logged") is False
+    assert "300 of 300 elements differ" in caplog.text
+
+
+def test_compare_many():
+    expected = {"energy": 1.0, "gradient": numpy.zeros((4, 3)), "name": "w"}
+    good = {"energy": 1.0 + 1e-9, "gradient": numpy.zeros((4, 3)), "name": "w"}
+    bad = {"energy": 1.5, "gradient": numpy.full((4, 3), 0.25), "name": "x"}
+    pairs = [(expected, good), (expected, bad), (expected, None)]
+
+    report = compare_many(pairs, max_workers=1)
+    assert [pair.passed for pair in report.pairs] == [True, False, False]
+    assert not report.passed and [pair.index for pair in report.failed] == [1, 2]
+    assert report.pairs[1].paths == ["root.energy", "root.gradient", "root.name"]
+    assert report.pairs[1].deviations == {"root.energy": 0.5, "root.gradient": 0.25}
+    assert report.pairs[1].worst == ("root.energy", 0.5)
+    assert "Comparison raised AttributeError" in report.pairs[2].message
+    assert report.worst(1) == [(1, "root.energy", 0.5)]
+    assert report.summary().startswith("2 of 3 pairs failed")
+
+    report = compare_many(pairs, fail_fast=True, max_workers=1)
+    assert len(report.pairs[1].errors) == 1
+    report = compare_many(pairs, forgive=["energy", "gradient", "name"], max_workers=1)
+    assert [pair.passed for pair in report.pairs] == [True, True, False]
+
+    # Chunks compared in worker processes come back in order
+    parallel = compare_many(pairs * 3, max_workers=2, chunk_size=2)
+    assert [pair.index for pair in parallel.pairs] == list(range(9))
+    assert [pair.passed for pair in parallel.pairs] == [True, False, False] * 3
+    assert parallel.pairs[4].deviations == compare_many(pairs).pairs[1].deviations
@@ -1,3 +1,6 @@
+import json
+import os
+
 import pytest
 import cmselemental
 import numpy
@@ -55,3 +58,459 @@ def test_serialization(obj, encoding):
         cmselemental.util.serialize(obj, encoding=encoding), encoding=encoding
     )
     assert cmselemental.testing.compare_recursive(obj, new_obj)
+
+
+@using_msgpack
+def test_msgpackext_writable():
+    arr = numpy.random.rand(3, 4)
+    blob = cmselemental.util.serialize({"a": arr}, encoding="msgpack-ext")
+
+    view = cmselemental.util.deserialize(blob, encoding="msgpack-ext")["a"]
+    assert not view.flags.writeable
+    assert isinstance(view.base, bytes)
+
+    copy = cmselemental.util.deserialize(blob, encoding="msgpack-ext", writable=True)[
+        "a"
+    ]
+    assert copy.flags.writeable
+    copy[0, 0] = -1.0
+    assert view[0, 0] == arr[0, 0]
+    assert cmselemental.testing.compare_values(arr[1:], copy[1:])
+
+
+def test_jsonext_writable():
+    arr = numpy.random.rand(5)
+    new_arr = cmselemental.util.deserialize(
+        cmselemental.util.serialize(arr, encoding="json-ext"), encoding="json-ext"
+    )
+    assert new_arr.flags.writeable
+
+
+@using_msgpack
+def test_msgpackext_out_of_band():
+    obj = {
+        "a": numpy.random.rand(4, 3),
+        "b": [numpy.arange(5), "hello"],
+        "c": numpy.random.rand(6)[::2],
+    }
+    buffers = []
+    header = cmselemental.util.serialize(
+        obj, encoding="msgpack-ext", buffer_callback=buffers.append
+    )
+    assert len(buffers) == 3
+    assert all(isinstance(buf, memoryview) for buf in buffers)
+    assert len(header) < sum(buf.nbytes for buf in buffers)
+
+    new_obj = cmselemental.util.deserialize(
+        header, encoding="msgpack-ext", buffers=[bytes(buf) for buf in buffers]
+    )
+    assert cmselemental.testing.compare_recursive(obj, new_obj)
+
+    with pytest.raises(ValueError):
+        cmselemental.util.deserialize(header, encoding="msgpack-ext")
+
+
+@using_msgpack
+@pytest.mark.parametrize(
+    "arr",
+    [
+        numpy.zeros((0, 3)),
+        numpy.zeros(0, dtype=numpy.int32),
+        numpy.array(["2021-07-19", "2021-10-01"], dtype="datetime64[s]"),
+        numpy.arange(6, dtype="timedelta64[ms]").reshape(2, 3),
+    ],
+)
+def test_msgpackext_out_of_band_arrays(arr):
+    buffers = []
+    header = cmselemental.util.serialize(
+        {"arr": arr}, encoding="msgpack-ext", buffer_callback=buffers.append
+    )
+    new_arr = cmselemental.util.deserialize(
+        header, encoding="msgpack-ext", buffers=[bytes(buf) for buf in buffers]
+    )["arr"]
+    assert new_arr.dtype == arr.dtype and new_arr.shape == arr.shape
+    assert numpy.array_equal(new_arr, arr)
+
+
+def test_jsonl_records():
+    objs = [{"a": 5, "b": "x\ny"}, [1, 2], numpy.arange(3)]
+    blob = "".join(cmselemental.util.serialize(obj, "jsonl", indent=2) for obj in objs)
+    assert len(blob.splitlines()) == 3
+
+    new_objs = cmselemental.util.deserialize(blob + "\n", "ndjson")
+    assert cmselemental.testing.compare_recursive(objs, new_objs)
+
+    # Unicode line breaks are valid unescaped in JSON strings and do not end records
+    objs = [{"a": "x\u2028y\u2029z\x85"}, {"b": 1}]
+    blob = '{"a": "x\u2028y\u2029z\x85"}\r\n{"b": 1}\n'
+    assert cmselemental.util.deserialize(blob, "jsonl") == objs
+    assert cmselemental.util.deserialize(blob.encode(), "jsonl") == objs
+
+
+@pytest.fixture(params=list(cmselemental.util.serialization.json_backends))
+def json_backend(request):
+    serialization = cmselemental.util.serialization
+    previous = serialization.get_json_backend().name
+    yield serialization.set_json_backend(request.param)
+    serialization.set_json_backend(previous)
+
+
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "jsonl"])
+def test_json_backends(json_backend, encoding):
+    serialization = cmselemental.util.serialization
+    obj = {
+        "a": numpy.random.rand(3, 2),
+        "b": [1, 2.5, "\u0394 / x", None, True],
+        "c": {"d": numpy.arange(4, dtype=numpy.int32), "e": numpy.array(5.5)},
+    }
+    encoder = (
+        serialization.JSONExtArrayEncoder
+        if encoding == "json-ext"
+        else serialization.JSONArrayEncoder
+    )
+    reference = json.dumps(obj, cls=encoder, sort_keys=True)
+
+    blob = serialization.serialize(obj, encoding, sort_keys=True)
+    if json_backend == "json":
+        assert blob.rstrip("\n") == reference
+    assert json.loads(blob) == json.loads(reference)
+
+    new_obj = serialization.deserialize(blob, encoding)
+    if encoding == "jsonl":
+        (new_obj,) = new_obj
+    assert cmselemental.testing.compare_recursive(
+        serialization.deserialize(reference, "json-ext"), new_obj
+    )
+
+
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "jsonl"])
+def test_json_backends_nonfinite(json_backend, encoding):
+    serialization = cmselemental.util.serialization
+    obj = {"a": float("nan"), "b": [float("inf"), None], "c": numpy.array([-numpy.inf])}
+    blob = serialization.serialize(obj, encoding)
+    assert "null" not in blob.split('"b"')[0]
+
+    new_obj = serialization.deserialize(blob, encoding)
+    if encoding == "jsonl":
+        (new_obj,) = new_obj
+    assert numpy.isnan(new_obj["a"]) and new_obj["b"] == [float("inf"), None]
+    assert list(new_obj["c"]) == [-numpy.inf]
+
+    # Documents written by the standard library, NaN included, are read by every backend
+    reference = json.dumps({"x": float("nan"), "y": 1})
+    new_obj = serialization.deserialize(reference, "json")
+    assert numpy.isnan(new_obj["x"]) and new_obj["y"] == 1
+    assert numpy.isnan(serialization.deserialize(reference.encode(), "json-ext")["x"])
+
+
+def test_json_backend_selection():
+    serialization = cmselemental.util.serialization
+    previous = serialization.get_json_backend().name
+    try:
+        assert serialization.set_json_backend() == "json"
+        assert serialization.set_json_backend("json") == "json"
+        with pytest.raises(KeyError):
+            serialization.set_json_backend("not_a_backend")
+    finally:
+        serialization.set_json_backend(previous)
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"a": numpy.random.rand(2, 3), "b": (1, 2.5, "c"), 5: None, 1.5: True},
+        [numpy.array(3), numpy.array(["a", "b"]), {"x": [numpy.arange(3)]}],
+        {"model": cmselemental.models.Provenance(creator="me"), "set": {1}},
+        {"float64": numpy.float64(1.5), "nan": float("nan")},
+    ],
+)
+def test_json_primitives(obj):
+    serialization = cmselemental.util.serialization
+    reference = json.loads(json.dumps(obj, cls=serialization.JSONArrayEncoder))
+    primitives = serialization.json_primitives(obj)
+    assert json.dumps(primitives) == json.dumps(reference)
+
+
+def test_jsonext_base64(json_backend):
+    serialization = cmselemental.util.serialization
+    obj = {
+        "a": numpy.random.rand(4, 3),
+        "b": numpy.arange(5, dtype=">i4"),
+        "c": [numpy.array([True, False]), numpy.array(2.5)],
+    }
+    blob = serialization.serialize(obj, "json-ext", array_encoding="base64")
+    assert len(blob) < len(serialization.serialize(obj, "json-ext"))
+    assert blob == serialization.get_serializer("json-ext", array_encoding="base64")(
+        obj
+    )
+
+    new_obj = serialization.deserialize(blob, "json-ext")
+    assert new_obj["a"].shape == (4, 3)
+    assert new_obj["b"].dtype == numpy.dtype(">i4")
+    assert cmselemental.testing.compare_recursive(obj, new_obj)
+    # Zero-copy read-only views by default, writable copies on request
+    assert not new_obj["a"].flags.writeable and not new_obj["c"][0].flags.writeable
+    for new_obj in [
+        serialization.deserialize(blob, "json-ext", writable=True),
+        serialization.get_deserializer("json-ext", writable=True)(blob),
+    ]:
+        assert new_obj["a"].flags.writeable and new_obj["c"][0].flags.writeable
+        assert cmselemental.testing.compare_recursive(obj, new_obj)
+
+    with pytest.raises(KeyError):
+        serialization.serialize(obj, "json-ext", array_encoding="base85")
+
+
+@pytest.mark.parametrize("codec", ["gzip", "bz2", "lzma", "zstd", "lz4"])
+@pytest.mark.parametrize("encoding", ["json", "json-ext", "msgpack-ext"])
+def test_compression(codec, encoding):
+    serialization = cmselemental.util.serialization
+    compression = cmselemental.util.compression
+    module = compression.codecs[codec].module
+    if module is not None:
+        pytest.importorskip(module)
+    if encoding == "msgpack-ext":
+        pytest.importorskip("msgpack")
+
+    obj = {"a": numpy.arange(1000, dtype=numpy.float64), "b": ["x" * 100] * 10}
+    if encoding == "json":
+        obj["a"] = obj["a"].tolist()
+    blob = serialization.serialize(obj, f"{encoding}+{codec}", compression_level=1)
+    assert isinstance(blob, bytes)
+    raw = serialization.serialize(obj, encoding)
+    assert len(blob) < len(raw)
+    assert compression.decompress(blob, codec) == (
+        raw.encode() if isinstance(raw, str) else raw
+    )
+
+    assert cmselemental.testing.compare_recursive(
+        obj, serialization.deserialize(blob, f"{encoding}+{codec}")
+    )
+    dumps = serialization.get_serializer(f"{encoding}+{codec}")
+    loads = serialization.get_deserializer(f"{encoding}+{codec}")
+    assert cmselemental.testing.compare_recursive(obj, loads(dumps(obj)))
+
+
+@pytest.mark.parametrize("codec, module", [("zstd", "zstandard"), ("lz4", "lz4")])
+def test_compression_frames(tmp_path, codec, module):
+    pytest.importorskip(module)
+    compression = cmselemental.util.compression
+
+    blob = b"".join(b'{"record": %d}\n' % i for i in range(1000))
+    packed = compression.compress(blob, codec, level=3)
+    assert len(packed) < len(blob) and compression.decompress(packed, codec) == blob
+
+    # Appending adds a frame, files of several frames are read back whole and line by line
+    path = tmp_path / f"records.{codec}"
+    with compression.open_file(path, "wb", codec) as fp:
+        fp.write(blob[:500])
+    with compression.open_file(path, "ab", codec, level=1) as fp:
+        fp.write(blob[500:])
+    assert compression.decompress(path.read_bytes(), codec) == blob
+    with compression.open_file(path, "rb", codec) as fp:
+        assert b"".join(fp) == blob
+
+    records = cmselemental.util.deserialize(path.read_bytes(), f"jsonl+{codec}")
+    assert records == [{"record": i} for i in range(1000)]
+
+
+def test_compression_options():
+    compression = cmselemental.util.compression
+    assert compression.split_encoding("msgpack-ext+zstd") == ("msgpack-ext", "zstd")
+    assert compression.split_encoding("json") == ("json", None)
+    assert compression.get_codec("gz").name == "gzip"
+    with pytest.raises(KeyError):
+        compression.get_codec("rar")
+    with pytest.raises(KeyError):
+        cmselemental.util.serialize({}, "json+rar")
+
+
+def test_hash_object():
+    hash_object = cmselemental.util.hashing.hash_object
+    coordinates = numpy.random.rand(10, 3)
+    obj = {"b": [1, 2.5, "x", None, True], "a": coordinates, "c": {"d": (1, 2)}}
+    reference = hash_object(obj)
+    assert len(reference) == 40
+
+    # Canonical: key order, sequence type, array layout and byte order do not matter
+    same = {
+        "c": {"d": [1, 2]},
+        "a": numpy.asfortranarray(coordinates).astype(">f8"),
+        "b": [1, 2.5, "x", None, True],
+    }
+    assert hash_object(same) == reference
+    assert hash_object(dict(obj, e=0)) != reference
+    assert hash_object(dict(obj, e=0), exclude={"e"}) == reference
+    assert hash_object(dict(obj, a=coordinates.reshape(3, 10))) != reference
+    assert hash_object(dict(obj, b=[1, 2.5, "x", None, 1])) != reference
+    assert hash_object(["ab", "c"]) != hash_object(["a", "bc"])
+    # Types are part of the hash, NumPy casts of mixed lists included
+    assert hash_object([1, True]) != hash_object([1, 1])
+    assert hash_object([[1, 2], [3, True]]) != hash_object([[1, 2], [3, 1]])
+    assert hash_object([1, 2.0]) != hash_object([1.0, 2.0])
+    assert hash_object([2**63, 0]) != hash_object([2**63 + 1, 0])
+    assert hash_object([2**63, 0]) != hash_object([2.0**63, 0.0])
+    assert hash_object({1: "a"}) != hash_object({"1": "a"})
+    assert hash_object({1: "a", "1": "b"}) == hash_object({"1": "b", 1: "a"})
+    assert hash_object([[1.0, 2.0], [3.0, 4.0]]) == hash_object(
+        numpy.array([[1.0, 2.0], [3.0, 4.0]])
+    )
+
+    assert hash_object(0.1 + 0.2) != hash_object(0.3)
+    assert hash_object(0.1 + 0.2, float_decimals=10) == hash_object(0.3)
+    noisy = coordinates + 1e-12
+    assert hash_object(noisy, float_decimals=8) == hash_object(
+        coordinates, float_decimals=8
+    )
+    assert hash_object(-0.0) == hash_object(0.0)
+    assert hash_object(obj, algorithm="sha256") != reference
+
+    with pytest.raises(TypeError):
+        hash_object(object())
+
+
+def test_result_cache(monkeypatch):
+    cache_module = cmselemental.util.cache
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    cache = cache_module.ResultCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert "b" not in cache
+    assert cache.get("b", "missing") == "missing"
+    assert len(cache) == 2
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.stats == {
+        "hits": 1,
+        "disk_hits": 0,
+        "misses": 2,
+        "evictions": 1,
+        "disk_evictions": 0,
+        "expirations": 1,
+        "size": 1,
+    }
+
+
+def test_result_cache_disk(tmp_path):
+    pytest.importorskip("msgpack")
+    from cmselemental.models import InputProc, OutputProc
+
+    inputs = [
+        InputProc(schema_name="my_schema", schema_version=1, keywords={"step": i})
+        for i in range(4)
+    ]
+    outputs = [
+        OutputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            success=True,
+            extras={"energies": numpy.arange(100.0) * i},
+        )
+        for i in range(4)
+    ]
+    cache = cmselemental.util.cache.ResultCache(
+        maxsize=1, directory=tmp_path, parser=OutputProc.parse_obj
+    )
+    for inp, out in zip(inputs, outputs):
+        cache.put(inp, out)
+    assert len(cache) == 1
+
+    # A new cache over the same directory reads the results back from disk
+    cache = cmselemental.util.cache.ResultCache(
+        maxsize=1, directory=tmp_path, parser=OutputProc.parse_obj
+    )
+    result = cache.get(inputs[1])
+    assert isinstance(result, OutputProc)
+    assert result.compare(outputs[1])
+    assert cache.get(inputs[1]) is result
+    assert cache.stats["disk_hits"] == 1 and cache.stats["hits"] == 1
+
+    size = cache.stats["disk_bytes"]
+    cache.max_disk_bytes = size // 2
+    cache.put(inputs[1], outputs[1])
+    assert cache.stats["disk_bytes"] <= size // 2
+    assert cache.stats["disk_evictions"] >= 2
+    cache.clear()
+    assert cache.get(inputs[1]) is None
+
+
+def test_result_cache_keys(tmp_path, monkeypatch):
+    pytest.importorskip("msgpack")
+    from cmselemental.models import InputProc
+
+    cache_module = cmselemental.util.cache
+    inp = InputProc(schema_name="my_schema", schema_version=1, keywords={"step": 1})
+    stale = InputProc.parse_obj(
+        {**inp.dict(), "keywords": {"step": 2}, "hash_index": inp.hash_index},
+        trusted=True,
+    )
+    assert cache_module.cache_key(stale) == stale.get_hash() != inp.hash_index
+
+    # Keys are hex digests, other strings are hashed so that they cannot escape the directory
+    key = cache_module.cache_key("../../escape")
+    assert key != "../../escape" and cache_module.cache_key(key) == key
+    cache = cache_module.ResultCache(directory=tmp_path / "cache", ttl=60)
+    cache.put("../../escape", {"a": 1})
+    assert cache.get("../../escape") == {"a": 1}
+    assert [path.parent.parent for path in cache._blobs()] == [tmp_path / "cache"]
+    with pytest.raises(ValueError):
+        cache._blob_path("../" + key)
+
+    # Results promoted from disk keep the time they were written
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache.put(inp, {"b": 2})
+    (path,) = [path for path in cache._blobs() if path.stem == inp.get_hash()]
+    os.utime(path, (now[0], now[0]))
+    now[0] += 50
+    cache = cache_module.ResultCache(directory=tmp_path / "cache", ttl=60)
+    assert cache.get(inp) == {"b": 2}
+    now[0] += 20
+    assert cache.get(inp) is None
+    assert cache.stats["expirations"] == 2
+
+    # A blob evicted by another process after it was read is still returned
+    cache.put(inp, {"c": 3})
+
+    def utime(path, times):
+        os.unlink(path)
+        raise FileNotFoundError(path)
+
+    cache = cache_module.ResultCache(directory=tmp_path / "cache", ttl=60)
+    monkeypatch.setattr(cache_module.os, "utime", utime)
+    assert cache.get(inp) == {"c": 3}
+
+
+def test_cached():
+    from cmselemental.models import InputProc, OutputProc
+
+    calls = []
+
+    @cmselemental.util.cache.cached(maxsize=10)
+    def compute(inp, scale=1):
+        calls.append(inp.keywords["step"])
+        success = inp.keywords["step"] >= 0
+        return OutputProc(
+            schema_name="my_schema",
+            schema_version=1,
+            success=success,
+            extras={"value": inp.keywords["step"] * scale},
+        )
+
+    def make(step, **kwargs):
+        return InputProc(
+            schema_name="my_schema", schema_version=1, keywords={"step": step}, **kwargs
+        )
+
+    assert compute(make(1)).extras["value"] == 1
+    assert compute(make(1, id="other")).extras["value"] == 1
+    assert compute(make(1), scale=2).extras["value"] == 2
+    assert compute(make(-1)).success is False
+    assert compute(make(-1)).success is False
+    assert calls == [1, 1, -1, -1]
+    assert compute.cache.stats["hits"] == 1
@@ -1,23 +1,39 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 import numpy
 
 __all__ = ["Array"]
 
 
 class TypedArray(numpy.ndarray):
+    _dtype: Any = None
+    # The required shape, -1 for any length
+    _shape: Optional[Tuple[int, ...]] = None
+
     @classmethod
     def __get_validators__(cls):
         yield cls.validate
 
     @classmethod
     def validate(cls, v):
+        # Neither copies nor converts arrays that already have the dtype
         try:
             v = numpy.asarray(v, dtype=cls._dtype)
         except ValueError:
             raise ValueError("Could not cast {} to NumPy Array!".format(v))
 
+        if cls._shape is not None:
+            cls._validate_shape(v.shape)
+
         return v
 
+    @classmethod
+    def _validate_shape(cls, shape: Tuple[int, ...]) -> None:
+        expected = cls._shape
+        if len(shape) != len(expected) or any(
+            size != length for size, length in zip(expected, shape) if size != -1
+        ):
+            raise ValueError(f"Array shape {shape} does not match {expected}.")
+
     @classmethod
     def __modify_schema__(cls, field_schema: Dict[str, Any]) -> None:
         dt = cls._dtype
@@ -34,9 +50,38 @@ class TypedArray(numpy.ndarray):
         field_schema.update(type="array", items=items)
 
 
+def _array_shape(shape: Any) -> Optional[Tuple[int, ...]]:
+    """Normalizes the shape constraint of Array[dtype, shape]: a tuple of lengths (-1 or None for any),
+    or a number of dimensions."""
+    if shape is None:
+        return None
+    elif isinstance(shape, int):
+        return (-1,) * shape
+    return tuple(-1 if size is None else int(size) for size in shape)
+
+
 class ArrayMeta(type):
-    def __getitem__(self, dtype):
-        return type("Array", (TypedArray,), {"_dtype": dtype})
+    _cache: Dict[Tuple[Any, Any], type] = {}
+
+    def __getitem__(self, params):
+        """Returns the (cached) pydantic type of arrays of a dtype, e.g. Array[float], and optionally
+        a shape, e.g. Array[float, (-1, 3)] for 3-vectors, or a number of dimensions, e.g. Array[float, 2].
+        """
+        dtype, shape = params if isinstance(params, tuple) else (params, None)
+        shape = _array_shape(shape)
+        try:
+            return self._cache[dtype, shape]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable dtype, not cached
+            return self._create(dtype, shape)
+
+        array_type = self._cache[dtype, shape] = self._create(dtype, shape)
+        return array_type
+
+    @staticmethod
+    def _create(dtype: Any, shape: Optional[Tuple[int, ...]]) -> type:
+        return type("Array", (TypedArray,), {"_dtype": dtype, "_shape": shape})
 
 
 class Array(numpy.ndarray, metaclass=ArrayMeta):
@@ -4,4 +4,9 @@ from .importing import yaml_import, which_import, which
 from . import serialization
 from .serialization import serialize, deserialize
 from . import autodocs
+from . import records
+from . import compression
+from . import hashing
+from . import cache
+from . import bundle
 from . import decorators
@@ -0,0 +1,155 @@
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy
+from numpy.lib import format as npy_format
+
+from .serialization import json_primitives
+
+__all__ = ["write_file", "read_file"]
+
+# Layout of a bundle file:
+#   magic | .npy region | .npy region | ... | JSON footer | footer length (8 bytes, little-endian)
+# Every .npy region starts at a multiple of `alignment` bytes and its header is padded to a multiple of
+# 64 bytes, so the array data is aligned and can be memory-mapped in place.
+magic = b"\x93CMSBNDL"
+version = 1
+alignment = 64
+_footer_length = struct.Struct("<Q")
+# The key of the dictionaries that stand for arrays in the footer, user keys starting with it are escaped
+_reference = "_bundle_"
+
+
+def _escape(key: Any) -> Any:
+    """Prefixes the keys starting with the array reference key, so that they never collide with it."""
+    if isinstance(key, str) and key.startswith(_reference):
+        return _reference + key
+    return key
+
+
+def _unescape(key: str) -> str:
+    return key[len(_reference) :] if key.startswith(_reference) else key
+
+
+def _split_arrays(data: Any, arrays: List[numpy.ndarray]) -> Any:
+    """Replaces the arrays in ``data`` with references to their position in ``arrays``, and the
+    other values with JSON primitives."""
+    if isinstance(data, numpy.ndarray) and not data.dtype.hasobject:
+        arrays.append(data)
+        return {_reference: len(arrays) - 1}
+    elif isinstance(data, dict):
+        return {_escape(key): _split_arrays(val, arrays) for key, val in data.items()}
+    elif isinstance(data, (list, tuple)):
+        return [_split_arrays(val, arrays) for val in data]
+    return json_primitives(data)
+
+
+def _join_arrays(data: Any, arrays: List[numpy.ndarray]) -> Any:
+    """Inverse of _split_arrays."""
+    if isinstance(data, dict):
+        if _reference in data:
+            return arrays[data[_reference]]
+        return {_unescape(key): _join_arrays(val, arrays) for key, val in data.items()}
+    elif isinstance(data, list):
+        return [_join_arrays(val, arrays) for val in data]
+    return data
+
+
+def _pad(fp) -> None:
+    """Pads a file with zeros up to the next multiple of `alignment` bytes."""
+    fp.write(b"\0" * (-fp.tell() % alignment))
+
+
+def _descr_to_dtype(descr: Any) -> numpy.dtype:
+    """Inverse of numpy.lib.format.dtype_to_descr, for descriptions whose tuples JSON turned into lists."""
+
+    def tuples(value):
+        return tuple(map(tuples, value)) if isinstance(value, list) else value
+
+    if isinstance(descr, list):
+        descr = [tuples(field) for field in descr]
+    return npy_format.descr_to_dtype(descr)
+
+
+def write_file(path: Union[str, Path], data: Dict[str, Any], mode: str = "w") -> None:
+    """
+    Writes a dictionary to a bundle file: each NumPy array as an aligned .npy region, and everything
+    else as a JSON footer. Array data is written straight from the arrays, without building a blob.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The path to the file.
+    data : Dict[str, Any]
+        The data to write, e.g. ProtoModel.dict().
+    mode : str, optional
+        'w' to overwrite an existing file or 'x' to fail if it exists. Bundles cannot be appended to.
+    """
+    if mode.rstrip("b") not in ("w", "x"):
+        raise ValueError(
+            f"Bundle files are written whole, mode '{mode}' is not supported."
+        )
+
+    arrays: List[numpy.ndarray] = []
+    tree = _split_arrays(data, arrays)
+
+    entries = []
+    with open(path, mode.rstrip("b") + "b") as fp:
+        fp.write(magic)
+        for array in arrays:
+            _pad(fp)
+            if not array.flags.c_contiguous:
+                array = array.copy(order="C")
+            header = npy_format.header_data_from_array_1_0(array)
+            npy_format.write_array_header_1_0(fp, header)
+            # The .npy description, unlike dtype.str, keeps the fields of structured dtypes
+            descr = npy_format.dtype_to_descr(array.dtype)
+            entries.append({"offset": fp.tell(), "dtype": descr, "shape": array.shape})
+            array.tofile(fp)
+
+        footer = json.dumps({"version": version, "arrays": entries, "data": tree})
+        footer = footer.encode()
+        fp.write(footer)
+        fp.write(_footer_length.pack(len(footer)))
+
+
+def read_file(path: Union[str, Path], mode: str = "r") -> Dict[str, Any]:
+    """
+    Reads a bundle file written by write_file. Arrays are returned as numpy.memmap views of the file,
+    so reading is independent of the size of the arrays and only the pages that are accessed are loaded.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The path to the file.
+    mode : str, optional
+        The numpy.memmap mode of the arrays: 'r' (read-only), 'c' (copy-on-write) or 'r+' (write through
+        to the file).
+    Returns
+    -------
+    Dict[str, Any]
+        The data.
+    """
+    with open(path, "rb") as fp:
+        if fp.read(len(magic)) != magic:
+            raise ValueError(f"'{path}' is not a bundle file.")
+        fp.seek(-_footer_length.size, 2)
+        (length,) = _footer_length.unpack(fp.read(_footer_length.size))
+        fp.seek(-_footer_length.size - length, 2)
+        footer = json.loads(fp.read(length))
+
+    if footer["version"] > version:
+        raise ValueError(f"Unsupported bundle version {footer['version']}.")
+
+    # A single mapping of the file, each array is a view of it
+    buffer = numpy.memmap(path, dtype=numpy.uint8, mode=mode)
+    arrays = []
+    for entry in footer["arrays"]:
+        dtype = _descr_to_dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        start = entry["offset"]
+        stop = start + dtype.itemsize * int(numpy.prod(shape, dtype=numpy.int64))
+        arrays.append(buffer[start:stop].view(dtype).reshape(shape))
+    return _join_arrays(footer["data"], arrays)
@@ -0,0 +1,287 @@
+import functools
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .hashing import hash_object
+from .serialization import deserialize, serialize
+
+__all__ = ["ResultCache", "cache_key", "cached"]
+
+# Keys are used as file names, so only hex digests are accepted as they are
+_hex_key = re.compile("[0-9a-f]{8,128}")
+
+
+def cache_key(input_data: Any) -> str:
+    """Returns the cache key of a procedure input: its canonical hash, computed from its fields rather than
+    read from a ``hash_index`` that may be stale. Hex strings are keys already, other strings are hashed.
+    """
+    if isinstance(input_data, str):
+        if _hex_key.fullmatch(input_data):
+            return input_data
+        return hash_object(input_data)
+    if hasattr(input_data, "get_hash"):
+        return input_data.get_hash()
+    return hash_object(input_data)
+
+
+class ResultCache:
+    """
+    A two-tier cache of procedure results, keyed by the canonical hash of their inputs (see cache_key).
+
+    Results are kept decoded in an in-memory LRU, in front of an optional on-disk tier holding one
+    serialized blob per result in ``directory``. Entries older than ``ttl`` seconds are expired in both
+    tiers, and the least recently used entries are evicted when a tier exceeds its size limit.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of results kept in memory.
+    ttl : float, optional
+        The time to live of entries in seconds, forever if None.
+    directory : Union[str, Path], optional
+        The directory of the on-disk tier, memory only if None. Can be shared by several processes.
+    max_disk_bytes : int, optional
+        The maximum total size of the blobs of the on-disk tier, unlimited if None.
+    encoding : str, optional
+        The encoding of the blobs of the on-disk tier, e.g. 'msgpack-ext' or 'msgpack-ext+zstd'.
+    parser : Callable, optional
+        Called on the deserialized blobs of the on-disk tier, e.g. ``OutputProc.parse_obj``. The raw objects
+        are returned if None.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        ttl: Optional[float] = None,
+        directory: Union[str, Path] = None,
+        max_disk_bytes: Optional[int] = None,
+        encoding: str = "msgpack-ext",
+        parser: Callable = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = Path(directory).expanduser() if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.encoding = encoding
+        self.parser = parser
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = dict.fromkeys(
+            [
+                "hits",
+                "disk_hits",
+                "misses",
+                "evictions",
+                "disk_evictions",
+                "expirations",
+            ],
+            0,
+        )
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(path.stat().st_size for path in self._blobs())
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __contains__(self, input_data: Any) -> bool:
+        return self.get(input_data, _count=False) is not None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of hits (in memory or on disk), misses, evictions per tier and expirations."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._memory)
+            if self.directory is not None:
+                stats["disk_bytes"] = self._disk_bytes
+            return stats
+
+    def get(self, input_data: Any, default: Any = None, *, _count: bool = True) -> Any:
+        """Returns the cached result of a procedure input (or cache key), or ``default``."""
+        key = cache_key(input_data)
+        now = time.time()
+        with self._lock:
+            if key in self._memory:
+                stored, value = self._memory[key]
+                if self.ttl is None or now - stored < self.ttl:
+                    self._memory.move_to_end(key)
+                    if _count:
+                        self._stats["hits"] += 1
+                    return value
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            entry = self._read_blob(key, now)
+            if entry is not None:
+                if _count:
+                    self._stats["disk_hits"] += 1
+                # Promoted with the time it was written, so that it still expires after ttl
+                stored, value = entry
+                self._store(key, value, stored)
+                return value
+
+            if _count:
+                self._stats["misses"] += 1
+            return default
+
+    def put(self, input_data: Any, value: Any) -> None:
+        """Caches the result of a procedure input (or cache key) in both tiers."""
+        key = cache_key(input_data)
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+            if self.directory is not None:
+                self._write_blob(key, value)
+
+    def clear(self) -> None:
+        """Empties both tiers. The statistics are kept."""
+        with self._lock:
+            self._memory.clear()
+            if self.directory is not None:
+                for path in self._blobs():
+                    path.unlink()
+                self._disk_bytes = 0
+
+    ## In-memory tier
+
+    def _store(self, key: str, value: Any, stored: float) -> None:
+        self._memory[key] = (stored, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    ## On-disk tier
+
+    def _blob_path(self, key: str) -> Path:
+        if not _hex_key.fullmatch(key):
+            raise ValueError(f"Invalid cache key '{key}', expected a hex digest.")
+        # Fan out over subdirectories so that no directory holds millions of files
+        return self.directory / key[:2] / f"{key}.{self.encoding.replace('+', '.')}"
+
+    def _blobs(self):
+        return (path for path in self.directory.glob("*/*") if path.is_file())
+
+    def _read_blob(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        """Returns the time a blob was written and its value, or None."""
+        if self.directory is None:
+            return None
+        path = self._blob_path(key)
+        try:
+            stat = path.stat()
+            if self.ttl is not None and now - stat.st_mtime >= self.ttl:
+                path.unlink()
+                self._disk_bytes -= stat.st_size
+                self._stats["expirations"] += 1
+                return None
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        # Access times are unreliable (noatime mounts), so reads are recorded in st_atime explicitly
+        try:
+            os.utime(path, (now, stat.st_mtime))
+        except FileNotFoundError:
+            # Evicted by another process since it was read, the blob read is still valid
+            pass
+        if "+" not in self.encoding and self.encoding not in ("msgpack", "msgpack-ext"):
+            blob = blob.decode()
+        obj = deserialize(blob, self.encoding)
+        return stat.st_mtime, obj if self.parser is None else self.parser(obj)
+
+    def _write_blob(self, key: str, value: Any) -> None:
+        data = value.dict() if hasattr(value, "dict") else value
+        blob = serialize(data, self.encoding)
+        if isinstance(blob, str):
+            blob = blob.encode()
+
+        path = self._blob_path(key)
+        path.parent.mkdir(exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        # Written aside and renamed, so that concurrent readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(blob)
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(blob) - previous
+
+        if self.max_disk_bytes is not None and self._disk_bytes > self.max_disk_bytes:
+            self._evict_blobs()
+
+    def _evict_blobs(self) -> None:
+        """Deletes the least recently read or written blobs until the tier fits in max_disk_bytes."""
+        entries = []
+        for path in self._blobs():
+            stat = path.stat()
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        entries.sort()
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            path.unlink()
+            self._disk_bytes -= size
+            self._stats["disk_evictions"] += 1
+
+
+def cached(
+    cache: Optional[ResultCache] = None,
+    *,
+    cache_failures: bool = False,
+    **kwargs: Any,
+) -> Callable:
+    """Returns a decorator caching the results of a function of a procedure input, e.g.
+    ``InputProc -> OutputProc``, in a ResultCache.
+    Parameters
+    ----------
+    cache : ResultCache, optional
+        The cache. If None, a ResultCache is created with ``**kwargs`` and parses the blobs of its on-disk
+        tier into OutputProc models. Available as the ``cache`` attribute of the decorated function.
+    cache_failures : bool, optional
+        Also cache results whose ``success`` is False.
+    **kwargs : Any
+        Keyword arguments of ResultCache.
+    Returns
+    -------
+    Callable
+        The decorator.
+    Example:
+    --------
+    @cached(maxsize=10000, directory="~/.cache/results")
+    def compute(input_data: InputProc) -> OutputProc:
+        ...
+    """
+    if cache is None:
+        if "parser" not in kwargs:
+            from ..models import OutputProc
+
+            kwargs["parser"] = functools.partial(OutputProc.parse_obj, trusted=True)
+        cache = ResultCache(**kwargs)
+
+    def deco_cached(func):
+        @functools.wraps(func)
+        def inner_func(input_data, *args, **kwargs):
+            key = cache_key(input_data)
+            if args or kwargs:
+                key = hash_object([key, list(args), kwargs])
+
+            result = cache.get(key)
+            if result is None:
+                result = func(input_data, *args, **kwargs)
+                if cache_failures or getattr(result, "success", True):
+                    cache.put(key, result)
+            return result
+
+        inner_func.cache = cache
+        return inner_func
+
+    return deco_cached
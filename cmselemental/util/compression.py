@@ -0,0 +1,208 @@
+import bz2
+import gzip
+import io
+import lzma
+from pathlib import Path
+from typing import IO, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from .importing import which_import
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    pass
+
+try:
+    import lz4.frame
+except ModuleNotFoundError:
+    pass
+
+__all__ = [
+    "Codec",
+    "codecs",
+    "register_codec",
+    "get_codec",
+    "split_encoding",
+    "compress",
+    "decompress",
+    "open_file",
+]
+
+
+class Codec(NamedTuple):
+    """
+    A compression library used by the 'encoding+codec' encodings, e.g. 'msgpack-ext+zstd'.
+
+    ``compress(data, level) -> bytes`` and ``decompress(data) -> bytes`` work on whole blobs, and
+    ``open(path, mode, level) -> IO`` opens a binary file object that (de)compresses as it is read or written.
+    A ``level`` of None selects the default level of the library.
+    """
+
+    name: str
+    compress: Callable[[bytes, Optional[int]], bytes]
+    decompress: Callable[[bytes], bytes]
+    open: Callable[[Union[str, Path], str, Optional[int]], IO]
+    module: Optional[str] = None
+
+
+codecs: Dict[str, Codec] = {}
+
+# Aliases and file suffixes of the codecs
+_codec_aliases = {"gz": "gzip", "xz": "lzma", "zst": "zstd", "zstandard": "zstd"}
+suffix_codecs = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "lzma",
+    ".zst": "zstd",
+    ".lz4": "lz4",
+}
+
+
+def register_codec(
+    name: str,
+    compress: Callable[[bytes, Optional[int]], bytes],
+    decompress: Callable[[bytes], bytes],
+    open: Callable[[Union[str, Path], str, Optional[int]], IO],
+    module: Optional[str] = None,
+) -> None:
+    """Registers a compression library. See Codec for the interface; ``module`` is the Python module it
+    requires, if any."""
+    codecs[name] = Codec(name, compress, decompress, open, module)
+
+
+def get_codec(name: str) -> Codec:
+    """Returns a registered compression library by name or alias (e.g. 'gz', 'zst')."""
+    name = _codec_aliases.get(name.lower(), name.lower())
+    try:
+        codec = codecs[name]
+    except KeyError:
+        raise KeyError(
+            f"Compression '{name}' not understood, valid options: {list(codecs)}"
+        )
+    if codec.module is not None:
+        which_import(
+            codec.module,
+            raise_error=True,
+            raise_msg=f"Please install `{codec.module}` for '{name}' compression.",
+        )
+    return codec
+
+
+def split_encoding(encoding: str) -> Tuple[str, Optional[str]]:
+    """Splits an encoding such as 'msgpack-ext+zstd' into the serialization encoding and the name of
+    the compression, which is None for uncompressed encodings."""
+    base, _, codec = encoding.partition("+")
+    return base, codec or None
+
+
+def compress(data: Union[str, bytes], codec: str, level: Optional[int] = None) -> bytes:
+    """Compresses a blob, strings are UTF-8 encoded first.
+    Parameters
+    ----------
+    data : Union[str, bytes]
+        The data to compress.
+    codec : str
+        The compression: {'gzip', 'bz2', 'lzma', 'zstd', 'lz4'}.
+    level : int, optional
+        The compression level, the default level of the library if None.
+    Returns
+    -------
+    bytes
+        The compressed data.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    return get_codec(codec).compress(data, level)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Decompresses a blob compressed with ``codec``, see compress."""
+    return get_codec(codec).decompress(data)
+
+
+def open_file(
+    path: Union[str, Path], mode: str, codec: str, level: Optional[int] = None
+) -> IO:
+    """Opens a compressed file as a binary file object that (de)compresses as it is read or written.
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The path to the file.
+    mode : str
+        'rb', 'wb' or 'ab'. Appending adds a compressed frame (or member) to the file, which is read back
+        as if the file was compressed in one go.
+    codec : str
+        The compression: {'gzip', 'bz2', 'lzma', 'zstd', 'lz4'}.
+    level : int, optional
+        The compression level when writing, the default level of the library if None.
+    Returns
+    -------
+    IO
+        The file object.
+    """
+    return get_codec(codec).open(path, mode.replace("t", "").rstrip("b") + "b", level)
+
+
+## Codecs
+
+
+def _level_kwargs(keyword: str, level: Optional[int]) -> Dict[str, int]:
+    """The keyword argument selecting a compression level, empty for the default level."""
+    return {} if level is None else {keyword: level}
+
+
+def _stdlib_codec(module, keyword: str) -> Tuple[Callable, Callable, Callable]:
+    """The compress, decompress and open functions of gzip, bz2 or lzma, whose level keyword differs."""
+
+    def compress(data: bytes, level: Optional[int]) -> bytes:
+        return module.compress(data, **_level_kwargs(keyword, level))
+
+    def open_(path: Union[str, Path], mode: str, level: Optional[int]) -> IO:
+        kwargs = {} if "r" in mode else _level_kwargs(keyword, level)
+        return module.open(path, mode, **kwargs)
+
+    return compress, module.decompress, open_
+
+
+register_codec("gzip", *_stdlib_codec(gzip, "compresslevel"))
+register_codec("bz2", *_stdlib_codec(bz2, "compresslevel"))
+register_codec("lzma", *_stdlib_codec(lzma, "preset"))
+
+
+def _zstd_compress(data: bytes, level: Optional[int]) -> bytes:
+    return zstandard.ZstdCompressor(**_level_kwargs("level", level)).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    # Streamed or appended files hold several frames, possibly without their content size
+    reader = zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True)
+    return reader.read()
+
+
+def _zstd_open(path: Union[str, Path], mode: str, level: Optional[int]) -> IO:
+    if "r" in mode:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True, closefd=True
+        )
+        # Buffered for readline and iteration, used by JSON-lines streams
+        return io.BufferedReader(reader)
+    compressor = zstandard.ZstdCompressor(**_level_kwargs("level", level))
+    return compressor.stream_writer(open(path, mode), closefd=True)
+
+
+def _lz4_compress(data: bytes, level: Optional[int]) -> bytes:
+    return lz4.frame.compress(data, **_level_kwargs("compression_level", level))
+
+
+def _lz4_decompress(data: bytes) -> bytes:
+    # LZ4FrameFile reads across frames, unlike lz4.frame.decompress
+    return lz4.frame.LZ4FrameFile(io.BytesIO(data)).read()
+
+
+def _lz4_open(path: Union[str, Path], mode: str, level: Optional[int]) -> IO:
+    kwargs = {} if "r" in mode else _level_kwargs("compression_level", level)
+    return lz4.frame.open(path, mode, **kwargs)
+
+
+register_codec("zstd", _zstd_compress, _zstd_decompress, _zstd_open, module="zstandard")
+register_codec("lz4", _lz4_compress, _lz4_decompress, _lz4_open, module="lz4")
@@ -0,0 +1,238 @@
+import hashlib
+import struct
+import warnings
+from enum import Enum
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy
+
+from .importing import which_import
+
+try:
+    import xxhash
+except ModuleNotFoundError:
+    pass
+
+__all__ = ["get_hasher", "hash_object"]
+
+# Tokens are buffered and handed to the hasher in blocks of about this many bytes
+_block_size = 2**16
+_pack_length = struct.Struct("<q").pack
+_sequence_types = {list, tuple}
+_int_type = {int}
+_float_type = {float}
+
+
+def _numeric_array(values: Any) -> Optional[numpy.ndarray]:
+    """Converts a (nested) list of ints or of floats to an array, or returns None for other lists.
+
+    Items of mixed types, e.g. [1, True] or [1, 2.0], and ints NumPy would cast to floats, e.g. 2**63, are
+    not converted, as they would be hashed as the values of the cast, e.g. [1, 1] or [1.0, 2.0].
+    """
+    items = values
+    kinds = set(map(type, items))
+    while kinds and kinds <= _sequence_types:
+        items = [item for row in items for item in row]
+        kinds = set(map(type, items))
+    if kinds == _int_type:
+        # Ints beyond the int64 range are cast to float64 (or object), which would lose their value
+        expected = "iu"
+    elif kinds == _float_type:
+        expected = "f"
+    else:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", numpy.VisibleDeprecationWarning)
+        try:
+            array = numpy.asarray(values)
+        except (ValueError, numpy.VisibleDeprecationWarning):
+            return None
+    return array if array.dtype.kind in expected else None
+
+
+def get_hasher(algorithm: str = "blake2b") -> Any:
+    """Returns a new streaming hasher: blake2b (20 byte digest), any other hashlib algorithm, or an xxhash
+    algorithm such as 'xxh3_128' if xxhash is installed."""
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=20)
+    elif algorithm.startswith("xxh"):
+        which_import(
+            "xxhash",
+            raise_error=True,
+            raise_msg="Please install via `pip install xxhash`.",
+        )
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+class _Feeder:
+    """Writes the canonical byte representation of Python objects to a hasher.
+
+    Every value is tagged with its type and containers and strings are length-prefixed, so distinct
+    structures never produce the same byte stream.
+    """
+
+    def __init__(self, hasher: Any, float_decimals: Optional[int]):
+        self.hasher = hasher
+        self.float_decimals = float_decimals
+        self.buffer = bytearray()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.hasher.update(self.buffer)
+            self.buffer = bytearray()
+
+    def length(self, tag: bytes, n: int) -> None:
+        self.buffer += tag
+        self.buffer += _pack_length(n)
+
+    def text(self, tag: bytes, value: str) -> None:
+        data = value.encode()
+        buffer = self.buffer
+        buffer += tag
+        buffer += _pack_length(len(data))
+        buffer += data
+        if len(buffer) > _block_size:
+            self.flush()
+
+    def float(self, value: float) -> None:
+        if self.float_decimals is not None:
+            value = round(value, self.float_decimals)
+        # + 0.0 folds -0.0 into 0.0
+        self.text(b"f", repr(value + 0.0))
+
+    def array(self, value: numpy.ndarray) -> None:
+        if value.dtype.hasobject:
+            self.sequence(b"A", value.tolist())
+            return
+
+        if value.dtype.kind in "fc":
+            if self.float_decimals is not None:
+                value = numpy.round(value, self.float_decimals)
+            value = value + 0.0
+        # Little-endian C order, so that equal arrays are hashed identically whatever their layout
+        value = numpy.ascontiguousarray(value, dtype=value.dtype.newbyteorder("<"))
+        self.text(b"a", value.dtype.str)
+        self.length(b"", value.ndim)
+        for n in value.shape:
+            self.length(b"", n)
+        self.flush()
+        self.hasher.update(value.reshape(-1).view(numpy.uint8))
+
+    def sequence(self, tag: bytes, values: Iterable[Any]) -> None:
+        values = list(values)
+        self.length(tag, len(values))
+        for val in values:
+            self.value(val)
+
+    def mapping(self, items: Iterable[Any], exclude: Iterable[str] = ()) -> None:
+        # Keys of any type are sorted by their string form, as they would be in JSON, and hashed with their
+        # type so that e.g. 1 and "1" differ
+        items = sorted(
+            (
+                (str(key), type(key).__name__, key, val)
+                for key, val in items
+                if key not in exclude
+            ),
+            key=itemgetter(0, 1),
+        )
+        self.length(b"d", len(items))
+        for _, _, key, val in items:
+            if type(key) is str:
+                self.text(b"s", key)
+            else:
+                self.value(key)
+            self.value(val)
+
+    def value(self, value: Any) -> None:
+        # Exact types first, the common case
+        kind = type(value)
+        if kind is str:
+            self.text(b"s", value)
+        elif kind is float:
+            self.float(value)
+        elif kind is int:
+            self.text(b"i", str(value))
+        elif value is None:
+            self.buffer += b"N"
+        elif value is True or value is False:
+            self.buffer += b"T" if value else b"F"
+        elif isinstance(value, Enum):
+            self.value(value.value)
+        elif isinstance(value, (int, numpy.integer)):
+            self.text(b"i", str(int(value)))
+        elif isinstance(value, (float, numpy.floating)):
+            self.float(float(value))
+        elif isinstance(value, str):
+            self.text(b"s", value)
+        elif isinstance(value, bytes):
+            self.length(b"b", len(value))
+            self.buffer += value
+        elif isinstance(value, numpy.ndarray):
+            self.array(value)
+        elif isinstance(value, dict):
+            self.mapping(value.items())
+        elif isinstance(value, (list, tuple)):
+            # Numeric lists are hashed as arrays, like the arrays they are decoded from with JSON
+            array = _numeric_array(value)
+            if array is not None:
+                self.array(array)
+            else:
+                self.sequence(b"l", value)
+        elif isinstance(value, (set, frozenset)):
+            self.sequence(b"l", sorted(value, key=repr))
+        elif isinstance(value, numpy.bool_):
+            self.value(bool(value))
+        elif hasattr(value, "__fields__"):
+            # pydantic models
+            self.mapping(value.__dict__.items())
+        elif isinstance(value, Path):
+            self.text(b"s", str(value))
+        else:
+            raise TypeError(
+                f"Object of type {value.__class__.__name__} cannot be hashed."
+            )
+
+
+def hash_object(
+    data: Any,
+    *,
+    exclude: Iterable[str] = (),
+    float_decimals: Optional[int] = None,
+    algorithm: str = "blake2b",
+) -> str:
+    """
+    Computes a canonical, deterministic hash of a Python object, e.g. the fields of a ProtoModel.
+    The object is fed to a streaming hasher as it is traversed, without serializing it first: dictionary
+    keys are sorted, NumPy arrays are hashed from their (little-endian) data buffer and pydantic models
+    by their fields. Lists and tuples of ints and floats are hashed as arrays, so arrays and the lists they
+    are turned into by JSON have the same hash.
+    Parameters
+    ----------
+    data : Any
+        The object to hash, made of pydantic models, dictionaries, lists, tuples, NumPy arrays and scalars.
+    exclude : Iterable[str], optional
+        Keys of ``data`` (a dictionary or pydantic model) that are not hashed.
+    float_decimals : int, optional
+        If not None, floats (including floating point arrays) are rounded to this many decimals, so values
+        that differ by less are hashed identically.
+    algorithm : str, optional
+        The hash algorithm, see get_hasher.
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    hasher = get_hasher(algorithm)
+    feeder = _Feeder(hasher, float_decimals)
+    exclude = set(exclude)
+    if hasattr(data, "__fields__"):
+        feeder.mapping(data.__dict__.items(), exclude)
+    elif isinstance(data, dict):
+        feeder.mapping(data.items(), exclude)
+    else:
+        feeder.value(data)
+    feeder.flush()
+    return hasher.hexdigest()
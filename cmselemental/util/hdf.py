@@ -1,6 +1,8 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
 import numpy
+import itertools
 import json
+import warnings
 
 try:
     import h5py
@@ -12,11 +14,19 @@ except ModuleNotFoundError:
 import collections
 from contextlib import redirect_stdout
 
+from .serialization import deserialize, msgpackext_encode, serialize
+
+try:
+    import msgpack
+except ModuleNotFoundError:
+    pass
+
 encoding = "utf-8"
 str_encode = h5py.string_dtype(encoding=encoding)
 
 numpy_h5py_dtypes = {
     "U": str_encode,
+    "b": "bool",
     "i": "int64",
     "f": "float64",
 }
@@ -67,9 +77,124 @@ def jsontoh5(jsonfilename: str, h5filename: str):
             del fileobj["__db__"]
 
 
+def _group_members(group: "h5py.Group") -> List[Tuple[str, Any]]:
+    """Returns the (key, object) pairs of a group in the layout of read_dict: subgroups and datasets,
+    followed by their '_units' metadata as (key + '_units', value) pairs."""
+    members = []
+    for key, obj in group.items():
+        members.append((key, obj))
+        if isinstance(obj, h5py.Dataset):
+            attrs = obj.attrs
+            if key + "_units" in attrs:
+                members.append((key + "_units", attrs[key + "_units"]))
+    return members
+
+
+def _plain_value(value: Any, encoding: str) -> Any:
+    """Converts a value read from HDF5 to a type the serializers of ``encoding`` support."""
+    if isinstance(value, numpy.generic):
+        return value.item()
+    elif encoding == "json" and isinstance(value, numpy.ndarray):
+        # Nested lists keep the shape, unlike the flat 'json' array encoding
+        return value.tolist()
+    return value
+
+
+def _write_json_group(group: "h5py.Group", fp, encoding: str) -> None:
+    fp.write("{")
+    for i, (key, obj) in enumerate(_group_members(group)):
+        fp.write((", " if i else "") + json.dumps(key) + ": ")
+        if isinstance(obj, h5py.Group):
+            _write_json_group(obj, fp, encoding)
+            continue
+        elif isinstance(obj, h5py.Dataset):
+            obj = _read_dataset(obj)
+        fp.write(serialize(_plain_value(obj, encoding), encoding))
+    fp.write("}")
+
+
+def _write_msgpack_group(group: "h5py.Group", fp, packer: "msgpack.Packer") -> None:
+    members = _group_members(group)
+    fp.write(packer.pack_map_header(len(members)))
+    for key, obj in members:
+        fp.write(packer.pack(key))
+        if isinstance(obj, h5py.Group):
+            _write_msgpack_group(obj, fp, packer)
+            continue
+        elif isinstance(obj, h5py.Dataset):
+            obj = _read_dataset(obj)
+        fp.write(packer.pack(_plain_value(obj, "msgpack-ext")))
+
+
+def h5toserial(
+    h5filename: str, filename: str, encoding: str = "json", mode: str = "w"
+) -> None:
+    """
+    Converts an HDF5 file written by write_dict to a serialized file with the layout of read_dict,
+    i.e. nested dictionaries and '_units' metadata as sibling keys. The file is written directly, one
+    dataset at a time, so only one dataset is held in memory.
+
+    Parameters
+    ----------
+    h5filename: str
+        The path to the HDF5 file.
+    filename: str
+        The path to the output file.
+    encoding: str, optional
+        The output format, one of {'json', 'json-ext', 'msgpack-ext'}. 'json' stores arrays as nested lists,
+        'json-ext' and 'msgpack-ext' keep their dtype, see util.serialization.
+    mode: str, optional
+        The mode in which the output file is opened.
+    """
+    with h5py.File(h5filename, "r") as hdfobj:
+        if encoding in ("json", "json-ext"):
+            with open(filename, mode) as fp:
+                _write_json_group(hdfobj, fp, encoding)
+        elif encoding == "msgpack-ext":
+            packer = msgpack.Packer(default=msgpackext_encode, use_bin_type=True)
+            with open(filename, mode + "b") as fp:
+                _write_msgpack_group(hdfobj, fp, packer)
+        else:
+            raise KeyError(
+                f"Unknown encoding type '{encoding}', valid encoding types: 'json', 'json-ext', 'msgpack-ext'."
+            )
+
+
+def serialtoh5(
+    filename: str, h5filename: str, encoding: str = "json", mode: str = "w", **kwargs
+) -> None:
+    """
+    Converts a serialized file with the layout of read_dict, e.g. written by h5toserial, to an HDF5 file.
+
+    Parameters
+    ----------
+    filename: str
+        The path to the serialized file.
+    h5filename: str
+        The path to the HDF5 file.
+    encoding: str, optional
+        The format of the serialized file, one of {'json', 'json-ext', 'msgpack-ext'}.
+    mode: str, optional
+        The mode in which the HDF5 file is opened.
+    **kwargs: Optional[Dict[str, Any]], optional
+        Additional keywords passed to write_dict, e.g. a storage policy.
+    """
+    if encoding in ("json", "json-ext"):
+        with open(filename, "r") as fp:
+            data = deserialize(fp.read(), encoding)
+    elif encoding == "msgpack-ext":
+        with open(filename, "rb") as fp:
+            data = deserialize(fp.read(), encoding)
+    else:
+        raise KeyError(
+            f"Unknown encoding type '{encoding}', valid encoding types: 'json', 'json-ext', 'msgpack-ext'."
+        )
+    write_file(h5filename, data, mode=mode, **kwargs)
+
+
 def write_file(filename: str, data: Dict[str, Any], mode: str = "w", **kwargs):
     with h5py.File(filename, mode) as hdfobj:
-        write_dict(hdfobj, data)
+        write_dict(hdfobj, data, **kwargs)
 
 
 def read_file(filename: str, **kwargs) -> Dict[str, Any]:
@@ -77,10 +202,61 @@ def read_file(filename: str, **kwargs) -> Dict[str, Any]:
         return read_dict(hdfobj, **kwargs)
 
 
+class LazyDataset:
+    """
+    A read-only proxy of an HDF5 dataset that reads data on demand. Indexing reads only the requested
+    selection, e.g. ``dataset[10]`` reads one frame of a trajectory, and ``numpy.asarray(dataset)`` or
+    read() loads the whole dataset. The proxy is only usable while its file is open.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+        The dataset to read from.
+    """
+
+    def __init__(self, dataset: "h5py.Dataset"):
+        self.dataset = dataset
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.dataset.shape
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self.dataset.dtype
+
+    @property
+    def ndim(self) -> int:
+        return self.dataset.ndim
+
+    @property
+    def size(self) -> int:
+        return self.dataset.size
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, key: Any) -> Any:
+        return _read_dataset(self.dataset, key)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> numpy.ndarray:
+        data = numpy.asarray(self.read())
+        return data if dtype is None else data.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"LazyDataset({self.dataset.name!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def read(self) -> Any:
+        """Reads the whole dataset."""
+        return self[()]
+
+
 def _get_dtype(data):
     """Returns data type for hdf5 datasets."""
     if isinstance(data, str):
         return str_encode
+    elif isinstance(data, bool):
+        return "bool"
     elif isinstance(data, float):
         return "float64"
     elif isinstance(data, int):
@@ -96,34 +272,148 @@ def _get_dtype(data):
                 raise NotImplementedError(f"Data type {data.dtype} not supported.")
         return dtype
     elif isinstance(data, (list, tuple)):
-        if isinstance(data[0], tuple):
+        if data and isinstance(data[0], tuple):
             return ",".join([_get_dtype(item) for item in data[0]])
-        elif isinstance(data[0], list):
-            raise NotImplementedError("List of lists not supported.")
-        else:
-            assert all(
-                isinstance(item, int) for item in data
-            ), "Only homogenous arrays supported."  # keep this? Can degrade performance
-            return _get_dtype(data[0])  # assume homogenous list/tuple
+        return _list_array(data).dtype
     else:
         raise NotImplementedError(f"Data type {type(data)} not supported.")
 
 
+def _list_array(data):
+    """
+    Converts a homogenous list of bools, ints, floats or strings, possibly nested in rectangular lists,
+    to an array with an hdf5 data type. The list is converted by numpy in a single pass. Lists of lists
+    of numbers with different lengths are converted to an object array of rows with a variable-length
+    data type.
+    """
+    with warnings.catch_warnings():
+        # numpy < 1.24 warns, then falls back to an object array, for ragged lists
+        warnings.simplefilter("error", numpy.VisibleDeprecationWarning)
+        try:
+            array = numpy.asarray(data)
+        except (ValueError, numpy.VisibleDeprecationWarning):
+            return _ragged_array(data)
+
+    kind = array.dtype.kind
+    if kind == "O":
+        return _ragged_array(data)
+    elif kind not in "biufU":
+        raise NotImplementedError(f"Data type {array.dtype} not supported.")
+    elif kind == "U" and not all(
+        isinstance(item, str) for item in numpy.asarray(data, dtype=object).flat
+    ):  # numpy silently converts numbers mixed with strings
+        raise NotImplementedError("Only homogenous arrays supported.")
+    return array.astype(numpy_h5py_dtypes.get(kind, array.dtype), copy=False)
+
+
+def _ragged_array(data):
+    """Converts a ragged list of lists of numbers to an array of rows with a variable-length data type."""
+    try:
+        lengths = [len(row) for row in data]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", numpy.VisibleDeprecationWarning)
+            flat = numpy.asarray(list(itertools.chain.from_iterable(data)))
+    except (TypeError, ValueError, numpy.VisibleDeprecationWarning):
+        flat = None
+    if flat is None or flat.ndim != 1 or flat.dtype.kind not in "biuf":
+        raise NotImplementedError(
+            "Only homogenous arrays and ragged lists of lists of numbers supported."
+        )
+
+    base = numpy.dtype(numpy_h5py_dtypes[flat.dtype.kind])
+    flat = flat.astype(base, copy=False)
+    offsets = [0, *itertools.accumulate(lengths)]
+    array = numpy.empty(len(lengths), dtype=h5py.vlen_dtype(base))
+    for i in range(len(lengths)):
+        array[i] = flat[offsets[i] : offsets[i + 1]]
+    return array
+
+
 def _wrap_homogenous_array(data):
+    if isinstance(data, (list, tuple)) and not (data and isinstance(data[0], tuple)):
+        return _list_array(data)
     dtype = _get_dtype(data)
     return numpy.array(data, dtype=dtype)
 
 
+def chunk_shape(
+    shape: Tuple[int, ...], itemsize: int, target: int = 2**20
+) -> Tuple[int, ...]:
+    """
+    Returns a chunk shape of about ``target`` bytes for a dataset, splitting the leading axes first
+    so that a chunk holds whole rows (e.g. whole frames of a trajectory) whenever they fit.
+
+    Parameters
+    ----------
+    shape: Tuple[int, ...]
+        The shape of the dataset, without zero-length axes.
+    itemsize: int
+        The size of an element in bytes.
+    target: int
+        The approximate size of a chunk in bytes.
+    Returns
+    -------
+    Tuple[int, ...]
+        The chunk shape.
+    """
+    chunks = list(shape)
+    for axis in range(len(shape)):
+        row = itemsize * int(numpy.prod(chunks[axis + 1 :], dtype=numpy.int64))
+        chunks[axis] = int(min(max(target // row, 1), shape[axis]))
+        if row <= target:
+            break
+    return tuple(chunks)
+
+
+def _dataset_options(path: str, data: numpy.ndarray, storage: Dict[str, Any]):
+    """Returns the create_dataset keywords for the storage policy of write_dict."""
+    overrides = storage["overrides"] or {}
+    key = path.rsplit("/", 1)[-1]
+    policy = {**storage, **overrides.get(key, {}), **overrides.get(path, {})}
+
+    filtered = policy["compression"] is not None or policy["shuffle"]
+    if (
+        data.ndim == 0
+        or data.size == 0
+        or data.nbytes < policy["threshold"]
+        or not (filtered or policy["chunks"])
+    ):
+        return {}  # contiguous
+
+    chunks = policy["chunks"]
+    if chunks is None or chunks is True:
+        chunks = chunk_shape(data.shape, data.dtype.itemsize)
+
+    options = {"chunks": chunks}
+    if policy["compression"] is not None:
+        options["compression"] = policy["compression"]
+        options["compression_opts"] = policy["compression_opts"]
+    if policy["shuffle"]:
+        options["shuffle"] = True
+    return options
+
+
 def write_dict(
     hdfobj: "h5py._hl.files.File",
     data: Dict[str, Any],
     units_metadata: bool = True,
+    *,
+    compression: Optional[str] = None,
+    compression_opts: Any = None,
+    shuffle: bool = False,
+    chunks: Any = None,
+    threshold: int = 2**16,
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
     **kwargs,
 ) -> None:
     """
     Writes a python dictionary to an HDF5 file. By default, any attribute that ends in '_units' is stored
     as metadata in the hdf5 file. Can be turned off by setting units_metadata=False.
 
+    Keys with None values are skipped. Datasets are stored contiguously unless a storage policy is given:
+    datasets of at least ``threshold`` bytes are then chunked, so that partial reads only touch the chunks
+    they need, and compressed.
+
     Parameters
     ----------
     hdfobj: h5py._hl.files.File
@@ -132,35 +422,92 @@ def write_dict(
         The dictionary of data to write.
     units_metadata: bool
         Treat any key ending in '_units' as metadata.
+    compression: str, optional
+        The compression filter, e.g. 'gzip', 'lzf' or 'szip', see h5py.Group.create_dataset.
+    compression_opts: Any, optional
+        The options of the compression filter, e.g. the gzip level (0-9).
+    shuffle: bool, optional
+        Apply the shuffle filter, which usually improves the compression of numeric arrays.
+    chunks: Union[bool, Tuple[int, ...]], optional
+        The chunk shape. Defaults to chunk_shape (about 1 MiB per chunk) when filters are used or if True.
+    threshold: int, optional
+        The size in bytes below which datasets stay contiguous and uncompressed.
+    overrides: Dict[str, Dict[str, Any]], optional
+        Per-dataset storage options, keyed by dataset name or path (e.g. 'extras/geometry'), that take
+        precedence over the above.
     **kwargs: Optional[Dict[str, Any]], optional
         Any additional keywords to pass to the constructor.
 
     """
+    storage = {
+        "compression": compression,
+        "compression_opts": compression_opts,
+        "shuffle": shuffle,
+        "chunks": chunks,
+        "threshold": threshold,
+        "overrides": overrides,
+    }
+    datasets = {}  # handles of the created datasets, for the units metadata
     for key, val in data.items():
-        if isinstance(val, dict):
+        if val is None:
+            continue  # HDF5 has no null, unset fields take their default when read back
+        elif isinstance(val, dict):
             grp = hdfobj.create_group(key)
-            write_dict(grp, val)
+            write_dict(grp, val, units_metadata, **storage)
         elif units_metadata:
             if not key.endswith("_units"):  # Deal with units later
                 val = _wrap_homogenous_array(val)
-                hdfobj.create_dataset(name=key, data=val)
+                path = f"{hdfobj.name}/{key}".lstrip("/")
+                options = _dataset_options(path, val, storage)
+                datasets[key] = hdfobj.create_dataset(name=key, data=val, **options)
 
     # Save units as metadata
     if units_metadata:
         for key, val in data.items():
-            if key.endswith("_units"):
+            if key.endswith("_units") and val is not None:
                 array_name, _ = key.split("_units")
-                hdfobj[array_name].attrs[key] = val
-
-
-def read_dict(hdfobj: "h5py._hl.files.File", **kwargs) -> Dict[str, Any]:
+                dataset = datasets.get(array_name) or hdfobj[array_name]
+                dataset.attrs[key] = val
+
+
+def _read_dataset(dataset: "h5py.Dataset", selection: Any = ()) -> Any:
+    """Reads a selection of a dataset. Variable-length numeric rows are returned as lists."""
+    value = dataset[selection]
+    vlen = h5py.check_vlen_dtype(dataset.dtype)
+    if vlen is not None and vlen not in (str, bytes):
+        if isinstance(value, numpy.ndarray) and value.dtype.kind == "O":
+            return [row.tolist() for row in value]
+        return value
+    return _decode_value(value)
+
+
+def _decode_value(value: Any) -> Any:
+    """Converts HDF5 strings read by h5py to python strings."""
+    if isinstance(value, bytes):
+        return value.decode()
+    elif isinstance(value, numpy.ndarray):
+        if value.dtype.char == "O":
+            if len(value.dtype) < 2:  # homogenous array
+                return value.astype("U")  # unicode default in py3
+            else:
+                pass  # do nothing with homogenous array
+    return value
+
+
+def read_dict(
+    hdfobj: "h5py._hl.files.File", lazy: bool = False, **kwargs
+) -> Dict[str, Any]:
     """
-    Converts an hdf file object to a python dictionary.
+    Converts an hdf file object to a python dictionary. Keys are in creation order for groups that track
+    it (e.g. created with ``track_order=True``), and sorted by name otherwise, as h5py lists them.
 
     Parameters
     ----------
     hdfobj: h5py._hl.files.File
         The hdf file object to read data from.
+    lazy: bool, optional
+        Return non-scalar datasets as LazyDataset proxies instead of reading them. The file must then
+        stay open for as long as the data is used.
     **kwargs: Optional[Dict[str, Any]], optional
         Any additional keywords to pass to the constructor.
     Returns
@@ -171,24 +518,218 @@ def read_dict(hdfobj: "h5py._hl.files.File", **kwargs) -> Dict[str, Any]:
     """
 
     data = {}
-    for key in hdfobj.keys():
-        if isinstance(hdfobj[key], h5py.Group):
-            data[key] = read_dict(hdfobj[key])
-        elif isinstance(hdfobj[key], h5py.Dataset):
-            data[key] = hdfobj[key][()]
+    # The dictionaries of the groups visited so far, by relative path
+    groups = {"": data}
+    # visititems visits by name, the member names of groups that track creation order, by relative path
+    ordered = {"": _creation_order(hdfobj)}
+
+    def visit(name: str, obj: Any) -> None:
+        parent, _, key = name.rpartition("/")
+        if isinstance(obj, h5py.Group):
+            groups[name] = groups[parent][key] = {}
+            ordered[name] = _creation_order(obj)
+        elif isinstance(obj, h5py.Dataset):
+            if lazy and obj.ndim > 0:
+                groups[parent][key] = LazyDataset(obj)
+            else:
+                groups[parent][key] = _read_dataset(obj)
 
             # For MMEl, store key_units as metadata
-            if key + "_units" in hdfobj[key].attrs.keys():
-                data[key + "_units"] = hdfobj[key].attrs[key + "_units"]
-
-            if isinstance(data[key], bytes):
-                data[key] = data[key].decode()
-            elif isinstance(data[key], numpy.ndarray):
-                if data[key].dtype.char == "O":
-                    if len(data[key].dtype) < 2:  # homogenous array
-                        data[key] = data[key].astype("U")  # unicode default in py3
-                    else:
-                        pass  # do nothing with homogenous array
+            attrs = obj.attrs
+            if key + "_units" in attrs:
+                groups[parent][key + "_units"] = attrs[key + "_units"]
         else:
-            raise ValueError(f"Data type not understood: {hdfobj[key]}")
+            raise ValueError(f"Data type not understood: {obj}")
+
+    # A single traversal of the hierarchy, each object is opened once
+    hdfobj.visititems(visit)
+    for name, members in ordered.items():
+        if members is not None:
+            _reorder(groups[name], members)
     return data
+
+
+def _creation_order(group: "h5py.Group") -> Optional[List[str]]:
+    """Returns the member names of a group in creation order, None if the group does not track it."""
+    # Files are listed by name whatever the order tracked by their root group
+    if isinstance(group, h5py.File):
+        group = group["/"]
+    if group.id.get_create_plist().get_link_creation_order():
+        return list(group)
+    return None
+
+
+def _reorder(data: Dict[str, Any], members: List[str]) -> None:
+    """Reorders the keys of a group dictionary in place after ``members``, units metadata after its dataset."""
+    items = dict(data)
+    data.clear()
+    names = set(members)
+    for key in members:
+        if key in items:
+            data[key] = items.pop(key)
+        if key + "_units" in items and key + "_units" not in names:
+            data[key + "_units"] = items.pop(key + "_units")
+    data.update(items)
+
+
+def _record_key(record: Dict[str, Any]) -> Optional[str]:
+    """Returns the ``id`` or else the ``hash_index`` of a record, if any."""
+    return record.get("id") or record.get("hash_index")
+
+
+def append_records(
+    filename: str,
+    records: Iterable[Dict[str, Any]],
+    *,
+    group: str = "records",
+    key: Callable[[Dict[str, Any]], Optional[str]] = _record_key,
+    overwrite: bool = False,
+    mode: str = "a",
+    chunk_size: Optional[int] = 1000,
+    **kwargs,
+) -> List[str]:
+    """
+    Appends records to a collection of records in an HDF5 file, each stored under its own key as a
+    subgroup of ``group`` (see write_dict). Records are kept in insertion order.
+
+    Parameters
+    ----------
+    filename: str
+        The path to the file, created if needed.
+    records: Iterable[Dict[str, Any]]
+        The records to write, e.g. ProtoModel.dict(). Consumed lazily, ``chunk_size`` records at a time.
+    group: str, optional
+        The group of the collection.
+    key: Callable[[Dict[str, Any]], Optional[str]], optional
+        Returns the key of a record. Defaults to the ``id`` or ``hash_index`` of the record. Records without
+        a key are numbered by their position in the collection. Keys may not contain '/'.
+    overwrite: bool, optional
+        Replace existing records with the same key instead of raising a ValueError. Records of the same
+        batch always need distinct keys.
+    mode: str, optional
+        The h5py.File mode. Set mode='w' to start a new file.
+    chunk_size: int, optional
+        The number of records held in memory at a time. The keys of a chunk are all checked before any of
+        its records is written, so an invalid key leaves the previous chunks written. If None, the whole
+        batch is checked first and nothing is written unless all keys are valid.
+    **kwargs: Optional[Dict[str, Any]], optional
+        Additional keywords passed to write_dict, e.g. a storage policy.
+    Returns
+    -------
+    List[str]
+        The keys of the written records.
+    """
+    keys: List[str] = []
+    records = iter(records)
+    with h5py.File(filename, mode) as hdfobj:
+        if group in hdfobj:
+            collection = hdfobj[group]
+        else:
+            collection = hdfobj.create_group(group, track_order=True)
+
+        written: Set[str] = set()
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            names = _record_names(collection, chunk, key, overwrite, written)
+            for name, record in zip(names, chunk):
+                if name in collection:
+                    del collection[name]
+                write_dict(
+                    collection.create_group(name, track_order=True), record, **kwargs
+                )
+            written.update(names)
+            keys.extend(names)
+    return keys
+
+
+def _record_names(
+    collection: "h5py.Group",
+    records: List[Dict[str, Any]],
+    key: Callable[[Dict[str, Any]], Optional[str]],
+    overwrite: bool,
+    written: Set[str],
+) -> List[str]:
+    """Resolves and checks the keys of a chunk of records of append_records, before any is written."""
+    names = [key(record) for record in records]
+    given = [name for name in names if name is not None]
+    for name in given:
+        if "/" in name or name in ("", "."):
+            raise ValueError(f"Invalid record key '{name}', keys may not contain '/'.")
+    duplicates = {name for name in given if name in written}
+    if len(set(given)) != len(given):
+        duplicates.update(name for name in given if given.count(name) > 1)
+    if duplicates:
+        raise ValueError(
+            f"Duplicate record keys {sorted(duplicates)} in the same batch."
+        )
+
+    existing = set(collection.keys())
+    if not overwrite:
+        for name in given:
+            if name in existing:
+                raise ValueError(
+                    f"Record '{name}' already exists in '{collection.file.filename}'."
+                )
+
+    # Unnamed records are numbered by their position, skipping the keys in use
+    taken = existing | set(given)
+    size = len(existing)
+    for i, name in enumerate(names):
+        if name is None:
+            position = size
+            while str(position) in taken:
+                position += 1
+            names[i] = str(position)
+            taken.add(names[i])
+        if names[i] not in existing:
+            size += 1
+    return names
+
+
+def record_keys(filename: str, *, group: str = "records") -> List[str]:
+    """Returns the keys of a collection of records in an HDF5 file, in insertion order."""
+    with h5py.File(filename, "r") as hdfobj:
+        return list(hdfobj[group].keys())
+
+
+def read_record(
+    filename: str, key: str, *, group: str = "records", **kwargs
+) -> Dict[str, Any]:
+    """
+    Reads a single record of a collection of records in an HDF5 file.
+
+    Parameters
+    ----------
+    filename: str
+        The path to the file.
+    key: str
+        The key of the record, see append_records.
+    group: str, optional
+        The group of the collection.
+    **kwargs: Optional[Dict[str, Any]], optional
+        Additional keywords passed to read_dict.
+    Returns
+    -------
+    Dict[str, Any]
+        The record.
+    Raises
+    ------
+    KeyError
+        When no record has this key.
+    """
+    with h5py.File(filename, "r") as hdfobj:
+        collection = hdfobj[group]
+        if key not in collection:
+            raise KeyError(f"No record '{key}' in '{filename}'.")
+        return read_dict(collection[key], **kwargs)
+
+
+def iter_records(
+    filename: str, *, group: str = "records", **kwargs
+) -> Iterator[Dict[str, Any]]:
+    """Lazily reads the records of a collection of records in an HDF5 file, one at a time, in insertion order."""
+    with h5py.File(filename, "r") as hdfobj:
+        for record in hdfobj[group].values():
+            yield read_dict(record, **kwargs)
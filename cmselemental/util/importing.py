@@ -3,7 +3,7 @@ import shutil
 import sys
 from typing import List, Union
 from types import ModuleType
-import importlib
+import importlib.util
 
 
 def which_import(
@@ -0,0 +1,163 @@
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .serialization import deserialize
+
+__all__ = ["index_path", "index_entry", "line_chunks", "RecordFile"]
+
+
+def index_path(path: Union[str, Path]) -> Path:
+    """Returns the path of the sidecar index of a multi-record file."""
+    return Path(str(path) + ".index")
+
+
+def index_entry(offset: int, length: int, record: Any) -> str:
+    """Returns the JSON-lines index entry of a record written at ``offset`` with ``length`` bytes.
+    Parameters
+    ----------
+    offset : int
+        The position of the first byte of the record in the data file.
+    length : int
+        The size of the serialized record in bytes.
+    record : Any
+        The record, usually a ProtoModel. Its ``id``, ``hash_index`` and ``schema_name`` are stored if present.
+    Returns
+    -------
+    str
+        A single line of JSON.
+    """
+    entry = {
+        "offset": offset,
+        "length": length,
+        "id": getattr(record, "id", None),
+        "hash_index": getattr(record, "hash_index", None),
+        "schema_name": getattr(record, "schema_name", None),
+    }
+    return json.dumps(entry) + "\n"
+
+
+def line_chunks(path: Union[str, Path], chunk_size: int) -> List[Tuple[int, int]]:
+    """Splits a line-oriented file into contiguous byte ranges of at least ``chunk_size`` bytes
+    (except the last one) that each end at a line break.
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The path to the file.
+    chunk_size : int
+        The minimum number of bytes in a chunk.
+    Returns
+    -------
+    List[Tuple[int, int]]
+        The (start, stop) offsets of each chunk.
+    """
+    size = os.path.getsize(path)
+    chunks = []
+    with open(path, "rb") as fp:
+        start = 0
+        while start < size:
+            fp.seek(start + chunk_size)
+            fp.readline()  # advance to the end of the current line
+            stop = min(fp.tell(), size)
+            chunks.append((start, stop))
+            start = stop
+    return chunks
+
+
+class RecordFile:
+    """
+    Random access to the records of a multi-record file through its sidecar index.
+
+    The data file is memory-mapped and only the bytes of the requested record are read, so
+    point lookups by position, ``id`` or ``hash_index`` do not depend on the size of the file.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The path to the data file. The index is read from ``index_path(path)``.
+    encoding : str
+        The encoding of the records, passed to ``deserialize``. Each line of a 'jsonl' file is one record.
+    parser : Callable, optional
+        Called on each deserialized record, e.g. ``Model.parse_obj``. Returns the raw object if None.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to ``deserialize``.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        encoding: str,
+        *,
+        parser: Callable = None,
+        **kwargs: Optional[Dict[str, Any]],
+    ):
+        self.path = Path(path)
+        self.encoding = "json" if encoding in ("jsonl", "ndjson") else encoding
+        self.parser = parser
+        self._kwargs = kwargs
+
+        with open(index_path(path), "r") as fp:
+            self.index: List[Dict[str, Any]] = [json.loads(line) for line in fp]
+
+        # Later records supersede earlier ones with the same key
+        self._ids = {
+            entry["id"]: i for i, entry in enumerate(self.index) if entry["id"]
+        }
+        self._hashes = {
+            entry["hash_index"]: i
+            for i, entry in enumerate(self.index)
+            if entry["hash_index"]
+        }
+
+        self._fp = open(self.path, "rb")
+        if self.index:
+            self._mmap = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        else:  # cannot map an empty file
+            self._mmap = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, position: int) -> Any:
+        blob = self.read_raw(position)
+        if self.encoding not in ("msgpack", "msgpack-ext"):
+            blob = blob.decode()
+        obj = deserialize(blob, self.encoding, **self._kwargs)
+        return obj if self.parser is None else self.parser(obj)
+
+    def __enter__(self) -> "RecordFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get(self, *, id: str = None, hash_index: str = None) -> Any:
+        """Returns the record with the given ``id`` or ``hash_index``.
+        Raises
+        ------
+        KeyError
+            When no record in the index matches.
+        """
+        if id is not None:
+            position = self._ids[id]
+        elif hash_index is not None:
+            position = self._hashes[hash_index]
+        else:
+            raise TypeError("Please provide either `id` or `hash_index`.")
+        return self[position]
+
+    def read_raw(self, position: int) -> bytes:
+        """Returns the serialized bytes of the record at ``position``."""
+        entry = self.index[position]
+        return self._mmap[entry["offset"] : entry["offset"] + entry["length"]]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._fp.close()
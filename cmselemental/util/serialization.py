@@ -1,9 +1,24 @@
+import base64
+import functools
 import json
-from typing import Any, Union, Dict, Optional
+import math
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
 
 import numpy as np
 from pydantic.json import pydantic_encoder
 
+from .compression import compress, decompress, split_encoding
 from .importing import which_import, yaml_import
 
 try:
@@ -11,18 +26,32 @@ try:
 except ModuleNotFoundError:
     pass
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    pass
+
+try:
+    import ujson
+except ModuleNotFoundError:
+    pass
+
 _msgpack_which_msg = "Please install via `conda install msgpack-python`."
 
 ## MSGPackExt
 
 
-def msgpackext_encode(obj: Any) -> Any:
+def msgpackext_encode(obj: Any, *, buffer_callback: Callable = None) -> Any:
     """
     Encodes an object using pydantic and NumPy array serialization techniques suitable for msgpack.
     Parameters
     ----------
     obj : Any
         Any object that can be serialized with pydantic and NumPy encoding techniques.
+    buffer_callback : Callable, optional
+        If provided, array payloads are not embedded in the msgpack stream. Instead, a flat ``memoryview``
+        of each array is passed to ``buffer_callback`` (in order) and only a reference is encoded.
+        C-contiguous arrays are not copied.
     Returns
     -------
     Any
@@ -37,11 +66,14 @@ def msgpackext_encode(obj: Any) -> Any:
 
     if isinstance(obj, np.ndarray):
         if obj.shape:
-            data = {
-                b"_nd_": True,
-                b"dtype": obj.dtype.str,
-                b"data": np.ascontiguousarray(obj).tobytes(),
-            }
+            data = {b"_nd_": True, b"dtype": obj.dtype.str}
+            if buffer_callback is None:
+                data[b"data"] = np.ascontiguousarray(obj).tobytes()
+            else:
+                # A byte view rather than memoryview.cast, which rejects empty and datetime64 arrays
+                flat = np.ascontiguousarray(obj).reshape(-1).view(np.uint8)
+                buffer_callback(memoryview(flat))
+                data[b"oob"] = True
             if len(obj.shape) > 1:
                 data[b"shape"] = obj.shape
             return data
@@ -53,13 +85,21 @@ def msgpackext_encode(obj: Any) -> Any:
     return obj
 
 
-def msgpackext_decode(obj: Any) -> Any:
+def msgpackext_decode(
+    obj: Any, *, writable: bool = False, buffers: Iterator = None
+) -> Any:
     """
     Decodes a msgpack objects from a dictionary representation.
     Parameters
     ----------
     obj : Any
         An encoded object, likely a dictionary.
+    writable : bool, optional
+        By default, arrays are zero-copy read-only views whose ``base`` is the msgpack buffer
+        that owns the data. If True, each array is copied into its own writable buffer.
+    buffers : Iterator, optional
+        Iterator over the out-of-band buffers produced by ``msgpackext_encode(..., buffer_callback=...)``,
+        consumed in order. Arrays are views of these buffers unless ``writable=True``.
     Returns
     -------
     Any
@@ -67,9 +107,18 @@ def msgpackext_decode(obj: Any) -> Any:
     """
 
     if b"_nd_" in obj:
-        arr = np.frombuffer(obj[b"data"], dtype=obj[b"dtype"])
+        if b"oob" in obj:
+            if buffers is None:
+                raise ValueError(
+                    "Object contains out-of-band array data, please provide `buffers`."
+                )
+            arr = np.frombuffer(next(buffers), dtype=obj[b"dtype"])
+        else:
+            arr = np.frombuffer(obj[b"data"], dtype=obj[b"dtype"])
         if b"shape" in obj:
             arr.shape = obj[b"shape"]
+        if writable:
+            arr = arr.copy()
 
         return arr
 
@@ -89,21 +138,56 @@ def msgpackext_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> bytes:
     -------
     bytes
         A msgpack representation of the data in bytes.
+    Notes
+    -----
+    Similar to pickle protocol 5, passing ``buffer_callback`` ships array payloads out-of-band:
+    .. code-block:: python
+        buffers = []
+        header = msgpackext_dumps(data, buffer_callback=buffers.append)
+        data = msgpackext_loads(header, buffers=buffers)
     """
     which_import("msgpack", raise_error=True, raise_msg=_msgpack_which_msg)
     use_bin_type = kwargs.pop("use_bin_type", True)
+    buffer_callback = kwargs.pop("buffer_callback", None)
+    default = (
+        functools.partial(msgpackext_encode, buffer_callback=buffer_callback)
+        if buffer_callback is not None
+        else msgpackext_encode
+    )
+
+    return msgpack.dumps(data, default=default, use_bin_type=use_bin_type, **kwargs)
+
 
-    return msgpack.dumps(
-        data, default=msgpackext_encode, use_bin_type=use_bin_type, **kwargs
+def _msgpackext_object_hook(
+    writable: bool = False, buffers: Iterable = None
+) -> Callable:
+    """Returns the msgpack object_hook decoding arrays with the given options."""
+    if not writable and buffers is None:
+        return msgpackext_decode
+    return functools.partial(
+        msgpackext_decode,
+        writable=writable,
+        buffers=None if buffers is None else iter(buffers),
     )
 
 
-def msgpackext_loads(data: bytes, **kwargs: Dict[str, Any]) -> Any:
+def msgpackext_loads(
+    data: bytes,
+    *,
+    writable: bool = False,
+    buffers: Iterable = None,
+    **kwargs: Dict[str, Any],
+) -> Any:
     """Deserializes a msgpack byte representation of known objects into those objects.
     Parameters
     ----------
     data : bytes
         The serialized msgpack byte array.
+    writable : bool, optional
+        Return writable copies of arrays rather than read-only views of ``data``. See ``msgpackext_decode``.
+    buffers : Iterable, optional
+        The out-of-band buffers collected with ``msgpackext_dumps(..., buffer_callback=...)``, in order.
+        Any bytes-like objects, e.g. ``bytes``, ``memoryview`` or socket frames, are accepted.
     **kwargs : Optional[Dict[str, Any]], optional
         Additional keyword arguments to pass to the constructor.
     Returns
@@ -113,41 +197,312 @@ def msgpackext_loads(data: bytes, **kwargs: Dict[str, Any]) -> Any:
     """
     which_import("msgpack", raise_error=True, raise_msg=_msgpack_which_msg)
     raw = kwargs.pop("raw", False)
-    return msgpack.loads(data, object_hook=msgpackext_decode, raw=raw, **kwargs)
+    object_hook = _msgpackext_object_hook(writable=writable, buffers=buffers)
+    return msgpack.loads(data, object_hook=object_hook, raw=raw, **kwargs)
+
+
+def msgpackext_iterload(
+    fp: BinaryIO,
+    *,
+    writable: bool = False,
+    buffers: Iterable = None,
+    **kwargs: Dict[str, Any],
+) -> Iterator[Any]:
+    """Lazily deserializes a stream of concatenated msgpack objects from a binary file object.
+    Parameters
+    ----------
+    fp : BinaryIO
+        A binary file-like object holding zero or more msgpack-ext objects written back to back.
+    writable : bool, optional
+        Return writable copies of arrays rather than read-only views. See ``msgpackext_decode``.
+    buffers : Iterable, optional
+        The out-of-band buffers for all objects in the stream, in order. See ``msgpackext_loads``.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the msgpack.Unpacker constructor.
+    Returns
+    -------
+    Iterator[Any]
+        The deserialized Python objects, one at a time. Only ``read_size`` bytes plus the current
+        object are held in memory.
+    """
+    which_import("msgpack", raise_error=True, raise_msg=_msgpack_which_msg)
+    raw = kwargs.pop("raw", False)
+    max_buffer_size = kwargs.pop("max_buffer_size", 0)  # do not limit record size
+    object_hook = _msgpackext_object_hook(writable=writable, buffers=buffers)
+    yield from msgpack.Unpacker(
+        fp,
+        object_hook=object_hook,
+        raw=raw,
+        max_buffer_size=max_buffer_size,
+        **kwargs,
+    )
 
 
-## JSON Ext
+## JSON backends
 
 
-class JSONExtArrayEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
+class JSONBackend(NamedTuple):
+    """
+    A JSON library used by the 'json', 'json-ext' and 'jsonl' encodings.
+
+    ``dumps(data, default, **kwargs) -> str`` must call ``default`` for objects it cannot encode natively and
+    raise NotImplementedError for keyword arguments it does not support. ``loads(data) -> Any`` accepts str or
+    bytes. Unsupported keyword arguments and encoding errors fall back to the standard library.
+    """
+
+    name: str
+    dumps: Callable[..., str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+json_backends: Dict[str, JSONBackend] = {}
+_json_backend: Optional[JSONBackend] = None
+
+
+def register_json_backend(
+    name: str,
+    dumps: Callable[..., str],
+    loads: Callable[[Union[str, bytes]], Any],
+) -> None:
+    """Registers a JSON library that can be selected with set_json_backend. See JSONBackend for the interface."""
+    json_backends[name] = JSONBackend(name, dumps, loads)
+
+
+def set_json_backend(name: Optional[str] = None) -> str:
+    """Selects the JSON library used to encode and decode JSON.
+    Parameters
+    ----------
+    name : str, optional
+        The name of a registered backend, e.g. 'json' (standard library, the default), 'orjson' or 'ujson'.
+        The faster libraries are only used when selected. If None, the standard library is selected.
+    Returns
+    -------
+    str
+        The name of the selected backend.
+    Notes
+    -----
+    All backends produce equivalent JSON, but only 'json' output is byte-identical to the standard library:
+    orjson and ujson write compact separators and cannot be told otherwise. This is why they are not
+    selected automatically when installed: the files and ``ProtoModel.json()`` output of an application
+    would change with its environment. Data holding NaN or infinity, which orjson would encode as null, and
+    documents the selected backend cannot decode (e.g. NaN written by the standard library) fall back to the
+    standard library.
+    """
+    global _json_backend
+
+    if name is None:
+        name = "json"
+    elif name not in json_backends:
+        raise KeyError(
+            f"JSON backend '{name}' not available, valid options: {list(json_backends)}"
+        )
+
+    _json_backend = json_backends[name]
+    return name
+
+
+def get_json_backend() -> JSONBackend:
+    """Returns the JSON library in use, selecting the default one on first use."""
+    if _json_backend is None:
+        set_json_backend()
+    return _json_backend
+
+
+def _stdlib_json_dumps(data: Any, default: Callable, **kwargs: Any) -> str:
+    return json.dumps(data, default=default, **kwargs)
+
+
+def _orjson_dumps(
+    data: Any,
+    default: Callable,
+    *,
+    indent: int = None,
+    sort_keys: bool = False,
+    **kwargs,
+) -> str:
+    if kwargs or indent not in (None, 2):
+        raise NotImplementedError
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    blob = orjson.dumps(data, default=default, option=option).decode()
+    # orjson silently encodes NaN and infinity as null, only look for them when the output has nulls
+    if "null" in blob and _has_nonfinite(data):
+        raise NotImplementedError
+    return blob
+
+
+def _ujson_dumps(
+    data: Any,
+    default: Callable,
+    *,
+    indent: int = None,
+    sort_keys: bool = False,
+    **kwargs,
+) -> str:
+    # ujson drops the contents of objects returned by default when sorting keys
+    if kwargs or sort_keys:
+        raise NotImplementedError
+    return ujson.dumps(
+        data, default=default, indent=indent or 0, escape_forward_slashes=False
+    )
+
+
+register_json_backend("json", _stdlib_json_dumps, json.loads)
+if which_import("orjson", return_bool=True):
+    register_json_backend("orjson", _orjson_dumps, orjson.loads)
+if which_import("ujson", return_bool=True):
+    register_json_backend("ujson", _ujson_dumps, ujson.loads)
+
+
+def _has_nonfinite(obj: Any) -> bool:
+    """Whether an object holds NaN or infinite floats, in containers, arrays or pydantic models."""
+    if isinstance(obj, (float, np.floating)):
+        return not math.isfinite(obj)
+    elif isinstance(obj, dict):
+        return any(_has_nonfinite(val) for val in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(val) for val in obj)
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "fc":
+            return not np.isfinite(obj).all()
+        return obj.dtype.hasobject and any(_has_nonfinite(val) for val in obj.flat)
+    elif hasattr(obj, "__fields__"):
+        return _has_nonfinite(obj.__dict__)
+    return False
+
+
+def _json_dumps(data: Any, default: Callable, **kwargs: Any) -> str:
+    """Encodes with the selected backend, falling back to the standard library."""
+    backend = get_json_backend()
+    if backend.name != "json":
         try:
-            return pydantic_encoder(obj)
-        except TypeError:
+            return backend.dumps(data, default, **kwargs)
+        except (NotImplementedError, TypeError, OverflowError):
             pass
+    return json.dumps(data, default=default, **kwargs)
+
+
+def _json_loads(data: Union[str, bytes], object_hook: Callable, **kwargs: Any) -> Any:
+    """Decodes with the selected backend, falling back to the standard library."""
+    backend = get_json_backend()
+    if backend.name == "json" or kwargs:
+        return json.loads(data, object_hook=object_hook, **kwargs)
+
+    try:
+        obj = backend.loads(data)
+    except ValueError:
+        # Includes NaN and infinity, which the standard library writes but orjson rejects
+        return json.loads(data, object_hook=object_hook)
+    # Compiled backends have no object_hook, only walk objects that may hold encoded arrays
+    if ("_nd_" if isinstance(data, str) else b"_nd_") in data:
+        obj = _apply_object_hook(obj, object_hook)
+    return obj
+
+
+def _apply_object_hook(obj: Any, object_hook: Callable) -> Any:
+    """Applies object_hook bottom-up to all dictionaries, as json.loads does."""
+    if isinstance(obj, dict):
+        return object_hook(
+            {key: _apply_object_hook(val, object_hook) for key, val in obj.items()}
+        )
+    elif isinstance(obj, list):
+        return [_apply_object_hook(val, object_hook) for val in obj]
+    return obj
+
+
+## JSON Ext
 
-        if isinstance(obj, np.ndarray):
-            if obj.shape:
-                data = {
-                    "_nd_": True,
-                    "dtype": obj.dtype.str,
-                    "data": np.ascontiguousarray(obj).tobytes().hex(),
-                }
-                if len(obj.shape) > 1:
-                    data["shape"] = obj.shape
-                return data
 
+def jsonext_encode(obj: Any, array_encoding: str = "hex") -> Any:
+    """
+    Encodes an object using pydantic and NumPy array serialization techniques suitable for JSON.
+    Arrays are encoded as dictionaries holding the dtype, shape and hex- or base64-encoded data.
+    Parameters
+    ----------
+    obj : Any
+        Any object that can be serialized with pydantic and NumPy encoding techniques.
+    array_encoding : str, optional
+        The text encoding of array data: 'hex' or 'base64' (2/3 of the size of 'hex').
+    Returns
+    -------
+    Any
+        A JSON compatible form of the object.
+    Raises
+    ------
+    TypeError
+        When the object cannot be encoded.
+    """
+    try:
+        return pydantic_encoder(obj)
+    except TypeError:
+        pass
+
+    if isinstance(obj, np.ndarray):
+        if obj.shape:
+            buffer = np.ascontiguousarray(obj).tobytes()
+            data = {"_nd_": True, "dtype": obj.dtype.str}
+            if array_encoding == "hex":
+                data["data"] = buffer.hex()
+            elif array_encoding == "base64":
+                data["base64"] = base64.b64encode(buffer).decode("ascii")
             else:
-                # Converts np.array(5) -> 5
-                return obj.tolist()
+                raise KeyError(
+                    f"Array encoding '{array_encoding}' not understood, valid options: 'hex', 'base64'"
+                )
+            if len(obj.shape) > 1:
+                data["shape"] = obj.shape
+            return data
+
+        else:
+            # Converts np.array(5) -> 5
+            return obj.tolist()
+
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
-        return json.JSONEncoder.default(self, obj)
 
+def _jsonext_encoder(array_encoding: str = "hex") -> Callable[[Any], Any]:
+    """Returns the jsonext_encode function for an array encoding."""
+    if array_encoding == "hex":
+        return jsonext_encode
+    return functools.partial(jsonext_encode, array_encoding=array_encoding)
+
+
+class JSONExtArrayEncoder(json.JSONEncoder):
+    def __init__(self, *args, array_encoding: str = "hex", **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.array_encoding = array_encoding
 
-def jsonext_decode(obj: Any) -> Any:
+    def default(self, obj: Any) -> Any:
+        return jsonext_encode(obj, array_encoding=self.array_encoding)
+
+
+def jsonext_decode(obj: Any, *, writable: bool = False) -> Any:
+    """
+    Decodes a JSON object, e.g. an array from its dictionary representation.
+    Parameters
+    ----------
+    obj : Any
+        An encoded object, likely a dictionary.
+    writable : bool, optional
+        By default, base64 arrays are zero-copy read-only views of their decoded bytes, like msgpack-ext
+        arrays. If True, they are copied into writable buffers. Hex arrays are always writable.
+    Returns
+    -------
+    Any
+        The decoded form of the object.
+    """
 
     if "_nd_" in obj:
-        arr = np.frombuffer(bytes.fromhex(obj["data"]), dtype=obj["dtype"])
+        if "base64" in obj:
+            arr = np.frombuffer(base64.b64decode(obj["base64"]), dtype=obj["dtype"])
+            if writable:
+                arr = arr.copy()
+        else:
+            # The decoded buffer is owned by the array alone, so a bytearray makes it writable for free
+            arr = np.frombuffer(bytearray.fromhex(obj["data"]), dtype=obj["dtype"])
         if "shape" in obj:
             arr.shape = obj["shape"]
 
@@ -156,13 +511,18 @@ def jsonext_decode(obj: Any) -> Any:
     return obj
 
 
-def jsonext_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> str:
+def jsonext_dumps(
+    data: Any, *, array_encoding: str = "hex", **kwargs: Optional[Dict[str, Any]]
+) -> str:
     """Safe serialization of Python objects to JSON string representation using all known encoders.
     The JSON serializer uses a custom array syntax rather than flat JSON lists.
     Parameters
     ----------
     data : Any
         A encodable python object.
+    array_encoding : str, optional
+        The text encoding of array data: 'hex' or 'base64'. Both keep the dtype (including byte order)
+        and shape of the arrays, and jsonext_loads decodes either.
     **kwargs : Optional[Dict[str, Any]], optional
         Additional keyword arguments to pass to the constructor
     Returns
@@ -171,41 +531,77 @@ def jsonext_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> str:
         A JSON representation of the data.
     """
 
-    return json.dumps(data, cls=JSONExtArrayEncoder, **kwargs)
+    return _json_dumps(data, _jsonext_encoder(array_encoding), **kwargs)
+
+
+def _jsonext_object_hook(writable: bool = False) -> Callable:
+    """Returns the JSON object_hook decoding arrays with the given options."""
+    if not writable:
+        return jsonext_decode
+    return functools.partial(jsonext_decode, writable=True)
 
 
-def jsonext_loads(data: Union[str, bytes]) -> Any:
+def jsonext_loads(
+    data: Union[str, bytes],
+    *,
+    writable: bool = False,
+    **kwargs: Optional[Dict[str, Any]],
+) -> Any:
     """Deserializes a json representation of known objects into those objects.
     Parameters
     ----------
     data : str or bytes
         The byte-serialized JSON blob.
+    writable : bool, optional
+        Return writable copies of base64 arrays rather than read-only views. See ``jsonext_decode``.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructor.
     Returns
     -------
     Any
         The deserialized Python objects.
     """
 
-    return json.loads(data, object_hook=jsonext_decode)
+    return _json_loads(data, _jsonext_object_hook(writable), **kwargs)
 
 
 ## JSON
 
 
-class JSONArrayEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
-        try:
-            return pydantic_encoder(obj)
-        except TypeError:
-            pass
+def json_encode(obj: Any) -> Any:
+    """
+    Encodes an object using pydantic and NumPy array serialization techniques suitable for JSON.
+    Arrays are encoded as flat lists.
+    Parameters
+    ----------
+    obj : Any
+        Any object that can be serialized with pydantic and NumPy encoding techniques.
+    Returns
+    -------
+    Any
+        A JSON compatible form of the object.
+    Raises
+    ------
+    TypeError
+        When the object cannot be encoded.
+    """
+    try:
+        return pydantic_encoder(obj)
+    except TypeError:
+        pass
 
-        if isinstance(obj, np.ndarray):
-            if obj.shape:
-                return obj.ravel().tolist()
-            else:
-                return obj.tolist()
+    if isinstance(obj, np.ndarray):
+        if obj.shape:
+            return obj.ravel().tolist()
+        else:
+            return obj.tolist()
 
-        return json.JSONEncoder.default(self, obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+class JSONArrayEncoder(json.JSONEncoder):
+    def default(self, obj: Any) -> Any:
+        return json_encode(obj)
 
 
 def json_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> str:
@@ -222,15 +618,21 @@ def json_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> str:
         A JSON representation of the data.
     """
 
-    return json.dumps(data, cls=JSONArrayEncoder, **kwargs)
+    return _json_dumps(data, json_encode, **kwargs)
 
 
-def json_loads(data: str) -> Any:
+def json_loads(
+    data: str, *, writable: bool = False, **kwargs: Optional[Dict[str, Any]]
+) -> Any:
     """Deserializes a json representation of known objects into those objects.
     Parameters
     ----------
     data : str
         The serialized JSON blob.
+    writable : bool, optional
+        Return writable copies of json-ext base64 arrays rather than read-only views.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructor.
     Returns
     -------
     Any
@@ -238,7 +640,110 @@ def json_loads(data: str) -> Any:
     """
 
     # Doesn't hurt anything to try to load JSONext as well
-    return json.loads(data, object_hook=jsonext_decode)
+    return _json_loads(data, _jsonext_object_hook(writable), **kwargs)
+
+
+def _json_key(key: Any) -> str:
+    """Converts a dictionary key as json.dumps does."""
+    if isinstance(key, str):
+        return str.__str__(key)
+    elif key is True:
+        return "true"
+    elif key is False:
+        return "false"
+    elif key is None:
+        return "null"
+    elif isinstance(key, int):
+        return int.__repr__(key)
+    elif isinstance(key, float):
+        return json.dumps(float(key))
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {key.__class__.__name__}"
+    )
+
+
+def json_primitives(data: Any, *, str_keys: bool = True) -> Any:
+    """Converts a Python object into JSON-compatible primitives in a single pass.
+    Equivalent to ``json_loads(json_dumps(data))`` with the standard library, but without producing and
+    parsing an intermediate string: arrays become flat lists, tuples become lists, and models, enums
+    and other objects are encoded with json_encode.
+    Parameters
+    ----------
+    data : Any
+        A encodable python object.
+    str_keys : bool, optional
+        Convert dictionary keys to strings as JSON does. If False, keys are kept as is.
+    Returns
+    -------
+    Any
+        The object built from dict, list, str, int, float, bool and None only.
+    """
+    cls = data.__class__
+    if cls in (str, int, float, bool) or data is None:
+        return data
+    elif isinstance(data, dict):
+        if str_keys:
+            return {
+                _json_key(key): json_primitives(val, str_keys=str_keys)
+                for key, val in data.items()
+            }
+        return {
+            key: json_primitives(val, str_keys=str_keys) for key, val in data.items()
+        }
+    elif isinstance(data, (list, tuple)):
+        return [json_primitives(val, str_keys=str_keys) for val in data]
+    elif isinstance(data, str):
+        return str.__str__(data)
+    elif isinstance(data, int):
+        return int(data)
+    elif isinstance(data, float):
+        return float(data)
+    elif isinstance(data, np.ndarray) and data.dtype.kind in "biuf":
+        return json_encode(data)  # tolist already yields primitives
+
+    return json_primitives(json_encode(data), str_keys=str_keys)
+
+
+## JSON Lines
+
+
+def jsonl_dumps(data: Any, **kwargs: Optional[Dict[str, Any]]) -> str:
+    """Serializes a Python object to a single JSON-lines record, i.e. one line of JSON terminated by a newline.
+    Concatenating records yields a valid JSON-lines document.
+    Parameters
+    ----------
+    data : Any
+        A encodable python object.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructor, except for ``indent``.
+    Returns
+    -------
+    str
+        A JSON-lines record.
+    """
+    kwargs.pop("indent", None)  # a record must fit on one line
+    return json_dumps(data, **kwargs) + "\n"
+
+
+def jsonl_loads(
+    data: Union[str, bytes], **kwargs: Optional[Dict[str, Any]]
+) -> List[Any]:
+    """Deserializes a JSON-lines document into a list of objects, one per non-blank line.
+    Parameters
+    ----------
+    data : str or bytes
+        The serialized JSON-lines blob.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructor.
+    Returns
+    -------
+    List[Any]
+        The deserialized Python objects.
+    """
+
+    # Not splitlines, which also splits on the Unicode line breaks JSON allows unescaped in strings
+    lines = data.split(b"\n" if isinstance(data, bytes) else "\n")
+    return [json_loads(line, **kwargs) for line in lines if line.strip()]
 
 
 ## YAML
@@ -337,14 +842,22 @@ def serialize(
     data : Any
         A encodable python object.
     encoding : str
-        The type of encoding to perform: {'json', 'json-ext', 'yaml', 'msgpack-ext'}
+        The type of encoding to perform: {'json', 'json-ext', 'yaml', 'msgpack-ext', 'jsonl'}. A 'jsonl'
+        (or 'ndjson') encoding produces a single newline-terminated record. A compression suffix, e.g.
+        'msgpack-ext+zstd' or 'json+gzip', compresses the result, see util.compression.
     **kwargs : Optional[Dict[str, Any]], optional
-        Additional keyword arguments to pass to the constructors.
+        Additional keyword arguments to pass to the constructors, and ``compression_level`` for compressed
+        encodings.
     Returns
     -------
     Union[str, bytes]
-        A serialized representation of the data.
+        A serialized representation of the data. Always bytes for compressed encodings.
     """
+    encoding, codec = split_encoding(encoding)
+    if codec is not None:
+        level = kwargs.pop("compression_level", None)
+        return compress(serialize(data, encoding, **kwargs), codec, level)
+
     if encoding.lower() == "json":
         return json_dumps(data, **kwargs)
     elif encoding.lower() == "json-ext":
@@ -353,38 +866,150 @@ def serialize(
         return yaml_dump(data, **kwargs)
     elif encoding.lower() == "msgpack-ext":
         return msgpackext_dumps(data, **kwargs)
+    elif encoding.lower() in ["jsonl", "ndjson"]:
+        return jsonl_dumps(data, **kwargs)
     else:
         raise KeyError(
-            f"Encoding '{encoding}' not understood, valid options: 'json', 'json-ext', 'yaml', 'msgpack-ext'"
+            f"Encoding '{encoding}' not understood, valid options: 'json', 'json-ext', 'yaml', 'msgpack-ext', 'jsonl'"
+        )
+
+
+def get_serializer(
+    encoding: str, **kwargs: Optional[Dict[str, Any]]
+) -> Callable[[Any], Union[str, bytes]]:
+    """Returns a function serializing one Python object at a time with the provided encoder.
+    Encoding dispatch and encoder construction happen once, so the function is suited to serializing
+    many objects in a loop.
+    Parameters
+    ----------
+    encoding : str
+        The type of encoding to perform: {'json', 'json-ext', 'yaml', 'msgpack-ext', 'jsonl'}
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructors.
+    Returns
+    -------
+    Callable[[Any], Union[str, bytes]]
+        Equivalent to ``functools.partial(serialize, encoding=encoding, **kwargs)``.
+    """
+    encoding, codec = split_encoding(encoding)
+    if codec is not None:
+        level = kwargs.pop("compression_level", None)
+        dumps = get_serializer(encoding, **kwargs)
+
+        def compressed_dumps(data: Any) -> bytes:
+            return compress(dumps(data), codec, level)
+
+        return compressed_dumps
+
+    if encoding.lower() in ["json", "json-ext"] and get_json_backend().name == "json":
+        encoder = (
+            JSONArrayEncoder if encoding.lower() == "json" else JSONExtArrayEncoder
+        )
+        return encoder(**kwargs).encode
+    elif encoding.lower() == "msgpack-ext":
+        which_import("msgpack", raise_error=True, raise_msg=_msgpack_which_msg)
+        use_bin_type = kwargs.pop("use_bin_type", True)
+        buffer_callback = kwargs.pop("buffer_callback", None)
+        default = (
+            functools.partial(msgpackext_encode, buffer_callback=buffer_callback)
+            if buffer_callback is not None
+            else msgpackext_encode
+        )
+        return msgpack.Packer(default=default, use_bin_type=use_bin_type, **kwargs).pack
+    else:
+        return functools.partial(serialize, encoding=encoding, **kwargs)
+
+
+def get_deserializer(
+    encoding: str, **kwargs: Optional[Dict[str, Any]]
+) -> Callable[[Union[str, bytes]], Any]:
+    """Returns a function deserializing one blob at a time with the provided decoder.
+    Encoding dispatch and decoder construction happen once, so the function is suited to deserializing
+    many blobs in a loop.
+    Parameters
+    ----------
+    encoding : str
+        The type of encoding of the blobs: {'json', 'json-ext', 'msgpack', 'jsonl'}
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructors.
+    Returns
+    -------
+    Callable[[Union[str, bytes]], Any]
+        Equivalent to ``functools.partial(deserialize, encoding=encoding, **kwargs)``.
+    """
+    encoding, codec = split_encoding(encoding)
+    if codec is not None:
+        loads = get_deserializer(encoding, **kwargs)
+        binary = encoding.lower() in ["msgpack", "msgpack-ext"]
+
+        def decompressed_loads(blob: bytes) -> Any:
+            data = decompress(blob, codec)
+            return loads(data if binary else data.decode())
+
+        return decompressed_loads
+
+    if encoding.lower() in ["json", "json-ext"] and get_json_backend().name == "json":
+        object_hook = _jsonext_object_hook(kwargs.pop("writable", False))
+        decode = json.JSONDecoder(object_hook=object_hook, **kwargs).decode
+
+        def json_decode(blob: Union[str, bytes]) -> Any:
+            return decode(blob.decode() if isinstance(blob, bytes) else blob)
+
+        return json_decode
+    elif encoding.lower() in ["msgpack", "msgpack-ext"]:
+        which_import("msgpack", raise_error=True, raise_msg=_msgpack_which_msg)
+        raw = kwargs.pop("raw", False)
+        object_hook = _msgpackext_object_hook(writable=kwargs.pop("writable", False))
+        # unpackb sets up its context on the stack, which is cheaper than feeding a shared Unpacker
+        return functools.partial(
+            msgpack.unpackb, object_hook=object_hook, raw=raw, **kwargs
         )
+    else:
+        return functools.partial(deserialize, encoding=encoding, **kwargs)
 
 
-def deserialize(blob: Union[str, bytes], encoding: str) -> Any:
+def deserialize(
+    blob: Union[str, bytes], encoding: str, **kwargs: Optional[Dict[str, Any]]
+) -> Any:
     """Encoding Python objects using .
     Parameters
     ----------
     blob : Union[str, bytes]
         The serialized data.
     encoding : str
-        The type of encoding of the blob: {'json', 'json-ext', 'msgpack'}
+        The type of encoding of the blob: {'json', 'json-ext', 'msgpack', 'jsonl'}. A 'jsonl' (or 'ndjson')
+        blob is decoded into a list with one object per line. A compression suffix, e.g. 'msgpack-ext+zstd',
+        decompresses the blob first.
+    **kwargs : Optional[Dict[str, Any]], optional
+        Additional keyword arguments to pass to the constructors, e.g. ``writable`` (msgpack-ext and json-ext)
+        or ``buffers`` (msgpack-ext).
     Returns
     -------
     Any
         The deserialized Python objects.
     """
+    encoding, codec = split_encoding(encoding)
+    if codec is not None:
+        blob = decompress(blob, codec)
+        if encoding.lower() not in ["msgpack", "msgpack-ext"]:
+            blob = blob.decode()
+
     if encoding.lower() == "json":
         assert isinstance(blob, str)
-        return json_loads(blob)
+        return json_loads(blob, **kwargs)
     elif encoding.lower() == "json-ext":
         assert isinstance(blob, (str, bytes))
-        return jsonext_loads(blob)
+        return jsonext_loads(blob, **kwargs)
     elif encoding.lower() == "yaml":
         assert isinstance(blob, str)
         return yaml_load(blob)
     elif encoding.lower() in ["msgpack", "msgpack-ext"]:
         assert isinstance(blob, bytes)
-        return msgpackext_loads(blob)
+        return msgpackext_loads(blob, **kwargs)
+    elif encoding.lower() in ["jsonl", "ndjson"]:
+        assert isinstance(blob, (str, bytes))
+        return jsonl_loads(blob, **kwargs)
     else:
         raise KeyError(
-            f"Encoding '{encoding}' not understood, valid options: 'json', 'json-ext', 'msgpack-ext'"
+            f"Encoding '{encoding}' not understood, valid options: 'json', 'json-ext', 'msgpack-ext', 'jsonl'"
         )
@@ -0,0 +1,79 @@
+"""
+Micro-benchmarks for cmselemental HDF5 reading and writing.
+
+Usage: python devtools/scripts/benchmark_hdf.py [--size 1000000] [--groups 3000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy
+
+from cmselemental.util import hdf
+
+
+def timeit(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds):
+    print(f"    {name:<40} {seconds * 1e3:10.2f} ms")
+
+
+def previous_wrap(data):
+    """The list conversion before user-014: a type check per item, then numpy.array."""
+    assert all(isinstance(item, int) for item in data)
+    return hdf.numpy.array(data, dtype=hdf._get_dtype(data[0]))
+
+
+def bench_lists(size):
+    ints = list(range(size))
+    floats = [random.random() for _ in range(size)]
+    strings = [str(i) for i in range(size // 10)]
+    nested = [[random.random()] * 3 for _ in range(size // 3)]
+    ragged = [list(range(i % 10)) for i in range(size // 5)]
+
+    print(f"list to array conversion ({size} elements)")
+    report("ints (previous)", timeit(lambda: previous_wrap(ints)))
+    report("ints", timeit(lambda: hdf._wrap_homogenous_array(ints)))
+    report("floats", timeit(lambda: hdf._wrap_homogenous_array(floats)))
+    report(
+        f"strings ({len(strings)})", timeit(lambda: hdf._wrap_homogenous_array(strings))
+    )
+    report("nested (rectangular)", timeit(lambda: hdf._wrap_homogenous_array(nested)))
+    report("ragged", timeit(lambda: hdf._wrap_homogenous_array(ragged)))
+
+
+def bench_groups(ngroups):
+    data = {
+        f"group{i}": {
+            "energies": numpy.random.rand(50),
+            "steps": numpy.arange(10),
+            "label": "hello",
+            "geometry": {"coordinates": numpy.random.rand(10, 3)},
+        }
+        for i in range(ngroups)
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "groups.h5")
+        print(f"many-group files ({ngroups} groups)")
+        report("write_file", timeit(lambda: hdf.write_file(path, data)))
+        report("read_file", timeit(lambda: hdf.read_file(path)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10**6)
+    parser.add_argument("--groups", type=int, default=3000)
+    args = parser.parse_args()
+
+    bench_lists(args.size)
+    bench_groups(args.groups)
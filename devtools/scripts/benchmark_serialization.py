@@ -0,0 +1,249 @@
+"""
+Micro-benchmarks for cmselemental serialization.
+
+Usage: python devtools/scripts/benchmark_serialization.py [--records 10000] [--encodings json msgpack-ext]
+"""
+
+import argparse
+import time
+
+import numpy
+
+from cmselemental.models import ComputeError, OutputProc, Provenance
+
+
+def make_outputs(nrecords):
+    return [
+        OutputProc(
+            schema_name="bench_schema",
+            schema_version=1,
+            success=False,
+            stdout="x" * 200,
+            error=ComputeError(error_type="random_error", error_message=f"error {i}"),
+            provenance=Provenance(creator="bench", version="1.0", routine="bench"),
+            extras={"energy": float(i), "gradient": numpy.random.rand(10, 3)},
+        )
+        for i in range(nrecords)
+    ]
+
+
+def timeit(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds, nrecords):
+    print(f"    {name:<40} {seconds * 1e6 / nrecords:10.2f} us/record")
+
+
+def bench_dict(outputs):
+    nrecords = len(outputs)
+    print(f"ProtoModel.dict ({nrecords} records)")
+    report(
+        "dict (serialization plan)",
+        timeit(lambda: [out.dict() for out in outputs]),
+        nrecords,
+    )
+    report(
+        "dict (pydantic)",
+        timeit(
+            lambda: [out.dict(exclude_unset=False, by_alias=True) for out in outputs]
+        ),
+        nrecords,
+    )
+
+
+def bench_many(outputs, encodings):
+    nrecords = len(outputs)
+    print(f"parse_many / serialize_many ({nrecords} records)")
+    for encoding in encodings:
+        blobs = [out.serialize(encoding) for out in outputs]
+        report(
+            f"{encoding} serialize loop",
+            timeit(lambda: [out.serialize(encoding) for out in outputs]),
+            nrecords,
+        )
+        report(
+            f"{encoding} serialize_many",
+            timeit(lambda: OutputProc.serialize_many(outputs, encoding)),
+            nrecords,
+        )
+        report(
+            f"{encoding} parse_raw loop",
+            timeit(lambda: [OutputProc.parse_raw(b, encoding=encoding) for b in blobs]),
+            nrecords,
+        )
+        report(
+            f"{encoding} parse_many",
+            timeit(lambda: OutputProc.parse_many(blobs, encoding=encoding)),
+            nrecords,
+        )
+        report(
+            f"{encoding} parse_many (trusted)",
+            timeit(
+                lambda: OutputProc.parse_many(blobs, encoding=encoding, trusted=True)
+            ),
+            nrecords,
+        )
+        report(
+            f"{encoding} parse_many (process pool)",
+            timeit(
+                lambda: OutputProc.parse_many(
+                    blobs, encoding=encoding, max_workers=None
+                ),
+                repeat=1,
+            ),
+            nrecords,
+        )
+
+
+def bench_json_backends(outputs):
+    from cmselemental.util import serialization
+
+    nrecords = len(outputs)
+    data = [out.dict() for out in outputs]
+    print(f"JSON backends ({nrecords} records)")
+    previous = serialization.get_json_backend().name
+    for backend in serialization.json_backends:
+        serialization.set_json_backend(backend)
+        for encoding in ["json", "json-ext"]:
+            blobs = [serialization.serialize(d, encoding) for d in data]
+            report(
+                f"{backend} {encoding} dumps",
+                timeit(lambda: [serialization.serialize(d, encoding) for d in data]),
+                nrecords,
+            )
+            report(
+                f"{backend} {encoding} loads",
+                timeit(lambda: [serialization.deserialize(b, encoding) for b in blobs]),
+                nrecords,
+            )
+    serialization.set_json_backend(previous)
+
+
+def bench_dict_encoding(outputs):
+    import json
+
+    from cmselemental.util import serialization
+
+    nrecords = len(outputs)
+    data = [out.dict() for out in outputs]
+    print(f"dict(encoding='json') ({nrecords} records)")
+    report(
+        "serialize + json.loads",
+        timeit(lambda: [json.loads(serialization.serialize(d, "json")) for d in data]),
+        nrecords,
+    )
+    report(
+        "json_primitives",
+        timeit(lambda: [serialization.json_primitives(d) for d in data]),
+        nrecords,
+    )
+
+
+def bench_array_encoding(outputs):
+    from cmselemental.util import serialization
+
+    nrecords = len(outputs)
+    data = [out.dict() for out in outputs]
+    print(f"JSON array encodings ({nrecords} records)")
+    for encoding, kwargs in [
+        ("json", {}),
+        ("json-ext", {"array_encoding": "hex"}),
+        ("json-ext", {"array_encoding": "base64"}),
+    ]:
+        name = " ".join([encoding, *kwargs.values()])
+        blobs = [serialization.serialize(d, encoding, **kwargs) for d in data]
+        size = sum(len(b) for b in blobs) / nrecords
+        print(f"    {name + ' size':<40} {size:10.0f} bytes/record")
+        report(
+            f"{name} dumps",
+            timeit(
+                lambda: [serialization.serialize(d, encoding, **kwargs) for d in data]
+            ),
+            nrecords,
+        )
+        report(
+            f"{name} loads",
+            timeit(lambda: [serialization.deserialize(b, encoding) for b in blobs]),
+            nrecords,
+        )
+
+
+def bench_compression(outputs, encodings):
+    from cmselemental.util import compression, serialization
+    from cmselemental.util.importing import which_import
+
+    nrecords = len(outputs)
+    data = [out.dict() for out in outputs]
+    print(f"Compressed encodings ({nrecords} records, default levels)")
+    for encoding in encodings:
+        raw = sum(len(serialization.serialize(d, encoding)) for d in data)
+        print(f"    {encoding + ' size':<40} {raw / nrecords:10.0f} bytes/record")
+        for codec in compression.codecs.values():
+            if codec.module is not None and not which_import(
+                codec.module, return_bool=True
+            ):
+                continue
+            name = f"{encoding}+{codec.name}"
+            dumps = serialization.get_serializer(name)
+            loads = serialization.get_deserializer(name)
+            blobs = [dumps(d) for d in data]
+            size = sum(len(b) for b in blobs)
+            print(
+                f"    {name + ' size':<40} {size / nrecords:10.0f} bytes/record ({raw / size:.1f}x)"
+            )
+            report(f"{name} dumps", timeit(lambda: [dumps(d) for d in data]), nrecords)
+            report(f"{name} loads", timeit(lambda: [loads(b) for b in blobs]), nrecords)
+
+
+def bench_hash(nrecords):
+    import hashlib
+
+    from cmselemental.models import InputProc
+
+    inputs = [
+        InputProc(
+            schema_name="bench_schema",
+            schema_version=1,
+            keywords={"method": "b3lyp", "basis": "6-31g", "maxiter": i},
+            extras={"coordinates": numpy.random.rand(30, 3)},
+        )
+        for i in range(nrecords)
+    ]
+    print(f"InputProc hashing ({nrecords} records)")
+    report(
+        "json (sort_keys) + blake2b",
+        timeit(
+            lambda: [
+                hashlib.blake2b(
+                    inp.serialize("json", sort_keys=True).encode()
+                ).hexdigest()
+                for inp in inputs
+            ]
+        ),
+        nrecords,
+    )
+    report("get_hash", timeit(lambda: [inp.get_hash() for inp in inputs]), nrecords)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument(
+        "--encodings", nargs="+", default=["json", "json-ext", "msgpack-ext"]
+    )
+    args = parser.parse_args()
+
+    outputs = make_outputs(args.records)
+    bench_dict(outputs)
+    bench_many(outputs, args.encodings)
+    bench_json_backends(outputs)
+    bench_dict_encoding(outputs)
+    bench_array_encoding(outputs)
+    bench_compression(outputs, args.encodings)
+    bench_hash(args.records)
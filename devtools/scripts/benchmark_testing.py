@@ -0,0 +1,130 @@
+"""
+Micro-benchmarks for cmselemental.testing comparisons.
+
+Usage: python devtools/scripts/benchmark_testing.py [--size 100000]
+"""
+
+import argparse
+import logging
+import time
+
+import numpy
+
+from cmselemental import testing
+
+
+def timeit(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, seconds):
+    print(f"    {name:<40} {seconds * 1e3:10.2f} ms")
+
+
+def item_by_item(expected, computed):
+    """The float list comparison before user-023: one compare_values call per item."""
+    errors = []
+    for i, item1, item2 in zip(range(len(expected)), expected, computed):
+        passfail, msg = testing.compare_values(
+            item1, item2, atol=1e-6, rtol=1e-16, return_message=True, quiet=True
+        )
+        if not passfail:
+            errors.append((f"root.{i}", msg))
+    return errors
+
+
+def bench_recursive(size):
+    floats = numpy.random.rand(size).tolist()
+    noisy = (numpy.array(floats) + 1e-9).tolist()
+    ints = list(range(size))
+    nested = {
+        f"key{i}": {"gradient": numpy.random.rand(30, 3), "energy": float(i)}
+        for i in range(size // 100)
+    }
+
+    print(f"compare_recursive ({size} elements)")
+    report("float list (previous)", timeit(lambda: item_by_item(floats, noisy)))
+    report(
+        "float list",
+        timeit(lambda: testing.compare_recursive(floats, noisy, quiet=True)),
+    )
+    report(
+        "int list", timeit(lambda: testing.compare_recursive(ints, ints, quiet=True))
+    )
+    report(
+        f"dict of arrays ({len(nested)} keys)",
+        timeit(lambda: testing.compare_recursive(nested, nested, quiet=True)),
+    )
+    mismatched = list(floats)
+    mismatched[size // 2] += 1.0
+    report(
+        "float list, one mismatch",
+        timeit(lambda: testing.compare_recursive(floats, mismatched, quiet=True)),
+    )
+
+
+def bench_messages(size):
+    # numpy.array_str summarizes arrays of more than 1000 elements itself, smaller ones are printed in full
+    pairs = [
+        (expected, expected + 1e-3)
+        for expected in numpy.random.rand(max(size // 1000, 1), 1000)
+    ]
+
+    def full_dump():
+        """The failure messages before user-024: the three arrays in full."""
+        for expected, computed in pairs:
+            for arr in (expected, computed, computed - expected):
+                numpy.array_str(arr, max_line_width=120, precision=12)
+
+    print(f"failing compare_values ({len(pairs)} arrays of 1000 elements)")
+    report("message formatting (previous)", timeit(full_dump))
+    report(
+        "quiet",
+        timeit(lambda: [testing.compare_values(x, c, quiet=True) for x, c in pairs]),
+    )
+    report(
+        "return_message (summary)",
+        timeit(
+            lambda: [
+                testing.compare_values(x, c, quiet=True, return_message=True)
+                for x, c in pairs
+            ]
+        ),
+    )
+
+
+def bench_many(size):
+    npairs = max(size // 100, 1)
+    expected = [
+        {"energy": float(i), "gradient": numpy.random.rand(30, 3), "labels": ["C"] * 30}
+        for i in range(npairs)
+    ]
+    computed = [dict(record, energy=record["energy"] + 1e-9) for record in expected]
+    computed[npairs // 2]["energy"] += 1.0
+    pairs = list(zip(expected, computed))
+
+    print(f"compare_many ({npairs} pairs)")
+    report(
+        "compare_recursive loop",
+        timeit(lambda: [testing.compare_recursive(x, c) for x, c in pairs]),
+    )
+    report("max_workers=1", timeit(lambda: testing.compare_many(pairs, max_workers=1)))
+    report(
+        "max_workers=None", timeit(lambda: testing.compare_many(pairs, chunk_size=250))
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10**5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    bench_recursive(args.size)
+    bench_messages(args.size)
+    bench_many(args.size)
@@ -0,0 +1,57 @@
+"""
+Micro-benchmarks for cmselemental array types.
+
+Usage: python devtools/scripts/benchmark_types.py [--size 1000000]
+"""
+
+import argparse
+import time
+
+import numpy
+
+from cmselemental.types import Array, TypedArray
+
+
+def timeit(func, number=10, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def report(name, seconds):
+    print(f"    {name:<40} {seconds * 1e6:12.2f} us")
+
+
+def bench_validate(size):
+    as_list = numpy.random.rand(size).tolist()
+    as_array = numpy.random.rand(size)
+    as_float32 = as_array.astype(numpy.float32)
+    vectors = numpy.random.rand(size // 3, 3)
+
+    print(f"Array[float] validation ({size} elements)")
+    report("list", timeit(lambda: Array[float].validate(as_list), number=1))
+    report("float32 array", timeit(lambda: Array[float].validate(as_float32)))
+    report("float64 array", timeit(lambda: Array[float].validate(as_array)))
+    report(
+        "float64 array, shape (-1, 3)",
+        timeit(lambda: Array[float, (-1, 3)].validate(vectors)),
+    )
+
+    print("Array[float] subscription")
+    report(
+        "new class (previous)",
+        timeit(lambda: type("Array", (TypedArray,), {"_dtype": float}), number=1000),
+    )
+    report("cached", timeit(lambda: Array[float], number=1000))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10**6)
+    args = parser.parse_args()
+
+    bench_validate(args.size)
@@ -57,6 +57,14 @@ setup(
         "msgpack": [
             "msgpack",
         ],
+        # Compiled JSON libraries, used once selected with util.serialization.set_json_backend
+        "json": [
+            "orjson",  # or ujson
+        ],
+        "compression": [
+            "zstandard",
+            "lz4",
+        ],
     },
     classifiers=[
         "Development Status :: 3 - Alpha",